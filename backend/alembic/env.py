@@ -0,0 +1,77 @@
+"""
+Alembic 迁移环境
+
+命令行使用：在 backend 目录执行 alembic upgrade head
+应用启动时由 init_db 调用，并通过 config.attributes["connection"] 传入已有连接。
+"""
+
+from logging.config import fileConfig
+import asyncio
+
+from alembic import context
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core.database import Base, get_async_database_url
+import app.models  # noqa: F401  注册所有模型
+
+config = context.config
+
+# 由应用调用时沿用应用自己的日志配置
+if config.config_file_name is not None and "connection" not in config.attributes:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """生成 SQL 脚本（不连接数据库）"""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        transaction_per_migration=True
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection) -> None:
+    """在给定连接上执行迁移"""
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite 不支持大部分 ALTER TABLE，改表时使用批量模式重建
+        render_as_batch=connection.dialect.name == "sqlite",
+        # 每个迁移单独提交，便于在迁移中使用 autocommit_block（如在线建索引）
+        transaction_per_migration=True
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    """创建异步引擎并执行迁移"""
+    connectable = create_async_engine(get_async_database_url(settings.DATABASE_URL))
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
+def run_migrations_online() -> None:
+    """连接数据库执行迁移"""
+    connection = config.attributes.get("connection")
+    if connection is None:
+        asyncio.run(run_async_migrations())
+    else:
+        do_run_migrations(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,22 @@
+"""基线：init_db 通过 create_all 创建的初始表结构
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 表结构由 init_db 中的 Base.metadata.create_all 创建，
+    # 已有数据库从此版本开始由迁移管理
+    pass
+
+
+def downgrade() -> None:
+    pass
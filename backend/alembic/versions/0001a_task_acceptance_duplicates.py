@@ -0,0 +1,73 @@
+"""检查重复的任务接取记录（0002 的唯一索引之前）
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-17
+
+存在重复的 (task_id, user_id) 接取记录时中止迁移并列出重复项，不自动删除数据。
+确认后可显式清理（保留每组最早的一条，并按实际记录数修正这些任务的接取人数）：
+
+    alembic -x dedupe_task_acceptances=true upgrade head
+"""
+
+import logging
+
+from alembic import context, op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0001a"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# 中止时最多列出的重复组数
+MAX_REPORTED = 20
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(
+        "SELECT task_id, user_id, MIN(id) AS keep_id, COUNT(*) AS total "
+        "FROM task_acceptances GROUP BY task_id, user_id HAVING COUNT(*) > 1 "
+        "ORDER BY task_id, user_id"
+    )).all()
+    if not duplicates:
+        return
+
+    listing = "\n".join(
+        f"  task_id={row.task_id} user_id={row.user_id}: {row.total} 条（保留 id={row.keep_id}）"
+        for row in duplicates[:MAX_REPORTED]
+    )
+    if context.get_x_argument(as_dictionary=True).get("dedupe_task_acceptances") != "true":
+        raise RuntimeError(
+            f"task_acceptances 中有 {len(duplicates)} 组重复的 (task_id, user_id)，无法创建唯一索引:\n"
+            f"{listing}\n"
+            "确认后执行 alembic -x dedupe_task_acceptances=true upgrade head 清理重复记录"
+        )
+
+    logger.warning("清理 %d 组重复的接取记录:\n%s", len(duplicates), listing)
+    for row in duplicates:
+        bind.execute(
+            sa.text(
+                "DELETE FROM task_acceptances "
+                "WHERE task_id = :task_id AND user_id = :user_id AND id <> :keep_id"
+            ),
+            {"task_id": row.task_id, "user_id": row.user_id, "keep_id": row.keep_id}
+        )
+    for task_id in sorted({row.task_id for row in duplicates}):
+        bind.execute(
+            sa.text(
+                "UPDATE tasks SET accepted_count = "
+                "(SELECT COUNT(*) FROM task_acceptances WHERE task_acceptances.task_id = :task_id) "
+                "WHERE id = :task_id"
+            ),
+            {"task_id": task_id}
+        )
+
+
+def downgrade() -> None:
+    # 清理的重复记录无法恢复
+    pass
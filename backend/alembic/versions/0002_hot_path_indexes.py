@@ -0,0 +1,56 @@
+"""热点查询索引：任务列表、接取记录、会议日历和出席记录
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-17
+
+PostgreSQL 上使用 CREATE INDEX CONCURRENTLY 在线建索引，不阻塞读写；
+新数据库的索引已由 create_all 按模型定义创建，这里使用 IF NOT EXISTS 跳过。
+唯一索引要求没有重复的接取记录，由 0001a 事先检查。
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001a"
+branch_labels = None
+depends_on = None
+
+# (索引名, 表名, 列, 是否唯一)
+INDEXES = [
+    ("ix_tasks_type_id", "tasks", ["type", "id"], False),
+    ("ix_tasks_status_id", "tasks", ["status", "id"], False),
+    ("ix_tasks_publisher_id_id", "tasks", ["publisher_id", "id"], False),
+    ("ix_task_acceptances_user_id_id", "task_acceptances", ["user_id", "id"], False),
+    ("uq_task_acceptances_task_id_user_id", "task_acceptances", ["task_id", "user_id"], True),
+    ("ix_meetings_meeting_date", "meetings", ["meeting_date"], False),
+    ("ix_meetings_created_by_id", "meetings", ["created_by_id"], False),
+    ("ix_meeting_attendances_meeting_id_user_id_instance_date", "meeting_attendances",
+     ["meeting_id", "user_id", "instance_date"], False),
+    ("ix_meeting_attendances_user_id", "meeting_attendances", ["user_id"], False),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # CONCURRENTLY 不能在事务中执行
+        with op.get_context().autocommit_block():
+            for name, table, columns, unique in INDEXES:
+                op.create_index(
+                    name, table, columns, unique=unique,
+                    postgresql_concurrently=True, if_not_exists=True
+                )
+    else:
+        for name, table, columns, unique in INDEXES:
+            op.create_index(name, table, columns, unique=unique, if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, _, _ in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
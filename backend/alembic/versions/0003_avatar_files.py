@@ -0,0 +1,146 @@
+"""头像迁移到文件存储：users.avatar 中的 base64 数据写入文件，只保留头像地址
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+按用户ID分批读取（每批 BATCH_SIZE 条），每次只在内存中保留一批头像数据。
+
+文件布局与本修订创建时的 app.services.avatar_store 相同
+（UPLOAD_DIR/avatars/<哈希前两位>/<SHA-256>.<扩展名>），这里单独保留一份，不导入应用代码。
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import re
+import tempfile
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+BATCH_SIZE = 100
+
+# 头像访问地址前缀
+AVATAR_URL_PREFIX = "/api/v1/users/avatars/"
+
+# 图片类型 -> 扩展名
+AVATAR_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+# 扩展名 -> MIME 类型（降级时还原 data URL）
+MIME_TYPES = {"png": "image/png", "jpg": "image/jpeg", "gif": "image/gif", "webp": "image/webp"}
+DEFAULT_MIME_TYPE = "application/octet-stream"
+
+_DATA_URL_RE = re.compile(r"^data:(image/[\w.+-]+);base64,(.*)$", re.DOTALL)
+_FILENAME_RE = re.compile(r"^([0-9a-f]{64})\.(\w+)$")
+
+
+def _avatar_path(filename: str):
+    """头像文件名对应的磁盘路径；文件名格式不正确时返回 None"""
+    match = _FILENAME_RE.match(filename)
+    if not match:
+        return None
+    return os.path.join(settings.UPLOAD_DIR, "avatars", match.group(1)[:2], filename)
+
+
+def _save_data_url(data_url: str) -> str:
+    """按内容哈希保存 base64 头像数据（已存在时复用），返回头像访问地址"""
+    match = _DATA_URL_RE.match(data_url)
+    if not match or match.group(1).lower() not in AVATAR_EXTENSIONS:
+        raise ValueError("不支持的头像格式")
+    try:
+        content = base64.b64decode(match.group(2), validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError("头像数据无效") from e
+    if not content:
+        raise ValueError("头像数据无效")
+
+    filename = f"{hashlib.sha256(content).hexdigest()}.{AVATAR_EXTENSIONS[match.group(1).lower()]}"
+    path = _avatar_path(filename)
+    if not os.path.exists(path):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return AVATAR_URL_PREFIX + filename
+
+
+def _batches(conn, condition: str):
+    """按ID分批读取满足条件的 (id, avatar)"""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                f"SELECT id, avatar FROM users WHERE id > :last_id AND {condition} "
+                f"ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    converted = 0
+    for rows in _batches(conn, "avatar LIKE 'data:image%'"):
+        updates = []
+        for user_id, avatar in rows:
+            try:
+                updates.append({"id": user_id, "avatar": _save_data_url(avatar)})
+            except ValueError:
+                # 无法解析的头像数据清空，用户重新上传即可
+                logger.warning("用户 %s 的头像数据无效，已清空", user_id)
+                updates.append({"id": user_id, "avatar": None})
+        if updates:
+            conn.execute(sa.text("UPDATE users SET avatar = :avatar WHERE id = :id"), updates)
+            converted += len(updates)
+    if converted:
+        logger.info("头像迁移到文件存储: %d 条", converted)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    for rows in _batches(conn, f"avatar LIKE '{AVATAR_URL_PREFIX}%'"):
+        updates = []
+        for user_id, avatar in rows:
+            filename = avatar[len(AVATAR_URL_PREFIX):]
+            path = _avatar_path(filename)
+            if path is None:
+                continue
+            try:
+                with open(path, "rb") as f:
+                    content = base64.b64encode(f.read()).decode("ascii")
+            except FileNotFoundError:
+                updates.append({"id": user_id, "avatar": None})
+                continue
+            mime_type = MIME_TYPES.get(filename.rsplit(".", 1)[1], DEFAULT_MIME_TYPE)
+            updates.append({"id": user_id, "avatar": f"data:{mime_type};base64,{content}"})
+        if updates:
+            conn.execute(sa.text("UPDATE users SET avatar = :avatar WHERE id = :id"), updates)
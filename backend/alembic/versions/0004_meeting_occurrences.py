@@ -0,0 +1,46 @@
+"""会议实例物化表 meeting_occurrences
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+新数据库的表已由 create_all 创建，这里跳过；
+实例数据由应用启动时的 refresh_occurrences 回填并由后台任务延伸。
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("meeting_occurrences"):
+        return
+
+    op.create_table(
+        "meeting_occurrences",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "meeting_id", sa.Integer(),
+            sa.ForeignKey("meetings.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("occurrence_date", sa.DateTime(), nullable=False),
+        sa.Column("is_instance", sa.Boolean(), nullable=False),
+    )
+    op.create_index(
+        "ix_meeting_occurrences_occurrence_date_meeting_id",
+        "meeting_occurrences", ["occurrence_date", "meeting_id"]
+    )
+    op.create_index(
+        "uq_meeting_occurrences_meeting_id_occurrence_date",
+        "meeting_occurrences", ["meeting_id", "occurrence_date"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("meeting_occurrences")
@@ -0,0 +1,35 @@
+"""集合版本号表 collection_versions（列表接口的 ETag）
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+新数据库的表已由 create_all 创建、计数器由 init_db 写入，这里跳过。
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+COLLECTIONS = ("tasks", "meetings")
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("collection_versions"):
+        return
+
+    table = op.create_table(
+        "collection_versions",
+        sa.Column("name", sa.String(50), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+    )
+    op.bulk_insert(table, [{"name": name, "version": 0} for name in COLLECTIONS])
+
+
+def downgrade() -> None:
+    op.drop_table("collection_versions")
@@ -0,0 +1,137 @@
+"""全文索引表 tasks_fts、meetings_fts、users_fts
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+- SQLite：FTS5 虚拟表（rowid 即记录ID）
+- PostgreSQL：tsvector（simple 配置）+ GIN 索引
+- 其他数据库：不建立索引（搜索回退到 LIKE 查询）
+
+索引表为空时从源表按ID分批回填，每次只在内存中保留一批记录。
+SQLite 在连接上注册切分函数，每批一条 INSERT ... SELECT；
+PostgreSQL 每批读取一次源表，切分后批量插入。
+
+词元切分规则与本修订创建时的 app.services.search_index.tokenize_document 相同
+（中文保留单字和相邻二元组，其他按单词），这里单独保留一份，不导入应用代码；
+以后修改切分规则时需要新的修订重建索引。
+"""
+
+from alembic import op
+import sqlalchemy as sa
+import logging
+import re
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+BATCH_SIZE = 1000
+
+# (索引表, 源表, 索引字段)
+SEARCH_INDEXES = (
+    ("tasks_fts", "tasks", ("title", "description")),
+    ("meetings_fts", "meetings", ("title", "description")),
+    ("users_fts", "users", ("username", "name", "email")),
+)
+
+# SQLite 中注册的切分函数名
+TOKENIZE_FUNCTION = "search_tokens"
+
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+
+def tokenize_document(*texts):
+    """切分待索引的文本：中文保留单字和二元组，其他按单词"""
+    tokens = []
+    for value in texts:
+        if not value:
+            continue
+        for run in _TOKEN_RE.findall(value.lower()):
+            if _CJK_RE.match(run):
+                tokens.extend(run)
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            else:
+                tokens.append(run)
+    return " ".join(tokens)
+
+
+def _batch_bounds(bind, source: str):
+    """按ID分批，依次返回每批的 (起始ID（不含）, 结束ID（含）)"""
+    last_id = 0
+    while True:
+        end_id = bind.execute(
+            sa.text(
+                f"SELECT MAX(id) FROM (SELECT id FROM {source} WHERE id > :last_id "
+                f"ORDER BY id LIMIT :limit) AS batch"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).scalar()
+        if end_id is None:
+            return
+        yield last_id, end_id
+        last_id = end_id
+
+
+def _backfill_sqlite(bind, table: str, source: str, fields) -> None:
+    bind.connection.dbapi_connection.create_function(TOKENIZE_FUNCTION, len(fields), tokenize_document)
+    for start_id, end_id in _batch_bounds(bind, source):
+        bind.execute(
+            sa.text(
+                f"INSERT INTO {table} (rowid, tokens) "
+                f"SELECT id, {TOKENIZE_FUNCTION}({', '.join(fields)}) FROM {source} "
+                f"WHERE id > :start_id AND id <= :end_id"
+            ),
+            {"start_id": start_id, "end_id": end_id}
+        )
+
+
+def _backfill_postgresql(bind, table: str, source: str, fields) -> None:
+    for start_id, end_id in _batch_bounds(bind, source):
+        rows = bind.execute(
+            sa.text(f"SELECT id, {', '.join(fields)} FROM {source} WHERE id > :start_id AND id <= :end_id"),
+            {"start_id": start_id, "end_id": end_id}
+        ).all()
+        bind.execute(
+            sa.text(f"INSERT INTO {table} (id, tokens) VALUES (:id, to_tsvector('simple', :tokens))"),
+            [{"id": row[0], "tokens": tokenize_document(*row[1:])} for row in rows]
+        )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        return
+
+    for table, source, fields in SEARCH_INDEXES:
+        if dialect == "sqlite":
+            op.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(tokens)")
+        else:
+            op.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, tokens TSVECTOR NOT NULL)")
+            op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_tokens ON {table} USING GIN (tokens)")
+
+        # 已有索引数据（由旧版本启动时创建）时不重复回填
+        if bind.execute(sa.text(f"SELECT 1 FROM {table} LIMIT 1")).first():
+            continue
+        if dialect == "sqlite":
+            _backfill_sqlite(bind, table, source, fields)
+        else:
+            _backfill_postgresql(bind, table, source, fields)
+        count = bind.execute(sa.text(f"SELECT COUNT(*) FROM {table}")).scalar()
+        if count:
+            logger.info("回填全文索引 %s: %d 条", table, count)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name not in ("sqlite", "postgresql"):
+        return
+
+    for table, _, _ in SEARCH_INDEXES:
+        op.execute(f"DROP TABLE IF EXISTS {table}")
@@ -0,0 +1,34 @@
+"""会议增加 occurrences_exhausted 列（后台延伸实例时跳过不会再有实例的会议）
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+已有会议默认为 false，下一次后台延伸时加载一次并标记。
+新数据库的列已由 create_all 创建，这里跳过。
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("meetings")}
+    if "occurrences_exhausted" in columns:
+        return
+
+    with op.batch_alter_table("meetings") as batch_op:
+        batch_op.add_column(sa.Column(
+            "occurrences_exhausted", sa.Boolean(), nullable=False, server_default=sa.false()
+        ))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("meetings") as batch_op:
+        batch_op.drop_column("occurrences_exhausted")
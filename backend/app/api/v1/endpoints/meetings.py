@@ -3,33 +3,62 @@
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
 from app.core.auth import get_current_active_user
+from app.core.conditional import ConditionalGet, conditional_get
 from app.schemas import (
     MeetingCreate, MeetingUpdate, MeetingResponse, MeetingDetailResponse,
-    AttendanceUpdate, AttendanceResponse, MessageResponse
+    AttendanceUpdate, AttendanceResponse, MessageResponse, CurrentUser
 )
+from app.services.collection_versions import MEETINGS
 from app.services.meeting_service import MeetingService
-from app.models import User, MeetingType, AttendanceStatus
+from app.services.avatar_store import thumbnail_url
+from app.services.user_loader import UserLoader, get_read_user_loader, get_user_loader
+from app.models import MeetingType, AttendanceStatus
 
 router = APIRouter()
 
+# 日历列表的数据库会话：开启 ATTENDANCE_PENDING_ROWS_ON_READ 时读取会写入出席记录，只能使用主库
+get_calendar_db = get_db if settings.ATTENDANCE_PENDING_ROWS_ON_READ else get_read_db
+
+
+async def build_attendance_responses(attendances, user_loader: UserLoader) -> List[AttendanceResponse]:
+    """出席记录转换为响应格式（一次查询加载所有相关用户）"""
+    users = await user_loader.load_many(att.user_id for att in attendances)
+    responses = []
+    for att in attendances:
+        user = users[att.user_id]
+        responses.append(AttendanceResponse(
+            id=att.id,
+            meeting_id=att.meeting_id,
+            user_id=att.user_id,
+            user_name=user.name if user else None,
+            user_avatar=thumbnail_url(user.avatar) if user else None,
+            instance_date=att.instance_date,
+            status=att.status,
+            notes=att.notes,
+            created_at=att.created_at,
+            updated_at=att.updated_at
+        ))
+    return responses
+
 
 @router.post("/", response_model=MeetingResponse)
 async def create_meeting(
     meeting_data: MeetingCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """创建会议/事件"""
     meeting_service = MeetingService(db)
     
     try:
-        meeting = meeting_service.create_meeting(meeting_data, current_user.id)
+        meeting = await meeting_service.create_meeting(meeting_data, current_user.id)
         return meeting
     except Exception as e:
         raise HTTPException(
@@ -45,22 +74,27 @@ async def get_meetings(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
     meeting_type: Optional[MeetingType] = Query(None),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_calendar_db),
+    conditional: ConditionalGet = Depends(conditional_get(MEETINGS, session=get_calendar_db))
 ):
     """
     获取会议列表（包括重复会议的所有实例）
     
-    对于重复会议，会自动生成所有在日期范围内的实例
+    对于重复会议，会自动生成所有在日期范围内的实例；数据未变化时返回 304
     """
+    response = await conditional.early_response()
+    if response is not None:
+        return response
+    
     import logging
     logger = logging.getLogger(__name__)
     
     try:
-        logger.info(f"获取会议列表请求: skip={skip}, limit={limit}, start_date={start_date}, end_date={end_date}, meeting_type={meeting_type}")
+        logger.info("获取会议列表请求: skip=%s, limit=%s, start_date=%s, end_date=%s, meeting_type=%s", skip, limit, start_date, end_date, meeting_type)
         
         meeting_service = MeetingService(db)
-        meetings = meeting_service.get_meetings_with_instances(
+        meetings = await meeting_service.get_meetings_with_instances(
             skip=skip,
             limit=limit,
             start_date=start_date,
@@ -69,16 +103,16 @@ async def get_meetings(
             current_user_id=current_user.id  # 传递当前用户ID，用于获取出席状态
         )
         
-        logger.info(f"成功返回 {len(meetings)} 个会议实例")
+        logger.info("成功返回 %s 个会议实例", len(meetings))
         
         # 确保返回的是列表
         if not isinstance(meetings, list):
-            logger.error(f"返回的数据不是列表类型: {type(meetings)}")
+            logger.error("返回的数据不是列表类型: %s", type(meetings))
             return []
         
-        return meetings
+        return await conditional.cache_response(meetings)
     except Exception as e:
-        logger.error(f"获取会议列表失败: {str(e)}", exc_info=True)
+        logger.error("获取会议列表失败: %s", e, exc_info=True)
         # 返回空列表而不是抛出异常，避免前端错误
         return []
 
@@ -89,34 +123,40 @@ async def get_my_meetings(
     limit: int = Query(100, ge=1, le=1000),
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_calendar_db),
+    conditional: ConditionalGet = Depends(conditional_get(MEETINGS, session=get_calendar_db))
 ):
     """
     获取我的会议（创建的或需要参加的），包括重复会议的所有实例
     
-    对于重复会议，会自动生成所有在日期范围内的实例
+    对于重复会议，会自动生成所有在日期范围内的实例；数据未变化时返回 304
     """
+    response = await conditional.early_response()
+    if response is not None:
+        return response
+    
     meeting_service = MeetingService(db)
-    meetings = meeting_service.get_user_meetings_with_instances(
+    meetings = await meeting_service.get_user_meetings_with_instances(
         current_user.id,
         skip=skip,
         limit=limit,
         start_date=start_date,
         end_date=end_date
     )
-    return meetings
+    return await conditional.cache_response(meetings)
 
 
 @router.get("/{meeting_id}", response_model=MeetingDetailResponse)
 async def get_meeting(
     meeting_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    user_loader: UserLoader = Depends(get_read_user_loader)
 ):
     """获取会议详情"""
     meeting_service = MeetingService(db)
-    meeting = meeting_service.get_meeting_by_id(meeting_id)
+    meeting = await meeting_service.get_meeting_by_id(meeting_id)
     
     if not meeting:
         raise HTTPException(
@@ -125,24 +165,10 @@ async def get_meeting(
         )
     
     # 获取出席记录
-    attendances = meeting_service.get_meeting_attendances(meeting_id)
+    attendances = await meeting_service.get_meeting_attendances(meeting_id)
     
-    # 转换为响应格式
-    attendance_responses = []
-    for att in attendances:
-        user = db.query(User).filter(User.id == att.user_id).first()
-        attendance_responses.append(AttendanceResponse(
-            id=att.id,
-            meeting_id=att.meeting_id,
-            user_id=att.user_id,
-            user_name=user.name if user else None,
-            user_avatar=user.avatar if user else None,
-            instance_date=att.instance_date,
-            status=att.status,
-            notes=att.notes,
-            created_at=att.created_at,
-            updated_at=att.updated_at
-        ))
+    # 转换为响应格式（用户信息批量加载）
+    attendance_responses = await build_attendance_responses(attendances, user_loader)
     
     return MeetingDetailResponse(
         **meeting.__dict__,
@@ -154,13 +180,13 @@ async def get_meeting(
 async def update_meeting(
     meeting_id: int,
     meeting_data: MeetingUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """更新会议"""
     meeting_service = MeetingService(db)
     
-    meeting = meeting_service.get_meeting_by_id(meeting_id)
+    meeting = await meeting_service.get_meeting_by_id(meeting_id)
     if not meeting:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -175,7 +201,7 @@ async def update_meeting(
         )
     
     try:
-        updated_meeting = meeting_service.update_meeting(meeting_id, meeting_data)
+        updated_meeting = await meeting_service.update_meeting(meeting_id, meeting_data)
         return updated_meeting
     except Exception as e:
         raise HTTPException(
@@ -187,13 +213,13 @@ async def update_meeting(
 @router.delete("/{meeting_id}", response_model=MessageResponse)
 async def delete_meeting(
     meeting_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """删除会议"""
     meeting_service = MeetingService(db)
     
-    meeting = meeting_service.get_meeting_by_id(meeting_id)
+    meeting = await meeting_service.get_meeting_by_id(meeting_id)
     if not meeting:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -207,7 +233,7 @@ async def delete_meeting(
             detail="无权限删除此会议"
         )
     
-    success = meeting_service.delete_meeting(meeting_id)
+    success = await meeting_service.delete_meeting(meeting_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -221,13 +247,14 @@ async def delete_meeting(
 async def create_or_update_attendance(
     meeting_id: int,
     attendance_data: AttendanceUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+    user_loader: UserLoader = Depends(get_user_loader)
 ):
     """创建或更新出席状态"""
     meeting_service = MeetingService(db)
     
-    meeting = meeting_service.get_meeting_by_id(meeting_id)
+    meeting = await meeting_service.get_meeting_by_id(meeting_id)
     if not meeting:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -235,21 +262,21 @@ async def create_or_update_attendance(
         )
     
     try:
-        attendance = meeting_service.update_attendance(
+        attendance = await meeting_service.update_attendance(
             meeting_id,
             current_user.id,
             attendance_data
         )
         
         # 获取用户信息
-        user = db.query(User).filter(User.id == current_user.id).first()
+        user = await user_loader.load(current_user.id)
         
         return AttendanceResponse(
             id=attendance.id,
             meeting_id=attendance.meeting_id,
             user_id=attendance.user_id,
             user_name=user.name if user else None,
-            user_avatar=user.avatar if user else None,
+            user_avatar=thumbnail_url(user.avatar) if user else None,
             instance_date=attendance.instance_date,
             status=attendance.status,
             notes=attendance.notes,
@@ -266,37 +293,24 @@ async def create_or_update_attendance(
 @router.get("/{meeting_id}/attendance", response_model=List[AttendanceResponse])
 async def get_meeting_attendances(
     meeting_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+    user_loader: UserLoader = Depends(get_user_loader)
 ):
     """获取会议的出席记录"""
     meeting_service = MeetingService(db)
     
-    meeting = meeting_service.get_meeting_by_id(meeting_id)
+    meeting = await meeting_service.get_meeting_by_id(meeting_id)
     if not meeting:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="会议不存在"
         )
     
-    attendances = meeting_service.get_meeting_attendances(meeting_id)
+    attendances = await meeting_service.get_meeting_attendances(meeting_id)
     
-    # 转换为响应格式
-    attendance_responses = []
-    for att in attendances:
-        user = db.query(User).filter(User.id == att.user_id).first()
-        attendance_responses.append(AttendanceResponse(
-            id=att.id,
-            meeting_id=att.meeting_id,
-            user_id=att.user_id,
-            user_name=user.name if user else None,
-            user_avatar=user.avatar if user else None,
-            instance_date=att.instance_date,
-            status=att.status,
-            notes=att.notes,
-            created_at=att.created_at,
-            updated_at=att.updated_at
-        ))
+    # 转换为响应格式（用户信息批量加载）
+    attendance_responses = await build_attendance_responses(attendances, user_loader)
     
     return attendance_responses
 
@@ -305,33 +319,20 @@ async def get_meeting_attendances(
 async def get_my_attendances(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+    user_loader: UserLoader = Depends(get_user_loader)
 ):
     """获取我的出席记录"""
     meeting_service = MeetingService(db)
-    attendances = meeting_service.get_user_attendances(
+    attendances = await meeting_service.get_user_attendances(
         current_user.id,
         skip=skip,
         limit=limit
     )
     
-    # 转换为响应格式
-    attendance_responses = []
-    for att in attendances:
-        user = db.query(User).filter(User.id == att.user_id).first()
-        attendance_responses.append(AttendanceResponse(
-            id=att.id,
-            meeting_id=att.meeting_id,
-            user_id=att.user_id,
-            user_name=user.name if user else None,
-            user_avatar=user.avatar if user else None,
-            instance_date=att.instance_date,
-            status=att.status,
-            notes=att.notes,
-            created_at=att.created_at,
-            updated_at=att.updated_at
-        ))
+    # 转换为响应格式（用户信息批量加载）
+    attendance_responses = await build_attendance_responses(attendances, user_loader)
     
     return attendance_responses
 
@@ -339,8 +340,9 @@ async def get_my_attendances(
 @router.get("/date/{date}/attendances", response_model=List[dict])
 async def get_attendances_by_date(
     date: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+    user_loader: UserLoader = Depends(get_user_loader)
 ):
     """根据日期获取该日期的所有例会及其出勤列表
     返回格式: id + 是否可以出席
@@ -351,26 +353,23 @@ async def get_attendances_by_date(
         # 解析日期
         from datetime import datetime, date as date_type
         target_date = datetime.strptime(date, "%Y-%m-%d").date()
-        start_datetime = datetime.combine(target_date, datetime.min.time())
-        end_datetime = datetime.combine(target_date, datetime.max.time())
         
-        # 获取该日期的所有会议
-        meetings = meeting_service.get_meetings(
-            skip=0,
-            limit=1000,
-            start_date=start_datetime,
-            end_date=end_datetime
+        # 当天的所有会议实例（包含重复会议）及其出席记录
+        day_meetings = await meeting_service.get_day_attendances(target_date)
+        
+        # 所有会议的出席用户一次批量加载
+        users = await user_loader.load_many(
+            att.user_id
+            for _, _, attendances in day_meetings
+            for att in attendances
         )
         
         result = []
-        for meeting in meetings:
-            # 获取该会议的所有出席记录
-            attendances = meeting_service.get_meeting_attendances(meeting.id)
-            
+        for occurrence, meeting, attendances in day_meetings:
             # 构建出勤列表：id + 是否可以出席
             attendance_list = []
             for att in attendances:
-                user = db.query(User).filter(User.id == att.user_id).first()
+                user = users[att.user_id]
                 if user:
                     # 是否可以出席：confirmed = True, absent/pending = False
                     can_attend = att.status == AttendanceStatus.CONFIRMED
@@ -379,13 +378,13 @@ async def get_attendances_by_date(
                         "can_attend": can_attend,
                         "status": att.status.value if hasattr(att.status, 'value') else str(att.status),
                         "user_name": user.name,
-                        "user_avatar": user.avatar
+                        "user_avatar": thumbnail_url(user.avatar)
                     })
             
             result.append({
                 "meeting_id": meeting.id,
                 "meeting_title": meeting.title,
-                "meeting_date": meeting.meeting_date.isoformat() if meeting.meeting_date else None,
+                "meeting_date": occurrence.isoformat(),
                 "attendances": attendance_list
             })
         
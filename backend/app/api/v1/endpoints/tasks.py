@@ -3,18 +3,21 @@
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query  # pyright: ignore[reportMissingImports]
-from sqlalchemy.orm import Session  # pyright: ignore[reportMissingImports]
+from sqlalchemy.ext.asyncio import AsyncSession  # pyright: ignore[reportMissingImports]
 from typing import List, Optional
-import json
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.auth import get_current_active_user
+from app.core.conditional import ConditionalGet, conditional_get
+from app.core.pagination import CURSOR_RESPONSES, cursor_query, next_cursor_headers
+from app.core.serializers import JSONBytesResponse, task_to_dict, acceptance_to_dict
 from app.schemas import (
-    TaskCreate, TaskUpdate, TaskResponse, TaskAcceptanceCreate, 
-    TaskAcceptanceResponse, MessageResponse
+    TaskCreate, TaskUpdate, TaskResponse,
+    TaskAcceptanceResponse, MessageResponse, CurrentUser
 )
+from app.services.collection_versions import TASKS
 from app.services.task_service import TaskService
-from app.models import User, TaskType, TaskStatus
+from app.models import TaskType
 
 router = APIRouter()
 
@@ -22,31 +25,15 @@ router = APIRouter()
 @router.post("/", response_model=TaskResponse)
 async def create_task(
     task_data: TaskCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """创建任务"""
     task_service = TaskService(db)
     
     try:
-        task = task_service.create_task(task_data, current_user.id)
-        task_dict = {
-            "id": task.id,
-            "title": task.title,
-            "description": task.description,
-            "type": task.type.value if hasattr(task.type, 'value') else str(task.type),
-            "priority": task.priority,
-            "status": task.status.value if hasattr(task.status, 'value') else str(task.status),
-            "deadline": task.deadline.isoformat() if task.deadline else None,
-            "tags": json.loads(task.tags) if task.tags else [],
-            "accepted_count": task.accepted_count,
-            "max_accept_count": task.max_accept_count,
-            "publisher_id": task.publisher_id,
-            "publisher_name": current_user.name,
-            "created_at": task.created_at.isoformat() if task.created_at else None,
-            "updated_at": task.updated_at.isoformat() if task.updated_at else None
-        }
-        return task_dict
+        task = await task_service.create_task(task_data, current_user.id)
+        return task_to_dict(task, current_user)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -54,164 +41,123 @@ async def create_task(
         )
 
 
-@router.get("/", response_model=List[TaskResponse])
+@router.get("/", response_model=List[TaskResponse], responses=CURSOR_RESPONSES)
 async def get_tasks(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     task_type: Optional[TaskType] = Query(None),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = Depends(cursor_query),
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalGet = Depends(conditional_get(TASKS))
 ):
-    """获取任务列表"""
-    task_service = TaskService(db)
-    tasks = task_service.get_tasks(skip=skip, limit=limit, task_type=task_type)
+    """获取任务列表（数据未变化时返回 304，按ID升序，支持游标分页）"""
+    response = await conditional.early_response()
+    if response is not None:
+        return response
     
-    # 添加发布者姓名并转换数据格式
-    result = []
-    for task in tasks:
-        task_dict = {
-            "id": task.id,
-            "title": task.title,
-            "description": task.description,
-            "type": task.type.value if hasattr(task.type, 'value') else str(task.type),
-            "priority": task.priority,
-            "status": task.status.value if hasattr(task.status, 'value') else str(task.status),
-            "deadline": task.deadline.isoformat() if task.deadline else None,
-            "tags": json.loads(task.tags) if task.tags else [],
-            "accepted_count": task.accepted_count,
-            "max_accept_count": task.max_accept_count,
-            "publisher_id": task.publisher_id,
-            "publisher_name": task.publisher.name if task.publisher else "未知",
-            "created_at": task.created_at.isoformat() if task.created_at else None,
-            "updated_at": task.updated_at.isoformat() if task.updated_at else None
-        }
-        result.append(task_dict)
+    task_service = TaskService(db)
+    tasks = await task_service.get_tasks(skip=skip, limit=limit, task_type=task_type, after_id=after_id)
     
-    return result
+    # 添加发布者姓名，直接序列化（跳过 response_model 校验）
+    result = [task_to_dict(task, task.publisher) for task in tasks]
+    return await conditional.cache_response(result, next_cursor_headers(tasks, limit))
 
 
-@router.get("/available", response_model=List[TaskResponse])
+@router.get("/available", response_model=List[TaskResponse], responses=CURSOR_RESPONSES)
 async def get_available_tasks(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = Depends(cursor_query),
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalGet = Depends(conditional_get(TASKS))
 ):
-    """获取可用任务列表"""
-    task_service = TaskService(db)
-    tasks = task_service.get_available_tasks(skip=skip, limit=limit)
+    """获取可用任务列表（数据未变化时返回 304，按ID升序，支持游标分页）"""
+    response = await conditional.early_response()
+    if response is not None:
+        return response
     
-    # 添加发布者姓名并转换数据格式
-    result = []
-    for task in tasks:
-        task_dict = {
-            "id": task.id,
-            "title": task.title,
-            "description": task.description,
-            "type": task.type.value if hasattr(task.type, 'value') else str(task.type),
-            "priority": task.priority,
-            "status": task.status.value if hasattr(task.status, 'value') else str(task.status),
-            "deadline": task.deadline.isoformat() if task.deadline else None,
-            "tags": json.loads(task.tags) if task.tags else [],
-            "accepted_count": task.accepted_count,
-            "max_accept_count": task.max_accept_count,
-            "publisher_id": task.publisher_id,
-            "publisher_name": task.publisher.name if task.publisher else "未知",
-            "created_at": task.created_at.isoformat() if task.created_at else None,
-            "updated_at": task.updated_at.isoformat() if task.updated_at else None
-        }
-        result.append(task_dict)
+    task_service = TaskService(db)
+    tasks = await task_service.get_available_tasks(skip=skip, limit=limit, after_id=after_id)
     
-    return result
+    # 添加发布者姓名，直接序列化（跳过 response_model 校验）
+    result = [task_to_dict(task, task.publisher) for task in tasks]
+    return await conditional.cache_response(result, next_cursor_headers(tasks, limit))
 
 
-@router.get("/my-tasks", response_model=List[TaskResponse])
+@router.get("/my-tasks", response_model=List[TaskResponse], responses=CURSOR_RESPONSES)
 async def get_my_tasks(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = Depends(cursor_query),
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalGet = Depends(conditional_get(TASKS))
 ):
-    """获取我发布的任务"""
-    task_service = TaskService(db)
-    tasks = task_service.get_user_tasks(current_user.id, skip=skip, limit=limit)
+    """获取我发布的任务（数据未变化时返回 304，按ID升序，支持游标分页）"""
+    response = await conditional.early_response()
+    if response is not None:
+        return response
     
-    # 添加发布者姓名并转换数据格式
-    result = []
-    for task in tasks:
-        task_dict = {
-            "id": task.id,
-            "title": task.title,
-            "description": task.description,
-            "type": task.type.value if hasattr(task.type, 'value') else str(task.type),
-            "priority": task.priority,
-            "status": task.status.value if hasattr(task.status, 'value') else str(task.status),
-            "deadline": task.deadline.isoformat() if task.deadline else None,
-            "tags": json.loads(task.tags) if task.tags else [],
-            "accepted_count": task.accepted_count,
-            "max_accept_count": task.max_accept_count,
-            "publisher_id": task.publisher_id,
-            "publisher_name": current_user.name,
-            "created_at": task.created_at.isoformat() if task.created_at else None,
-            "updated_at": task.updated_at.isoformat() if task.updated_at else None
-        }
-        result.append(task_dict)
+    task_service = TaskService(db)
+    tasks = await task_service.get_user_tasks(current_user.id, skip=skip, limit=limit, after_id=after_id)
     
-    return result
+    # 添加发布者姓名，直接序列化（跳过 response_model 校验）
+    result = [task_to_dict(task, current_user) for task in tasks]
+    return await conditional.cache_response(result, next_cursor_headers(tasks, limit))
 
 
-@router.get("/accepted", response_model=List[dict])
+@router.get("/accepted", response_model=List[dict], responses=CURSOR_RESPONSES)
 async def get_accepted_tasks(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = Depends(cursor_query),
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    conditional: ConditionalGet = Depends(conditional_get(TASKS))
 ):
-    """获取我接取的任务"""
+    """获取我接取的任务（数据未变化时返回 304，按接取记录ID升序，支持游标分页）"""
+    response = await conditional.early_response()
+    if response is not None:
+        return response
+    
     task_service = TaskService(db)
-    acceptances = task_service.get_user_accepted_tasks(current_user.id, skip=skip, limit=limit)
+    acceptances = await task_service.get_user_accepted_tasks(
+        current_user.id, skip=skip, limit=limit, after_id=after_id
+    )
     
-    # 构建包含任务信息的响应
-    result = []
-    for acc in acceptances:
-        task = acc.task
-        result.append({
-            "id": acc.id,
-            "task_id": acc.task_id,
-            "user_id": acc.user_id,
-            "status": acc.status.value if hasattr(acc.status, 'value') else str(acc.status),
-            "accepted_at": acc.accepted_at.isoformat() if acc.accepted_at else None,
-            "completed_at": acc.completed_at.isoformat() if acc.completed_at else None,
-            "task": {
-                "id": task.id,
-                "title": task.title,
-                "description": task.description,
-                "type": task.type.value if hasattr(task.type, 'value') else str(task.type),
-                "priority": task.priority,
-                "status": task.status.value if hasattr(task.status, 'value') else str(task.status),
-                "deadline": task.deadline.isoformat() if task.deadline else None,
-                "tags": json.loads(task.tags) if task.tags else [],
-                "accepted_count": task.accepted_count,
-                "max_accept_count": task.max_accept_count,
-                "publisher_id": task.publisher_id,
-                "publisher_name": task.publisher.name if task.publisher else "未知",
-                "created_at": task.created_at.isoformat() if task.created_at else None,
-                "updated_at": task.updated_at.isoformat() if task.updated_at else None
-            }
-        })
+    # 包含任务信息，直接序列化
+    result = [acceptance_to_dict(acc) for acc in acceptances]
+    return await conditional.cache_response(result, next_cursor_headers(acceptances, limit))
+
+
+@router.get("/search", response_model=List[TaskResponse])
+async def search_tasks(
+    query: str = Query(..., min_length=1),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """搜索任务（按相关度排序，不支持游标，使用 skip 分页）"""
+    task_service = TaskService(db)
+    tasks = await task_service.search_tasks(query=query, skip=skip, limit=limit)
     
-    return result
+    # 添加发布者姓名，直接序列化（跳过 response_model 校验）
+    result = [task_to_dict(task, task.publisher) for task in tasks]
+    return JSONBytesResponse(result)
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
     task_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """获取单个任务详情"""
     task_service = TaskService(db)
-    task = task_service.get_task_by_id(task_id)
+    task = await task_service.get_task_by_id(task_id)
     
     if not task:
         raise HTTPException(
@@ -220,37 +166,22 @@ async def get_task(
         )
     
     # 构建响应数据，解析 tags JSON 字符串为列表
-    task_dict = {
-        "id": task.id,
-        "title": task.title,
-        "description": task.description,
-        "type": task.type.value if hasattr(task.type, 'value') else str(task.type),
-        "priority": task.priority,
-        "status": task.status.value if hasattr(task.status, 'value') else str(task.status),
-        "deadline": task.deadline.isoformat() if task.deadline else None,
-        "tags": json.loads(task.tags) if task.tags else [],
-        "accepted_count": task.accepted_count,
-        "max_accept_count": task.max_accept_count,
-        "publisher_id": task.publisher_id,
-        "publisher_name": task.publisher.name if task.publisher else "未知",
-        "created_at": task.created_at.isoformat() if task.created_at else None,
-        "updated_at": task.updated_at.isoformat() if task.updated_at else None
-    }
-    return task_dict
+    publisher = await task.awaitable_attrs.publisher
+    return task_to_dict(task, publisher)
 
 
 @router.put("/{task_id}", response_model=TaskResponse)
 async def update_task(
     task_id: int,
     task_data: TaskUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """更新任务"""
     task_service = TaskService(db)
     
     # 检查任务是否存在
-    task = task_service.get_task_by_id(task_id)
+    task = await task_service.get_task_by_id(task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -265,25 +196,9 @@ async def update_task(
         )
     
     try:
-        updated_task = task_service.update_task(task_id, task_data)
+        updated_task = await task_service.update_task(task_id, task_data)
         # 构建响应数据，解析 tags JSON 字符串为列表
-        task_dict = {
-            "id": updated_task.id,
-            "title": updated_task.title,
-            "description": updated_task.description,
-            "type": updated_task.type.value if hasattr(updated_task.type, 'value') else str(updated_task.type),
-            "priority": updated_task.priority,
-            "status": updated_task.status.value if hasattr(updated_task.status, 'value') else str(updated_task.status),
-            "deadline": updated_task.deadline.isoformat() if updated_task.deadline else None,
-            "tags": json.loads(updated_task.tags) if updated_task.tags else [],
-            "accepted_count": updated_task.accepted_count,
-            "max_accept_count": updated_task.max_accept_count,
-            "publisher_id": updated_task.publisher_id,
-            "publisher_name": current_user.name,
-            "created_at": updated_task.created_at.isoformat() if updated_task.created_at else None,
-            "updated_at": updated_task.updated_at.isoformat() if updated_task.updated_at else None
-        }
-        return task_dict
+        return task_to_dict(updated_task, current_user)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -294,14 +209,14 @@ async def update_task(
 @router.delete("/{task_id}", response_model=MessageResponse)
 async def delete_task(
     task_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """删除任务"""
     task_service = TaskService(db)
     
     # 检查任务是否存在
-    task = task_service.get_task_by_id(task_id)
+    task = await task_service.get_task_by_id(task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -315,7 +230,7 @@ async def delete_task(
             detail="无权限删除此任务"
         )
     
-    success = task_service.delete_task(task_id)
+    success = await task_service.delete_task(task_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -328,14 +243,14 @@ async def delete_task(
 @router.post("/{task_id}/accept", response_model=TaskAcceptanceResponse)
 async def accept_task(
     task_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """接取任务"""
     task_service = TaskService(db)
     
     try:
-        acceptance = task_service.accept_task(task_id, current_user.id)
+        acceptance = await task_service.accept_task(task_id, current_user.id)
         if not acceptance:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -352,14 +267,14 @@ async def accept_task(
 @router.post("/{task_id}/complete", response_model=MessageResponse)
 async def complete_task(
     task_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """完成任务"""
     task_service = TaskService(db)
     
     try:
-        success = task_service.complete_task(task_id, current_user.id)
+        success = await task_service.complete_task(task_id, current_user.id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -376,13 +291,13 @@ async def complete_task(
 @router.post("/{task_id}/abandon", response_model=MessageResponse)
 async def abandon_task(
     task_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """放弃任务"""
     task_service = TaskService(db)
     
-    success = task_service.abandon_task(task_id, current_user.id)
+    success = await task_service.abandon_task(task_id, current_user.id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -390,39 +305,3 @@ async def abandon_task(
         )
     
     return MessageResponse(message="任务已放弃")
-
-
-@router.get("/search", response_model=List[TaskResponse])
-async def search_tasks(
-    query: str = Query(..., min_length=1),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    """搜索任务"""
-    task_service = TaskService(db)
-    tasks = task_service.search_tasks(query=query, skip=skip, limit=limit)
-    
-    # 添加发布者姓名并转换数据格式
-    result = []
-    for task in tasks:
-        task_dict = {
-            "id": task.id,
-            "title": task.title,
-            "description": task.description,
-            "type": task.type.value if hasattr(task.type, 'value') else str(task.type),
-            "priority": task.priority,
-            "status": task.status.value if hasattr(task.status, 'value') else str(task.status),
-            "deadline": task.deadline.isoformat() if task.deadline else None,
-            "tags": json.loads(task.tags) if task.tags else [],
-            "accepted_count": task.accepted_count,
-            "max_accept_count": task.max_accept_count,
-            "publisher_id": task.publisher_id,
-            "publisher_name": task.publisher.name if task.publisher else "未知",
-            "created_at": task.created_at.isoformat() if task.created_at else None,
-            "updated_at": task.updated_at.isoformat() if task.updated_at else None
-        }
-        result.append(task_dict)
-    
-    return result
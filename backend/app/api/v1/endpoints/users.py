@@ -2,30 +2,46 @@
 用户API端点
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Form
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Form, Header, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import os
 
 from app.core.database import get_db
 from app.core.auth import get_current_active_user
-from app.schemas import UserCreate, UserUpdate, UserResponse, Token, MessageResponse
+from app.schemas import UserCreate, UserUpdate, UserResponse, Token, CurrentUser
 from app.services.user_service import UserService
+from app.services.avatar_store import (
+    AVATAR_URL_PREFIX, avatar_etag, avatar_path, schedule_thumbnails, thumbnail_source, thumbnail_url
+)
 from app.core.auth import create_access_token
-from app.models import User
+from app.core.conditional import etag_matches
 
 router = APIRouter()
 
+# 头像文件按内容哈希命名，内容不会变化，可以长期缓存
+AVATAR_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def with_avatar_thumbnails(users) -> List[UserResponse]:
+    """用户列表引用头像缩略图（完整头像只在 /me 中返回）"""
+    return [
+        UserResponse.model_validate(user).model_copy(update={"avatar": thumbnail_url(user.avatar)})
+        for user in users
+    ]
+
 
 @router.post("/register", response_model=UserResponse)
 async def register_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """用户注册"""
     user_service = UserService(db)
     
     try:
-        user = user_service.create_user(user_data)
+        user = await user_service.create_user(user_data)
         return user
     except ValueError as e:
         raise HTTPException(
@@ -38,11 +54,11 @@ async def register_user(
 async def login_user(
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """用户登录"""
     user_service = UserService(db)
-    user = user_service.authenticate_user(username, password)
+    user = await user_service.authenticate_user(username, password)
     
     if not user:
         raise HTTPException(
@@ -60,20 +76,20 @@ async def register_user_with_qq(
     username: str = Form(...),
     password: str = Form(...),
     qq: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """使用QQ号注册用户（简化版，使用QQ号邮箱）"""
     user_service = UserService(db)
     
     # 检查用户名是否已存在
-    if user_service.get_user_by_username(username):
+    if await user_service.get_user_by_username(username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="用户名已存在"
         )
     
     # 检查QQ号是否已存在
-    if user_service.get_user_by_qq(qq):
+    if await user_service.get_user_by_qq(qq):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="QQ号已被注册"
@@ -91,7 +107,7 @@ async def register_user_with_qq(
             name=username,  # 默认使用用户名作为姓名
             qq=qq
         )
-        user = user_service.create_user(user_data)
+        user = await user_service.create_user(user_data)
         return user
     except ValueError as e:
         raise HTTPException(
@@ -102,23 +118,36 @@ async def register_user_with_qq(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取当前用户信息"""
-    return current_user
+    """
+    获取当前用户信息
+
+    认证缓存中的 CurrentUser 只有认证需要的字段，不包含邮箱、QQ、头像和时间，
+    因此这里按主键查询完整记录（一条语句）。使用主库会话，修改资料后立即读取也能得到新值。
+    """
+    user_service = UserService(db)
+    user = await user_service.get_user_by_id(current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="用户不存在"
+        )
+    return user
 
 
 @router.put("/me", response_model=UserResponse)
 async def update_current_user(
     user_data: UserUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """更新当前用户信息"""
     user_service = UserService(db)
     
     try:
-        updated_user = user_service.update_user(current_user.id, user_data)
+        updated_user = await user_service.update_user(current_user.id, user_data)
         if not updated_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -136,13 +165,13 @@ async def update_current_user(
 async def get_users(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取用户列表（需要认证）"""
+    """获取用户列表（需要认证，头像为缩略图地址）"""
     user_service = UserService(db)
-    users = user_service.get_users(skip=skip, limit=limit)
-    return users
+    users = await user_service.get_users(skip=skip, limit=limit)
+    return with_avatar_thumbnails(users)
 
 
 @router.get("/users/search", response_model=List[UserResponse])
@@ -150,10 +179,36 @@ async def search_users(
     query: str,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """搜索用户"""
+    """搜索用户（头像为缩略图地址）"""
     user_service = UserService(db)
-    users = user_service.search_users(query=query, skip=skip, limit=limit)
-    return users
+    users = await user_service.search_users(query=query, skip=skip, limit=limit)
+    return with_avatar_thumbnails(users)
+
+
+@router.get("/avatars/{filename}")
+async def get_avatar(
+    filename: str,
+    if_none_match: Optional[str] = Header(None)
+):
+    """获取头像或缩略图文件（无需认证，供 <img> 直接引用）"""
+    path = avatar_path(filename)
+    cache_control = AVATAR_CACHE_CONTROL
+    if path is not None and not os.path.isfile(path):
+        # 缩略图尚未生成：安排生成，本次返回原图且不长期缓存
+        source = thumbnail_source(filename)
+        if source is not None:
+            schedule_thumbnails(AVATAR_URL_PREFIX + source)
+            filename, path, cache_control = source, avatar_path(source), "no-cache"
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="头像不存在"
+        )
+    
+    headers = {"ETag": avatar_etag(filename), "Cache-Control": cache_control}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(path, headers=headers)
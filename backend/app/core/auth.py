@@ -4,19 +4,26 @@
 
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import time
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.database import get_db
+from app.schemas import CurrentUser
 from app.services.user_service import UserService
 
 # JWT令牌方案
 # auto_error=False 允许我们手动处理认证错误，返回更清晰的错误信息
 security = HTTPBearer(auto_error=False)
 
+# 令牌解码缓存：令牌摘要 -> 已验证的声明（过期时间与令牌 exp 一致）
+token_claims_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """创建访问令牌"""
@@ -32,22 +39,34 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 
 def verify_token(token: str) -> Optional[str]:
-    """验证令牌并返回用户名"""
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    """验证令牌并返回用户名（已验证的令牌会缓存其声明，直到令牌过期）"""
+    digest = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    payload = token_claims_cache.get(digest)
+    
+    if payload is None:
+        try:
+            payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        except JWTError:
             return None
-        return username
-    except JWTError:
+        
+        # 只缓存带有过期时间的令牌，缓存有效期不超过令牌剩余有效期
+        exp = payload.get("exp")
+        if exp is not None:
+            remaining = exp - time.time()
+            if remaining > 0:
+                token_claims_cache.set(digest, payload, ttl=remaining)
+    
+    username: str = payload.get("sub")
+    if username is None:
         return None
+    return username
 
 
-def get_current_user(
+async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
-):
-    """获取当前用户"""
+    db: AsyncSession = Depends(get_db)
+) -> CurrentUser:
+    """获取当前用户（认证缓存命中时不查询数据库）"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="未提供认证令牌或认证令牌无效，请先登录",
@@ -68,7 +87,7 @@ def get_current_user(
         )
     
     user_service = UserService(db)
-    user = user_service.get_user_by_username(username)
+    user = await user_service.get_user_principal(username)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -79,7 +98,7 @@ def get_current_user(
     return user
 
 
-def get_current_active_user(current_user = Depends(get_current_user)):
+async def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """获取当前活跃用户"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -0,0 +1,181 @@
+"""
+缓存工具
+
+- TTLCache：进程内 LRU 缓存
+- Cache：命名空间缓存，值为字节串。配置 REDIS_URL 时存放在 Redis 中，
+  多个 worker 共享；否则每个命名空间使用一个进程内 LRU
+"""
+
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import logging
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Redis 连接和读写超时（秒），超时按未命中处理
+REDIS_TIMEOUT_SECONDS = 1.0
+
+
+class TTLCache:
+    """带过期时间的LRU缓存（线程安全）"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 命中统计
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """获取缓存值，不存在或已过期时返回 None"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """写入缓存值（可单独指定过期时间）"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """删除缓存值"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """获取缓存统计信息"""
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MemoryCacheBackend:
+    """进程内缓存后端（LRU）"""
+
+    def __init__(self, maxsize: int):
+        self._cache = TTLCache(maxsize=maxsize)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.delete(key)
+
+    async def close(self) -> None:
+        self._cache.clear()
+
+
+class RedisCacheBackend:
+    """Redis 缓存后端（Redis 不可用时读取按未命中处理，写入和删除跳过）"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # pyright: ignore[reportMissingImports]
+
+        self._errors = (redis.RedisError, OSError)
+        self._client = redis.from_url(
+            url,
+            socket_timeout=REDIS_TIMEOUT_SECONDS,
+            socket_connect_timeout=REDIS_TIMEOUT_SECONDS
+        )
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self._client.get(key)
+        except self._errors as e:
+            logger.warning("读取 Redis 缓存失败: %s", e)
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            await self._client.set(key, value, px=max(1, int(ttl * 1000)))
+        except self._errors as e:
+            logger.warning("写入 Redis 缓存失败: %s", e)
+
+    async def delete(self, *keys: str) -> None:
+        try:
+            await self._client.delete(*keys)
+        except self._errors as e:
+            logger.warning("删除 Redis 缓存失败: %s", e)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+_redis_backend: Optional[RedisCacheBackend] = None
+
+
+def _redis() -> Optional[RedisCacheBackend]:
+    """共享的 Redis 后端（未配置 REDIS_URL 或未安装 redis 时为 None）"""
+    global _redis_backend
+    if _redis_backend is None and settings.REDIS_URL:
+        try:
+            _redis_backend = RedisCacheBackend(settings.REDIS_URL)
+        except ImportError:
+            logger.warning("未安装 redis，使用进程内缓存")
+    return _redis_backend
+
+
+class Cache:
+    """
+    命名空间缓存
+
+    键为 <CACHE_KEY_PREFIX>:<namespace>:<key>，写入时指定过期时间。
+    数据修改后由写入方调用 delete 使缓存失效（Redis 后端对所有 worker 生效）。
+    """
+
+    def __init__(self, namespace: str, ttl: float, maxsize: int):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.backend = _redis() or MemoryCacheBackend(maxsize)
+
+    def key(self, key: Hashable) -> str:
+        return f"{settings.CACHE_KEY_PREFIX}:{self.namespace}:{key}"
+
+    async def get(self, key: Hashable) -> Optional[bytes]:
+        """获取缓存值，不存在或已过期时返回 None"""
+        return await self.backend.get(self.key(key))
+
+    async def set(self, key: Hashable, value: bytes, ttl: Optional[float] = None) -> None:
+        """写入缓存值（默认使用命名空间的过期时间）"""
+        await self.backend.set(self.key(key), value, self.ttl if ttl is None else ttl)
+
+    async def delete(self, *keys: Hashable) -> None:
+        """删除缓存值"""
+        if keys:
+            await self.backend.delete(*(self.key(key) for key in keys))
+
+
+async def close_caches() -> None:
+    """关闭共享的缓存连接（应用关闭时调用）"""
+    if _redis_backend is not None:
+        await _redis_backend.close()
@@ -0,0 +1,102 @@
+"""
+条件请求（ETag / If-None-Match）
+
+列表接口的 ETag 由集合版本号、当前用户和请求参数计算，
+不需要先查询列表数据；匹配时直接返回 304。
+
+生成的响应按 ETag 写入共享缓存，其他请求（包括其他 worker）
+计算出相同 ETag 时直接返回缓存的响应。集合写入时递增版本号，
+ETag 随之变化，旧的缓存条目不再命中，按过期时间淘汰。
+"""
+
+from fastapi import Depends, Request, Response, status  # pyright: ignore[reportMissingImports]
+from sqlalchemy.ext.asyncio import AsyncSession  # pyright: ignore[reportMissingImports]
+from typing import Any, Callable, Dict, Optional
+import hashlib
+import orjson
+
+from app.core.auth import get_current_active_user
+from app.core.cache import Cache
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.core.serializers import JSONBytesResponse, dumps
+from app.schemas import CurrentUser
+from app.services.collection_versions import get_versions
+
+# 客户端可以缓存，但每次使用前都要带 If-None-Match 重新验证
+COLLECTION_CACHE_CONTROL = "private, no-cache"
+
+# 列表响应缓存：ETag -> 响应头（JSON）+ 换行 + 响应体
+response_cache = Cache(
+    "responses",
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    maxsize=settings.RESPONSE_CACHE_MAX_SIZE
+)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否包含该 ETag（或为 *）"""
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+class ConditionalGet:
+    """当前请求的 ETag 及其是否与客户端缓存一致"""
+
+    def __init__(self, etag: str, if_none_match: Optional[str]):
+        self.etag = etag
+        self.not_modified = etag_matches(if_none_match, etag)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"ETag": self.etag, "Cache-Control": COLLECTION_CACHE_CONTROL}
+
+    def not_modified_response(self) -> Response:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=self.headers)
+
+    async def early_response(self) -> Optional[Response]:
+        """客户端缓存一致时返回 304，已有缓存的响应时直接返回，否则返回 None"""
+        if self.not_modified:
+            return self.not_modified_response()
+
+        cached = await response_cache.get(self.etag)
+        if cached is None:
+            return None
+        headers, _, body = cached.partition(b"\n")
+        return JSONBytesResponse(body, headers={**orjson.loads(headers), **self.headers})
+
+    async def cache_response(self, content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+        """序列化响应并写入缓存"""
+        headers = headers or {}
+        body = dumps(content)
+        await response_cache.set(self.etag, orjson.dumps(headers) + b"\n" + body)
+        return JSONBytesResponse(body, headers={**headers, **self.headers})
+
+
+def conditional_get(*collections: str, session: Callable = get_read_db) -> Callable:
+    """
+    创建条件请求依赖
+
+    Args:
+        collections: 响应内容依赖的集合，任一集合写入后 ETag 都会变化
+        session: 数据库会话依赖，须与接口使用的相同，版本号和列表数据才来自同一个库
+    """
+    async def dependency(
+        request: Request,
+        current_user: CurrentUser = Depends(get_current_active_user),
+        db: AsyncSession = Depends(session)
+    ) -> ConditionalGet:
+        versions = await get_versions(db, *collections)
+        # 同一集合版本下，响应只取决于路径、查询参数和当前用户
+        key = "|".join([
+            ",".join(f"{name}={versions.get(name, 0)}" for name in collections),
+            str(current_user.id),
+            request.url.path,
+            str(sorted(request.query_params.multi_items()))
+        ])
+        etag = f'"{hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]}"'
+        return ConditionalGet(etag, request.headers.get("if-none-match"))
+
+    return dependency
@@ -16,6 +16,17 @@ class Settings(BaseSettings):
     
     # 数据库配置
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./hxkt.db")
+    # 只读副本（可选，逗号分隔）：任务和会议的列表、详情、搜索接口轮流使用副本，写入始终使用主库
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    
+    # SQLite配置：WAL 模式下读操作不阻塞写操作；连接池中每个连接在 aiosqlite 的独立线程中执行
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # WAL 模式下 NORMAL 不会损坏数据库
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))  # 等待写锁的时间
+    SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))  # 每个连接的页缓存
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # 0 表示不使用内存映射
+    SQLITE_POOL_SIZE: int = int(os.getenv("SQLITE_POOL_SIZE", "5"))
+    SQLITE_MAX_OVERFLOW: int = int(os.getenv("SQLITE_MAX_OVERFLOW", "10"))
     
     # CORS配置
     ALLOWED_ORIGINS: List[str] = [
@@ -35,6 +46,26 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # 认证用户缓存配置（用户更新/删除时失效；MAX_SIZE 只用于进程内缓存）
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+    
+    # 令牌解码缓存配置（条目按令牌 exp 过期）
+    TOKEN_CACHE_MAX_SIZE: int = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "4096"))
+    
+    # 密码哈希线程池配置（bcrypt 计算在线程池中执行，不阻塞事件循环）
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))  # 排队+执行中的最大任务数
+    
+    # 会议出席配置
+    # False（默认）：未答复的实例在读取时按“待确认”计算，只有用户提交出席状态时才写入记录
+    # True：兼容旧行为，读取日历时为未答复的实例写入待确认记录
+    ATTENDANCE_PENDING_ROWS_ON_READ: bool = os.getenv("ATTENDANCE_PENDING_ROWS_ON_READ", "false").lower() == "true"
+    
+    # 会议实例物化配置：重复会议展开到当前时间之后的天数，后台任务按间隔向后延伸
+    MEETING_OCCURRENCE_HORIZON_DAYS: int = int(os.getenv("MEETING_OCCURRENCE_HORIZON_DAYS", "365"))
+    MEETING_OCCURRENCE_REFRESH_SECONDS: int = int(os.getenv("MEETING_OCCURRENCE_REFRESH_SECONDS", "3600"))
+    
     # 文件上传配置
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "./uploads")
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
@@ -46,9 +77,21 @@ class Settings(BaseSettings):
     # 日志配置
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE: Optional[str] = os.getenv("LOG_FILE")
+    # 日志采样：logger=N 表示该记录器每 N 条只写 1 条（逗号分隔，N=1 不采样）
+    LOG_SAMPLING: str = os.getenv("LOG_SAMPLING", "app.services.meeting_service.instances=100")
     
-    # Redis配置（可选，用于缓存）
+    # Redis配置（可选，用于缓存）：配置后认证用户和列表响应缓存在多个 worker 间共享
     REDIS_URL: Optional[str] = os.getenv("REDIS_URL")
+    CACHE_KEY_PREFIX: str = os.getenv("CACHE_KEY_PREFIX", "hxkt")
+    
+    # 列表响应缓存配置（按 ETag 缓存，集合写入后旧条目不再命中；MAX_SIZE 只用于进程内缓存）
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+    RESPONSE_CACHE_MAX_SIZE: int = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "256"))
+    
+    @property
+    def database_replica_urls(self) -> List[str]:
+        """只读副本URL列表"""
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
     
     class Config:
         env_file = ".env"
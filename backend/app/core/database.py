@@ -2,11 +2,11 @@
 数据库配置和连接管理
 """
 
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 from datetime import datetime, timezone, timedelta
+import itertools
 import os
 import logging
 
@@ -14,97 +14,208 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-# 根据数据库URL创建引擎
-if settings.DATABASE_URL.startswith("sqlite"):
-    # SQLite配置
-    engine = create_engine(
-        settings.DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-        echo=settings.DEBUG
-    )
-else:
+# 同步驱动 -> 异步驱动 的映射（未显式指定驱动时使用）
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """将配置中的数据库URL转换为异步驱动URL（如 sqlite:// -> sqlite+aiosqlite://）"""
+    scheme, sep, rest = url.partition("://")
+    if not sep:
+        return url
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+def is_sqlite_memory(url: str) -> bool:
+    """是否为 SQLite 内存数据库（只能使用单个连接）"""
+    return url.partition("?")[0].rstrip("/").endswith((":memory:", "sqlite:", "aiosqlite:"))
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """新建 SQLite 连接时设置日志模式、同步级别和缓存（按 Settings 配置）"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        # 负数表示以 KiB 为单位
+        cursor.execute(f"PRAGMA cache_size={-int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    finally:
+        cursor.close()
+
+
+def create_database_engine(url: str) -> AsyncEngine:
+    """根据数据库URL创建异步引擎（主库和只读副本使用相同的配置）"""
+    if url.startswith("sqlite"):
+        # SQLite配置（aiosqlite 在独立线程中执行查询，不会阻塞事件循环）
+        if is_sqlite_memory(url):
+            # 内存数据库只有一个连接（StaticPool），不设置连接池大小
+            sqlite_engine = create_async_engine(
+                get_async_database_url(url),
+                echo=settings.DEBUG
+            )
+        else:
+            # 文件数据库：每个连接一个线程，WAL 模式下读请求可以与写请求并发执行
+            sqlite_engine = create_async_engine(
+                get_async_database_url(url),
+                echo=settings.DEBUG,
+                pool_size=settings.SQLITE_POOL_SIZE,
+                max_overflow=settings.SQLITE_MAX_OVERFLOW,
+                connect_args={"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}
+            )
+        event.listen(sqlite_engine.sync_engine, "connect", set_sqlite_pragmas)
+        return sqlite_engine
+    
     # PostgreSQL/MySQL配置
-    engine = create_engine(
-        settings.DATABASE_URL,
+    return create_async_engine(
+        get_async_database_url(url),
         echo=settings.DEBUG,
         pool_pre_ping=True
     )
 
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# 创建基础模型类
-Base = declarative_base()
+def create_session_factory(bind: AsyncEngine) -> async_sessionmaker:
+    """
+    创建异步会话工厂
+    
+    expire_on_commit=False：提交后对象属性仍可直接访问，避免在异步上下文中触发隐式加载
+    """
+    return async_sessionmaker(
+        bind=bind,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+
+# 主库：所有写入以及需要读到刚写入数据的请求
+engine = create_database_engine(settings.DATABASE_URL)
+SessionLocal = create_session_factory(engine)
+
+# 只读副本：未配置时为空，只读请求也使用主库
+replica_engines = [create_database_engine(url) for url in settings.database_replica_urls]
+_replica_sessions = itertools.cycle([create_session_factory(replica) for replica in replica_engines] or [SessionLocal])
 
+# 创建基础模型类（AsyncAttrs 提供 awaitable_attrs，用于异步加载关系属性）
+Base = declarative_base(cls=AsyncAttrs)
 
-def get_db():
+# Alembic 配置文件（backend/alembic.ini）
+ALEMBIC_INI = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "alembic.ini"
+)
+
+
+async def get_db():
     """获取数据库会话"""
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
+        yield db
+
+
+async def get_read_db():
+    """
+    获取只读数据库会话（轮流使用只读副本，未配置副本时使用主库）
+    
+    副本可能落后于主库，只用于不写入、也不要求读到本请求之前刚写入数据的接口。
+    """
+    async with next(_replica_sessions)() as db:
         yield db
-    finally:
-        db.close()
 
 
 async def init_default_meeting():
     """初始化默认双周例会"""
     # 在函数内部导入，避免循环导入
-    from app.models import Meeting, User, MeetingType, MeetingAttendance, AttendanceStatus
+    from app.models import Meeting, User, MeetingType
+    from app.services.search_index import meeting_search_index
+    from app.services.meeting_occurrences import materialize_meeting
+    from app.services.collection_versions import MEETINGS, bump_version
     
-    db = SessionLocal()
-    try:
-        # 检查是否已经存在双周例会
-        existing_meeting = db.query(Meeting).filter(
-            Meeting.title == "双周例会",
-            Meeting.is_recurring == True,
-            Meeting.recurring_pattern == "biweekly"
-        ).first()
-        
-        if existing_meeting:
-            logger.info("默认双周例会已存在，跳过创建")
-            return
-        
-        # 获取第一个用户作为创建者（如果没有用户，则跳过）
-        first_user = db.query(User).first()
-        if not first_user:
-            logger.warning("没有找到用户，暂不创建默认例会（将在有用户后创建）")
-            return
-        
-        # 使用中国时区（UTC+8）
-        china_tz = timezone(timedelta(hours=8))
-        next_meeting_date = datetime(2025, 11, 6, 16, 0, 0, tzinfo=china_tz)  # 中国时间下午4点
-        
-        # 创建默认双周例会
-        default_meeting = Meeting(
-            title="双周例会",
-            description="定期团队例会，讨论项目进展和安排",
-            type=MeetingType.MEETING,
-            meeting_date=next_meeting_date,
-            duration=60,  # 1小时
-            is_recurring=True,
-            recurring_pattern="biweekly",
-            created_by_id=first_user.id
-        )
-        
-        db.add(default_meeting)
-        db.commit()
-        logger.info(f"成功创建默认双周例会，下一次例会时间: {next_meeting_date.strftime('%Y-%m-%d %H:%M')}, 会议ID: {default_meeting.id}")
-        # 注意：对于重复会议，出席记录会在生成实例时自动创建，不需要在这里创建
-    except Exception as e:
-        logger.error(f"创建默认例会失败: {str(e)}", exc_info=True)
-        db.rollback()
-    finally:
-        db.close()
+    async with SessionLocal() as db:
+        try:
+            # 检查是否已经存在双周例会
+            result = await db.execute(select(Meeting).filter(
+                Meeting.title == "双周例会",
+                Meeting.is_recurring == True,
+                Meeting.recurring_pattern == "biweekly"
+            ))
+            existing_meeting = result.scalars().first()
+            
+            if existing_meeting:
+                logger.info("默认双周例会已存在，跳过创建")
+                return
+            
+            # 获取第一个用户作为创建者（如果没有用户，则跳过）
+            first_user = (await db.execute(select(User))).scalars().first()
+            if not first_user:
+                logger.warning("没有找到用户，暂不创建默认例会（将在有用户后创建）")
+                return
+            
+            # 使用中国时区（UTC+8）
+            china_tz = timezone(timedelta(hours=8))
+            next_meeting_date = datetime(2025, 11, 6, 16, 0, 0, tzinfo=china_tz)  # 中国时间下午4点
+            
+            # 创建默认双周例会
+            default_meeting = Meeting(
+                title="双周例会",
+                description="定期团队例会，讨论项目进展和安排",
+                type=MeetingType.MEETING,
+                meeting_date=next_meeting_date,
+                duration=60,  # 1小时
+                is_recurring=True,
+                recurring_pattern="biweekly",
+                created_by_id=first_user.id
+            )
+            
+            db.add(default_meeting)
+            await db.flush()
+            await meeting_search_index.upsert(db, default_meeting)
+            await materialize_meeting(db, default_meeting)
+            await db.commit()
+            await bump_version(MEETINGS)
+            logger.info(f"成功创建默认双周例会，下一次例会时间: {next_meeting_date.strftime('%Y-%m-%d %H:%M')}, 会议ID: {default_meeting.id}")
+            # 注意：出席记录在用户提交出席状态时才创建，不需要在这里创建
+        except Exception as e:
+            logger.error(f"创建默认例会失败: {str(e)}", exc_info=True)
+            await db.rollback()
+
+
+def run_migrations(connection) -> None:
+    """在给定的同步连接上执行 Alembic 迁移到最新版本"""
+    from alembic import command
+    from alembic.config import Config
+    
+    config = Config(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+    command.upgrade(config, "head")
 
 
 async def init_db():
     """初始化数据库"""
+    from app.services.meeting_occurrences import refresh_occurrences
+    from app.services.collection_versions import ensure_collections
+    
     # 创建所有表
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # 列表 ETag 使用的集合版本号
+        await ensure_collections(conn)
+    
+    # 执行迁移（已有数据库补建索引等；新数据库的表和索引已由 create_all 创建，全文索引表由迁移创建）
+    async with engine.connect() as conn:
+        await conn.run_sync(run_migrations)
     
     # 确保上传目录存在
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     
     # 初始化默认双周例会
-    await init_default_meeting()
\ No newline at end of file
+    await init_default_meeting()
+    
+    # 补齐并延伸会议实例（已有数据库首次启用时回填）
+    await refresh_occurrences()
\ No newline at end of file
@@ -11,13 +11,36 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class ServiceBusyError(Exception):
+    """服务繁忙异常（后台工作队列已满）"""
+    
+    def __init__(self, message: str = "服务繁忙，请稍后重试", retry_after: int = 1):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
 def setup_exception_handlers(app: FastAPI):
     """设置异常处理器"""
     
+    @app.exception_handler(ServiceBusyError)
+    async def service_busy_exception_handler(request: Request, exc: ServiceBusyError):
+        """服务繁忙异常处理器"""
+        logger.warning("服务繁忙: %s", exc.message)
+        return JSONResponse(
+            status_code=503,
+            content={
+                "error": True,
+                "message": exc.message,
+                "status_code": 503
+            },
+            headers={"Retry-After": str(exc.retry_after)}
+        )
+    
     @app.exception_handler(HTTPException)
     async def http_exception_handler(request: Request, exc: HTTPException):
         """HTTP异常处理器"""
-        logger.warning(f"HTTP异常: {exc.status_code} - {exc.detail}")
+        logger.warning("HTTP异常: %s - %s", exc.status_code, exc.detail)
         return JSONResponse(
             status_code=exc.status_code,
             content={
@@ -30,7 +53,7 @@ def setup_exception_handlers(app: FastAPI):
     @app.exception_handler(StarletteHTTPException)
     async def starlette_exception_handler(request: Request, exc: StarletteHTTPException):
         """Starlette异常处理器"""
-        logger.warning(f"Starlette异常: {exc.status_code} - {exc.detail}")
+        logger.warning("Starlette异常: %s - %s", exc.status_code, exc.detail)
         return JSONResponse(
             status_code=exc.status_code,
             content={
@@ -43,7 +66,7 @@ def setup_exception_handlers(app: FastAPI):
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(request: Request, exc: RequestValidationError):
         """请求验证异常处理器"""
-        logger.warning(f"请求验证异常: {exc.errors()}")
+        logger.warning("请求验证异常: %s", exc.errors())
         return JSONResponse(
             status_code=422,
             content={
@@ -56,7 +79,7 @@ def setup_exception_handlers(app: FastAPI):
     @app.exception_handler(Exception)
     async def general_exception_handler(request: Request, exc: Exception):
         """通用异常处理器"""
-        logger.error(f"未处理的异常: {str(exc)}", exc_info=True)
+        logger.error("未处理的异常: %s", exc, exc_info=True)
         return JSONResponse(
             status_code=500,
             content={
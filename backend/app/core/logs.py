@@ -0,0 +1,112 @@
+"""
+日志工具
+
+- 队列日志：请求中只把日志记录放入队列，格式化和写文件在后台线程中完成
+- 采样：高频日志记录器（如每个会议实例一行的调试日志）只保留每 N 条中的 1 条
+"""
+
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
+import copy
+import itertools
+import logging
+import queue
+
+# 每个会议实例一行的日志使用的记录器（按 LOG_SAMPLING 采样）
+INSTANCE_LOGGER = "app.services.meeting_service.instances"
+
+_listener: Optional[QueueListener] = None
+_exception_formatter = logging.Formatter()
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    只在调用方线程中完成必要工作的 QueueHandler
+
+    入队时把消息参数代入消息（参数可能是之后会被修改的可变对象），异常信息转为文本
+    （traceback 引用的栈帧在之后会变化），记录的时间格式化、按格式拼接和写文件
+    由后台线程中的处理器完成。默认的 prepare 还会在调用方线程中完整格式化一遍。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 复制记录，不影响同一记录的其他处理器
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """每 every 条记录保留 1 条（WARNING 及以上不采样）"""
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(1, every)
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        return next(self._counter) % self.every == 0
+
+
+def parse_sampling(value: str) -> Dict[str, int]:
+    """解析采样配置：logger=N,logger=N"""
+    rates = {}
+    for item in value.split(","):
+        name, sep, every = item.strip().partition("=")
+        if sep and name and every.strip().isdigit():
+            rates[name.strip()] = int(every)
+    return rates
+
+
+def start_queue_logging(handlers: List[logging.Handler], level: int) -> logging.Handler:
+    """
+    在后台线程中运行处理器
+
+    Returns:
+        添加到根日志记录器的 QueueHandler
+    """
+    global _listener
+    stop_queue_logging()
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.setLevel(level)
+    return queue_handler
+
+
+def stop_queue_logging() -> None:
+    """
+    写出队列中剩余的日志并停止后台线程（应用关闭时调用）
+
+    之后的日志由根日志记录器直接交给原处理器。
+    """
+    global _listener
+    if _listener is None:
+        return
+
+    root_logger = logging.getLogger()
+    for handler in [h for h in root_logger.handlers if isinstance(h, DeferredQueueHandler)]:
+        root_logger.removeHandler(handler)
+        for target in _listener.handlers:
+            root_logger.addHandler(target)
+    _listener.stop()
+    _listener = None
+
+
+def apply_sampling(rates: Dict[str, int]) -> None:
+    """为记录器设置采样过滤器（替换之前设置的采样）"""
+    for name, every in rates.items():
+        logger = logging.getLogger(name)
+        for existing in [f for f in logger.filters if isinstance(f, SamplingFilter)]:
+            logger.removeFilter(existing)
+        if every > 1:
+            logger.addFilter(SamplingFilter(every))
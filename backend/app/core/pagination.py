@@ -0,0 +1,78 @@
+"""
+游标分页工具
+
+游标是不透明的字符串，内部记录上一页最后一条记录的ID。
+列表按ID升序返回（与创建顺序一致），下一页通过 id > 游标 直接定位，不再扫描前面的记录。
+
+与常见的游标分页不同的地方：
+- 游标放在响应头 X-Next-Cursor 中，响应体仍是列表（兼容现有客户端）；最后一页没有该响应头
+- 游标只记录ID，因此只适用于按ID排序的列表；接取记录列表使用接取记录的ID
+- 指定 cursor 后 skip 被忽略，不报错
+- 按相关度排序的搜索接口不支持游标，仍使用 skip 分页
+"""
+
+from fastapi import HTTPException, Query, status
+from typing import Any, Dict, Optional, Sequence
+import base64
+import binascii
+
+# 下一页游标的响应头（响应体保持列表格式，兼容现有客户端）
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+_CURSOR_PREFIX = "id:"
+
+# 支持游标的列表接口在 OpenAPI 中声明的响应头
+CURSOR_RESPONSES: Dict[int, Dict[str, Any]] = {
+    200: {
+        "headers": {
+            NEXT_CURSOR_HEADER: {
+                "description": "下一页游标（作为 cursor 参数传入），本页未满时不返回",
+                "schema": {"type": "string"}
+            }
+        }
+    }
+}
+
+
+def encode_cursor(last_id: int) -> str:
+    """编码游标"""
+    raw = f"{_CURSOR_PREFIX}{last_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """解码游标，格式错误时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+    except (binascii.Error, UnicodeError) as e:
+        raise ValueError("无效的分页游标") from e
+
+    if not raw.startswith(_CURSOR_PREFIX):
+        raise ValueError("无效的分页游标")
+    try:
+        return int(raw[len(_CURSOR_PREFIX):])
+    except ValueError as e:
+        raise ValueError("无效的分页游标") from e
+
+
+def cursor_query(
+    cursor: Optional[str] = Query(None, description="上一页响应头中的 X-Next-Cursor，指定后忽略 skip；无效时返回 400")
+) -> Optional[int]:
+    """游标查询参数依赖：返回上一页最后一条记录的ID"""
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+def next_cursor_headers(items: Sequence, limit: int) -> Dict[str, str]:
+    """本页已满时返回包含下一页游标的响应头"""
+    if items and len(items) >= limit:
+        return {NEXT_CURSOR_HEADER: encode_cursor(items[-1].id)}
+    return {}
@@ -0,0 +1,133 @@
+"""
+响应序列化
+
+ORM 对象在这里统一转换为响应字典，并用 orjson 一次编码为 JSON 字节。
+列表接口直接返回预序列化的响应，不再经过 response_model 的二次校验和 jsonable_encoder。
+"""
+
+from fastapi import Response  # pyright: ignore[reportMissingImports]
+from datetime import datetime
+from typing import Any, Optional
+import orjson
+
+# UTC 时间输出为 Z，与 pydantic 的时间格式保持一致
+JSON_OPTIONS = orjson.OPT_UTC_Z
+
+# 发布者不存在时显示的名称
+UNKNOWN_PUBLISHER = "未知"
+
+
+def dumps(data: Any) -> bytes:
+    """编码为 JSON 字节（原生支持 datetime 和枚举）"""
+    return orjson.dumps(data, option=JSON_OPTIONS)
+
+
+class JSONBytesResponse(Response):
+    """预序列化的 JSON 响应"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def parse_tags(tags: Optional[str]) -> list:
+    """解析任务标签（数据库中为 JSON 字符串）"""
+    return orjson.loads(tags) if tags else []
+
+
+def task_to_dict(task, publisher: Any = None) -> dict:
+    """
+    任务转换为响应字典
+
+    Args:
+        task: 任务对象
+        publisher: 发布者（任何带 name 属性的对象，为空时显示“未知”）
+    """
+    return {
+        "id": task.id,
+        "title": task.title,
+        "description": task.description,
+        "type": task.type,
+        "priority": task.priority,
+        "status": task.status,
+        "deadline": task.deadline,
+        "tags": parse_tags(task.tags),
+        "accepted_count": task.accepted_count,
+        "max_accept_count": task.max_accept_count,
+        "publisher_id": task.publisher_id,
+        "publisher_name": publisher.name if publisher else UNKNOWN_PUBLISHER,
+        "created_at": task.created_at,
+        "updated_at": task.updated_at
+    }
+
+
+def acceptance_to_dict(acceptance) -> dict:
+    """任务接取记录转换为响应字典（包含任务信息，需要预加载 task 和 task.publisher）"""
+    task = acceptance.task
+    return {
+        "id": acceptance.id,
+        "task_id": acceptance.task_id,
+        "user_id": acceptance.user_id,
+        "status": acceptance.status,
+        "accepted_at": acceptance.accepted_at,
+        "completed_at": acceptance.completed_at,
+        "task": task_to_dict(task, task.publisher)
+    }
+
+
+def _enum_value(value: Any) -> str:
+    return value.value if hasattr(value, 'value') else str(value)
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def meeting_to_dict(meeting, with_attendance: bool = False) -> dict:
+    """
+    会议转换为实例字典（非重复会议或无法展开的重复会议）
+
+    日期保持为 ISO 字符串，出席状态匹配时需要按字符串解析。
+    """
+    meeting_dict = {
+        "id": meeting.id,
+        "meetingId": meeting.id,  # 前端需要的字段
+        "title": meeting.title,
+        "description": meeting.description,
+        "type": _enum_value(meeting.type),
+        "meeting_date": _isoformat(meeting.meeting_date),
+        "date": _isoformat(meeting.meeting_date),
+        "duration": meeting.duration,
+        "is_recurring": meeting.is_recurring,
+        "recurring_pattern": meeting.recurring_pattern,
+        "created_by_id": meeting.created_by_id,
+        "created_at": _isoformat(meeting.created_at),
+        "updated_at": _isoformat(meeting.updated_at)
+    }
+    if with_attendance:
+        meeting_dict["attendance"] = "pending"  # 出席状态（默认待确认）
+    return meeting_dict
+
+
+def meeting_instance_to_dict(meeting, occurrence: datetime) -> dict:
+    """重复会议的单个实例转换为字典"""
+    instance_date_str = occurrence.strftime('%Y-%m-%d')
+    return {
+        "id": f"{meeting.id}_{instance_date_str}",  # 组合ID，前端使用
+        "meetingId": meeting.id,  # 原始会议ID
+        "title": meeting.title,
+        "description": meeting.description,
+        "type": _enum_value(meeting.type),
+        "meeting_date": occurrence.isoformat(),
+        "date": occurrence.isoformat(),  # 前端可能需要的字段
+        "duration": meeting.duration,
+        "is_recurring": True,
+        "recurring_pattern": meeting.recurring_pattern,
+        "created_by_id": meeting.created_by_id,
+        "created_at": _isoformat(meeting.created_at),
+        "updated_at": _isoformat(meeting.updated_at),
+        "isRecurring": True,  # 前端标记
+        "attendance": "pending"  # 出席状态（默认待确认）
+    }
@@ -2,7 +2,7 @@
 数据库模型定义
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum  # pyright: ignore[reportMissingImports]
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum, Index  # pyright: ignore[reportMissingImports]
 from sqlalchemy.orm import relationship  # pyright: ignore[reportMissingImports]
 from sqlalchemy.sql import func  # pyright: ignore[reportMissingImports]
 from datetime import datetime
@@ -78,6 +78,13 @@ class Task(Base):
     # 关系
     publisher = relationship("User", back_populates="published_tasks", foreign_keys=[publisher_id])
     acceptances = relationship("TaskAcceptance", back_populates="task")
+    
+    # 列表分页索引（过滤条件 + ID 排序）
+    __table_args__ = (
+        Index("ix_tasks_type_id", "type", "id"),
+        Index("ix_tasks_status_id", "status", "id"),
+        Index("ix_tasks_publisher_id_id", "publisher_id", "id"),
+    )
 
 
 class TaskAcceptance(Base):
@@ -94,6 +101,12 @@ class TaskAcceptance(Base):
     # 关系
     task = relationship("Task", back_populates="acceptances")
     user = relationship("User", back_populates="accepted_tasks")
+    
+    # 列表分页索引；同一用户只能接取同一任务一次
+    __table_args__ = (
+        Index("ix_task_acceptances_user_id_id", "user_id", "id"),
+        Index("uq_task_acceptances_task_id_user_id", "task_id", "user_id", unique=True),
+    )
 
 
 class File(Base):
@@ -161,8 +174,9 @@ class Meeting(Base):
     meeting_date = Column(DateTime(timezone=True), nullable=False)
     duration = Column(Integer, default=60)  # 持续时间（分钟）
     is_recurring = Column(Boolean, default=False)  # 是否重复
-    recurring_pattern = Column(String(50), nullable=True)  # 重复模式（如：biweekly）
+    recurring_pattern = Column(String(50), nullable=True)  # 重复模式（daily/weekly/biweekly/monthly 或 RRULE，如 FREQ=WEEKLY;INTERVAL=3）
     created_by_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    occurrences_exhausted = Column(Boolean, nullable=False, default=False)  # 物化范围之后不会再有实例（后台延伸时跳过）
     
     # 时间戳
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -171,6 +185,28 @@ class Meeting(Base):
     # 关系
     created_by = relationship("User")
     attendances = relationship("MeetingAttendance", back_populates="meeting")
+    
+    # 日历按日期范围查询，我的会议按创建者查询
+    __table_args__ = (
+        Index("ix_meetings_meeting_date", "meeting_date"),
+        Index("ix_meetings_created_by_id", "created_by_id"),
+    )
+
+
+class MeetingOccurrence(Base):
+    """会议实例模型（物化的日程：非重复会议一行，重复会议按规则展开到滚动范围）"""
+    __tablename__ = "meeting_occurrences"
+    
+    id = Column(Integer, primary_key=True)
+    meeting_id = Column(Integer, ForeignKey("meetings.id", ondelete="CASCADE"), nullable=False)
+    occurrence_date = Column(DateTime, nullable=False)  # 实例时间（不含时区，与日历查询参数一致）
+    is_instance = Column(Boolean, nullable=False, default=False)  # 是否为重复会议展开的实例
+    
+    # 日历按实例时间范围查询和排序；每个会议的实例时间唯一
+    __table_args__ = (
+        Index("ix_meeting_occurrences_occurrence_date_meeting_id", "occurrence_date", "meeting_id"),
+        Index("uq_meeting_occurrences_meeting_id_occurrence_date", "meeting_id", "occurrence_date", unique=True),
+    )
 
 
 class MeetingAttendance(Base):
@@ -191,3 +227,17 @@ class MeetingAttendance(Base):
     # 关系
     meeting = relationship("Meeting", back_populates="attendances")
     user = relationship("User", back_populates="meeting_attendances")
+    
+    # 按会议 + 用户 + 实例日期查找出席记录，按用户列出出席记录
+    __table_args__ = (
+        Index("ix_meeting_attendances_meeting_id_user_id_instance_date", "meeting_id", "user_id", "instance_date"),
+        Index("ix_meeting_attendances_user_id", "user_id"),
+    )
+
+
+class CollectionVersion(Base):
+    """集合版本号（集合内数据写入时在同一事务中递增，用于列表接口的 ETag）"""
+    __tablename__ = "collection_versions"
+    
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
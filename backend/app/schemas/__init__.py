@@ -51,6 +51,15 @@ class UserResponse(UserBase):
     updated_at: Optional[datetime] = None
 
 
+class CurrentUser(BaseSchema):
+    """当前认证用户（精简字段，用于认证缓存）"""
+    id: int
+    username: str
+    name: str
+    role: UserRole
+    is_active: bool
+
+
 # 任务相关模式
 class TaskBase(BaseSchema):
     """任务基础模式"""
@@ -0,0 +1,218 @@
+"""
+头像文件存储
+
+头像按内容的 SHA-256 哈希存放在 UPLOAD_DIR/avatars/<哈希前两位>/<哈希>.<扩展名>，
+用户表只保存头像地址。相同内容只存一份，文件写入后不再修改，
+因此可以用哈希作为强 ETag 并长期缓存。
+
+上传后在后台线程中生成固定尺寸的 WebP 缩略图 <哈希>_<尺寸>.webp，
+出席名单等列表只引用缩略图。
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from PIL import Image, ImageOps  # pyright: ignore[reportMissingImports]
+from typing import Optional, Set, Tuple
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 头像访问地址前缀（对应 GET /api/v1/users/avatars/{filename}）
+AVATAR_URL_PREFIX = "/api/v1/users/avatars/"
+
+# 支持的图片类型 -> 扩展名
+AVATAR_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+# 缩略图尺寸（正方形边长，像素）
+THUMBNAIL_SIZES = (32, 64, 128)
+# 名单类接口引用的缩略图尺寸（兼顾高分屏上 32px 的显示）
+ROSTER_AVATAR_SIZE = 64
+THUMBNAIL_QUALITY = 80
+
+_DATA_URL_RE = re.compile(r"^data:(image/[\w.+-]+);base64,(.*)$", re.DOTALL)
+_FILENAME_RE = re.compile(r"^([0-9a-f]{64})\.(png|jpg|gif|webp)$")
+_THUMBNAIL_RE = re.compile(r"^([0-9a-f]{64})_(\d+)\.webp$")
+
+# 缩略图生成线程池（图片缩放是 CPU 密集任务，单线程即可，避免占用请求处理资源）
+thumbnail_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="avatar-thumbnail")
+_thumbnail_jobs: Set[str] = set()
+_thumbnail_jobs_lock = threading.Lock()
+
+
+def is_data_url(value: Optional[str]) -> bool:
+    """是否为 base64 编码的图片数据"""
+    return isinstance(value, str) and value.startswith("data:image")
+
+
+def decode_data_url(data_url: str) -> Tuple[bytes, str]:
+    """
+    解析 data:image/...;base64,... 格式的头像数据
+
+    Returns:
+        (图片内容, 扩展名)
+    """
+    match = _DATA_URL_RE.match(data_url)
+    if not match or match.group(1).lower() not in AVATAR_EXTENSIONS:
+        raise ValueError("不支持的头像格式")
+    try:
+        content = base64.b64decode(match.group(2), validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError("头像数据无效") from e
+    if not content:
+        raise ValueError("头像数据无效")
+    return content, AVATAR_EXTENSIONS[match.group(1).lower()]
+
+
+def avatar_dir() -> str:
+    return os.path.join(settings.UPLOAD_DIR, "avatars")
+
+
+def avatar_path(filename: str) -> Optional[str]:
+    """头像或缩略图文件名对应的磁盘路径；文件名格式不正确时返回 None"""
+    match = _FILENAME_RE.match(filename)
+    if not match:
+        match = _THUMBNAIL_RE.match(filename)
+        if not match or int(match.group(2)) not in THUMBNAIL_SIZES:
+            return None
+    return os.path.join(avatar_dir(), match.group(1)[:2], filename)
+
+
+def thumbnail_source(filename: str) -> Optional[str]:
+    """缩略图文件名对应的原图文件名；不是缩略图时返回 None"""
+    match = _THUMBNAIL_RE.match(filename)
+    if not match or int(match.group(2)) not in THUMBNAIL_SIZES:
+        return None
+    digest = match.group(1)
+    for extension in set(AVATAR_EXTENSIONS.values()):
+        source = f"{digest}.{extension}"
+        if os.path.exists(avatar_path(source)):
+            return source
+    return None
+
+
+def avatar_etag(filename: str) -> str:
+    """头像的强 ETag（内容哈希）"""
+    return f'"{filename.split(".", 1)[0]}"'
+
+
+def _write_file(path: str, content: bytes) -> None:
+    """先写临时文件再原子替换，避免读到写了一半的文件"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_avatar(content: bytes, extension: str) -> str:
+    """
+    保存头像内容（已存在相同内容时直接复用）
+
+    Returns:
+        头像访问地址
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    filename = f"{digest}.{extension}"
+    path = avatar_path(filename)
+    if not os.path.exists(path):
+        _write_file(path, content)
+    return AVATAR_URL_PREFIX + filename
+
+
+def save_data_url(data_url: str) -> str:
+    """保存 base64 头像数据，返回头像访问地址"""
+    content, extension = decode_data_url(data_url)
+    return save_avatar(content, extension)
+
+
+def normalize_avatar_url(url: str) -> str:
+    """客户端回传的绝对地址指向本服务头像时，只保存路径部分"""
+    index = url.find(AVATAR_URL_PREFIX)
+    if index > 0 and url.startswith(("http://", "https://")):
+        return url[index:]
+    return url
+
+
+def avatar_filename(url: Optional[str]) -> Optional[str]:
+    """本服务头像地址对应的文件名；其他地址返回 None"""
+    if not url or not url.startswith(AVATAR_URL_PREFIX):
+        return None
+    filename = url[len(AVATAR_URL_PREFIX):]
+    return filename if _FILENAME_RE.match(filename) else None
+
+
+def thumbnail_url(url: Optional[str], size: int = ROSTER_AVATAR_SIZE) -> Optional[str]:
+    """
+    头像缩略图地址
+
+    缩略图尚未生成时该地址返回原图，因此无需检查文件是否存在；
+    不是本服务存储的头像（外部URL等）原样返回。
+    """
+    filename = avatar_filename(url)
+    if filename is None:
+        return url
+    return f"{AVATAR_URL_PREFIX}{filename.split('.', 1)[0]}_{size}.webp"
+
+
+def generate_thumbnails(filename: str) -> None:
+    """为头像生成所有尺寸的缩略图（已存在的尺寸跳过）"""
+    digest = filename.split(".", 1)[0]
+    targets = [
+        (size, avatar_path(f"{digest}_{size}.webp"))
+        for size in THUMBNAIL_SIZES
+    ]
+    targets = [(size, path) for size, path in targets if not os.path.exists(path)]
+    if not targets:
+        return
+
+    with Image.open(avatar_path(filename)) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        for size, path in targets:
+            thumbnail = ImageOps.fit(image, (size, size), method=Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, format="WEBP", quality=THUMBNAIL_QUALITY)
+            _write_file(path, buffer.getvalue())
+
+
+def _thumbnail_done(filename: str, future: Future) -> None:
+    with _thumbnail_jobs_lock:
+        _thumbnail_jobs.discard(filename)
+    error = future.exception()
+    if error is not None:
+        logger.warning("生成头像缩略图失败: %s: %s", filename, error)
+
+
+def schedule_thumbnails(url: Optional[str]) -> None:
+    """在后台线程中为头像生成缩略图（同一头像不会重复排队）"""
+    filename = avatar_filename(url)
+    if filename is None:
+        return
+
+    with _thumbnail_jobs_lock:
+        if filename in _thumbnail_jobs:
+            return
+        _thumbnail_jobs.add(filename)
+    future = thumbnail_executor.submit(generate_thumbnails, filename)
+    future.add_done_callback(lambda f: _thumbnail_done(filename, f))
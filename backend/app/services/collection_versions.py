@@ -0,0 +1,84 @@
+"""
+集合版本号
+
+每个集合（任务、会议）在 collection_versions 表中有一个计数器。列表接口用版本号计算 ETag，
+客户端数据未变化时直接返回 304，不再查询和序列化列表。
+
+服务层的写入方法在业务事务提交后调用 bump_version，计数器在单独的短事务中递增，
+业务事务不会在计数器行上排队；同一进程中同时完成的写入合并为一次递增。
+提交到递增完成之间（通常为毫秒级），其他客户端仍可能收到旧版本的 304；
+写入方在递增完成后才返回响应，随后的读取总能看到新版本。
+"""
+
+from sqlalchemy import insert, select, update  # pyright: ignore[reportMissingImports]
+from sqlalchemy.exc import SQLAlchemyError  # pyright: ignore[reportMissingImports]
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession  # pyright: ignore[reportMissingImports]
+from typing import Dict, Tuple
+import asyncio
+import logging
+
+from app.core.database import engine
+from app.models import CollectionVersion
+
+logger = logging.getLogger(__name__)
+
+# 任务列表：任务、接取记录、发布者姓名
+TASKS = "tasks"
+# 会议列表：会议、出席记录
+MEETINGS = "meetings"
+
+COLLECTIONS = (TASKS, MEETINGS)
+
+# 尚未开始执行的递增：集合名 -> 任务（在它开始之前提交的写入都可以加入）
+_pending_bumps: Dict[Tuple[str, ...], asyncio.Task] = {}
+
+
+async def ensure_collections(conn: AsyncConnection) -> None:
+    """创建缺失的计数器（启动时调用，之后写入只需 UPDATE）"""
+    result = await conn.execute(select(CollectionVersion.name))
+    missing = set(COLLECTIONS) - set(result.scalars())
+    if missing:
+        await conn.execute(insert(CollectionVersion), [{"name": name, "version": 0} for name in missing])
+
+
+async def bump_version(*names: str) -> None:
+    """
+    递增集合版本号（在业务事务提交之后调用；递增后列表的 ETag 和响应缓存随之失效）
+
+    失败时只记录日志，不影响已经提交的写入。
+    """
+    key = tuple(sorted(set(names)))
+    loop = asyncio.get_running_loop()
+    task = _pending_bumps.get(key)
+    if task is None or task.get_loop() is not loop:
+        task = loop.create_task(_bump(key))
+        _pending_bumps[key] = task
+    # 调用方被取消时递增仍然完成
+    await asyncio.shield(task)
+
+
+async def _bump(names: Tuple[str, ...]) -> None:
+    """执行一次递增（开始执行后新的写入另起一次）"""
+    # 让同一轮事件循环中完成提交的写入加入本次递增
+    await asyncio.sleep(0)
+    if _pending_bumps.get(names) is asyncio.current_task():
+        del _pending_bumps[names]
+
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(
+                update(CollectionVersion)
+                .filter(CollectionVersion.name.in_(names))
+                .values(version=CollectionVersion.version + 1)
+            )
+    except SQLAlchemyError:
+        logger.error("递增集合版本号失败: %s", ", ".join(names), exc_info=True)
+
+
+async def get_versions(db: AsyncSession, *names: str) -> Dict[str, int]:
+    """读取集合版本号"""
+    result = await db.execute(
+        select(CollectionVersion.name, CollectionVersion.version)
+        .filter(CollectionVersion.name.in_(names))
+    )
+    return dict(result.all())
@@ -0,0 +1,193 @@
+"""
+会议实例物化表
+
+会议按日程写入 meeting_occurrences 表：非重复会议一行，重复会议从首次会议开始
+按规则展开到滚动范围（当前时间之后 MEETING_OCCURRENCE_HORIZON_DAYS 天）。
+日历的日期范围查询、排序和分页直接在数据库中完成。
+
+- 创建、修改、删除会议时只重新生成该会议的实例（与业务数据在同一事务中提交）
+- 后台任务定期把滚动范围向后延伸，并为尚未物化的会议补齐实例；
+  不会再有新实例的会议（COUNT/UNTIL 已用完或重复模式无法识别）标记为 occurrences_exhausted，之后不再加载
+- 查询范围超出已物化的范围时，由调用方回退到内存展开
+
+所有展开路径都用 occurrence_time 处理会议时间，同一会议的实例时间一致。
+"""
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update  # pyright: ignore[reportMissingImports]
+from sqlalchemy.exc import IntegrityError  # pyright: ignore[reportMissingImports]
+from sqlalchemy.ext.asyncio import AsyncSession  # pyright: ignore[reportMissingImports]
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Meeting, MeetingOccurrence
+from app.services.recurrence import RecurrenceRule, parse_recurrence
+
+logger = logging.getLogger(__name__)
+
+
+def occurrence_time(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    会议时间转换为实例时间（不含时区）
+
+    带时区的时间先换算为 UTC：创建请求中的时间带客户端时区，PostgreSQL 读出的时间带会话时区，
+    只去掉时区会让同一时刻得到不同的钟点。SQLite 读出的时间不带时区，保持不变。
+    """
+    if value is not None and value.tzinfo:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def horizon_end() -> datetime:
+    """本次物化的范围终点"""
+    return datetime.now() + timedelta(days=settings.MEETING_OCCURRENCE_HORIZON_DAYS)
+
+
+def covers(end_date: Optional[datetime]) -> bool:
+    """
+    查询范围是否在已物化的范围内
+
+    后台任务每隔 MEETING_OCCURRENCE_REFRESH_SECONDS 延伸一次，
+    因此保证已物化的终点不早于 horizon_end() 减去一个刷新间隔。
+    """
+    if end_date is None:
+        return False
+    return end_date <= horizon_end() - timedelta(seconds=settings.MEETING_OCCURRENCE_REFRESH_SECONDS)
+
+
+def _rule(meeting: Meeting) -> Optional[RecurrenceRule]:
+    return parse_recurrence(meeting.recurring_pattern) if meeting.is_recurring else None
+
+
+def _exhausted(meeting: Meeting, until: datetime) -> bool:
+    """until 之后是否不会再有实例（非重复会议、重复模式无法识别，或 COUNT/UNTIL 已用完）"""
+    rule = _rule(meeting)
+    if rule is None:
+        return True
+    if rule.count is None and rule.until is None:
+        return False
+    start = until + timedelta(microseconds=1)
+    return next(rule.occurrences(occurrence_time(meeting.meeting_date), start=start), None) is None
+
+
+def _expand(meeting: Meeting, after: Optional[datetime], until: datetime) -> List[dict]:
+    """
+    生成会议在 (after, until] 内的实例行
+
+    after 为 None 表示会议尚未物化；非重复会议（或无法识别重复模式的会议）只有一行。
+    """
+    base_date = occurrence_time(meeting.meeting_date)
+    rule = _rule(meeting)
+    if rule is None:
+        if after is not None:
+            return []
+        return [{"meeting_id": meeting.id, "occurrence_date": base_date, "is_instance": False}]
+
+    start = after + timedelta(microseconds=1) if after is not None else None
+    return [
+        {"meeting_id": meeting.id, "occurrence_date": occurrence, "is_instance": True}
+        for occurrence in rule.occurrences(base_date, start=start, end=until)
+    ]
+
+
+async def materialize_meeting(db: AsyncSession, meeting: Meeting) -> None:
+    """重新生成单个会议的实例（会议创建或日程变化时调用，由调用方提交）"""
+    await remove_meeting(db, meeting.id)
+    if meeting.meeting_date is None:
+        return
+
+    # 按数据库中保存的时间展开，与后台延伸和内存展开读到的值相同
+    await db.flush()
+    await db.refresh(meeting, ["meeting_date"])
+
+    until = horizon_end()
+    rows = _expand(meeting, None, until)
+    if rows:
+        await db.execute(insert(MeetingOccurrence), rows)
+    meeting.occurrences_exhausted = _exhausted(meeting, until)
+
+
+async def remove_meeting(db: AsyncSession, meeting_id: int) -> None:
+    """删除会议的所有实例"""
+    await db.execute(delete(MeetingOccurrence).filter(MeetingOccurrence.meeting_id == meeting_id))
+
+
+async def extend_horizon(db: AsyncSession) -> int:
+    """
+    把会议的实例延伸到新的范围终点（只写入最后一个已物化实例之后的部分）
+
+    只加载尚未物化的会议，以及最后一个实例早于新终点、且还会有新实例的重复会议；
+    每个会议的最后实例时间由 (meeting_id, occurrence_date) 唯一索引直接取得。
+
+    Returns:
+        新写入的实例数
+    """
+    until = horizon_end()
+    tails = (
+        select(
+            MeetingOccurrence.meeting_id,
+            func.max(MeetingOccurrence.occurrence_date).label("last_occurrence")
+        )
+        .group_by(MeetingOccurrence.meeting_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(Meeting, tails.c.last_occurrence)
+        .outerjoin(tails, tails.c.meeting_id == Meeting.id)
+        .filter(
+            Meeting.meeting_date.isnot(None),
+            or_(
+                tails.c.last_occurrence.is_(None),
+                and_(
+                    Meeting.is_recurring == True,
+                    Meeting.occurrences_exhausted == False,
+                    tails.c.last_occurrence < until
+                )
+            )
+        )
+    )
+
+    rows = []
+    exhausted = []
+    for meeting, last in result.all():
+        rows.extend(_expand(meeting, last, until))
+        if _exhausted(meeting, until):
+            exhausted.append(meeting.id)
+    if rows:
+        await db.execute(insert(MeetingOccurrence), rows)
+    if exhausted:
+        # 不是会议内容的变化，保留 updated_at
+        await db.execute(
+            update(Meeting)
+            .filter(Meeting.id.in_(exhausted))
+            .values(occurrences_exhausted=True, updated_at=Meeting.updated_at)
+        )
+    return len(rows)
+
+
+async def refresh_occurrences() -> None:
+    """延伸实例的滚动范围（启动时和后台任务中调用）"""
+    async with SessionLocal() as db:
+        try:
+            count = await extend_horizon(db)
+            await db.commit()
+        except IntegrityError:
+            # 其他进程同时在延伸，下次刷新时再补齐
+            await db.rollback()
+            logger.info("会议实例正在由其他进程更新，跳过本次刷新")
+            return
+    if count:
+        logger.info("会议实例已延伸: 新增 %s 个", count)
+
+
+async def occurrence_refresh_loop() -> None:
+    """后台任务：按间隔延伸会议实例的滚动范围"""
+    while True:
+        await asyncio.sleep(settings.MEETING_OCCURRENCE_REFRESH_SECONDS)
+        try:
+            await refresh_occurrences()
+        except Exception as e:
+            logger.error("延伸会议实例失败: %s", e, exc_info=True)
@@ -2,29 +2,41 @@
 会议服务
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import Optional, List
-from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, and_, or_, func
+from typing import Optional, List, Iterator, Tuple, Dict
+from datetime import datetime, timedelta, date
+from itertools import islice
+import heapq
 import logging
 
-from app.models import Meeting, MeetingAttendance, MeetingType, AttendanceStatus, User
+from app.core.config import settings
+from app.core.logs import INSTANCE_LOGGER
+from app.core.serializers import meeting_to_dict, meeting_instance_to_dict
+from app.models import Meeting, MeetingAttendance, MeetingOccurrence, MeetingType, AttendanceStatus, User
 from app.schemas import MeetingCreate, MeetingUpdate, AttendanceUpdate
+from app.services import meeting_occurrences
+from app.services.collection_versions import MEETINGS, bump_version
+from app.services.recurrence import RecurrenceRule, parse_recurrence
+from app.services.search_index import meeting_search_index, order_by_ids
 
 logger = logging.getLogger(__name__)
+# 每个会议一行的调试日志（按 LOG_SAMPLING 采样）
+instance_logger = logging.getLogger(INSTANCE_LOGGER)
 
 
 class MeetingService:
     """会议服务类"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def get_meeting_by_id(self, meeting_id: int) -> Optional[Meeting]:
+    async def get_meeting_by_id(self, meeting_id: int) -> Optional[Meeting]:
         """根据ID获取会议"""
-        return self.db.query(Meeting).filter(Meeting.id == meeting_id).first()
+        result = await self.db.execute(select(Meeting).filter(Meeting.id == meeting_id))
+        return result.scalars().first()
     
-    def get_meetings(
+    async def get_meetings(
         self,
         skip: int = 0,
         limit: int = 100,
@@ -33,7 +45,7 @@ class MeetingService:
         meeting_type: Optional[MeetingType] = None
     ) -> List[Meeting]:
         """获取会议列表"""
-        query = self.db.query(Meeting)
+        query = select(Meeting)
         
         if start_date:
             query = query.filter(Meeting.meeting_date >= start_date)
@@ -42,9 +54,12 @@ class MeetingService:
         if meeting_type:
             query = query.filter(Meeting.type == meeting_type)
         
-        return query.order_by(Meeting.meeting_date.asc()).offset(skip).limit(limit).all()
+        result = await self.db.execute(
+            query.order_by(Meeting.meeting_date.asc()).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
     
-    def get_user_meetings(
+    async def get_user_meetings(
         self,
         user_id: int,
         skip: int = 0,
@@ -53,32 +68,31 @@ class MeetingService:
         end_date: Optional[datetime] = None
     ) -> List[Meeting]:
         """获取用户相关的会议（创建的或需要参加的）"""
-        # 获取用户创建的会议
-        created_meetings = self.db.query(Meeting).filter(
-            Meeting.created_by_id == user_id
+        # 用户需要参加的会议（通过出席记录）
+        attended_meeting_ids = select(MeetingAttendance.meeting_id).filter(
+            MeetingAttendance.user_id == user_id
         )
         
-        # 获取用户需要参加的会议（通过出席记录）
-        attendance_meetings = self.db.query(Meeting).join(
-            MeetingAttendance
-        ).filter(MeetingAttendance.user_id == user_id)
+        # 用户创建的会议 + 需要参加的会议（OR 条件天然去重）
+        query = select(Meeting).filter(
+            or_(
+                Meeting.created_by_id == user_id,
+                Meeting.id.in_(attended_meeting_ids)
+            )
+        )
         
         if start_date:
-            created_meetings = created_meetings.filter(Meeting.meeting_date >= start_date)
-            attendance_meetings = attendance_meetings.filter(Meeting.meeting_date >= start_date)
+            query = query.filter(Meeting.meeting_date >= start_date)
         
         if end_date:
-            created_meetings = created_meetings.filter(Meeting.meeting_date <= end_date)
-            attendance_meetings = attendance_meetings.filter(Meeting.meeting_date <= end_date)
-        
-        # 合并并去重
-        all_meetings = created_meetings.union(attendance_meetings).order_by(
-            Meeting.meeting_date.asc()
-        ).offset(skip).limit(limit).all()
+            query = query.filter(Meeting.meeting_date <= end_date)
         
-        return all_meetings
+        result = await self.db.execute(
+            query.order_by(Meeting.meeting_date.asc()).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
     
-    def create_meeting(self, meeting_data: MeetingCreate, created_by_id: int) -> Meeting:
+    async def create_meeting(self, meeting_data: MeetingCreate, created_by_id: int) -> Meeting:
         """创建会议"""
         db_meeting = Meeting(
             title=meeting_data.title,
@@ -92,15 +106,19 @@ class MeetingService:
         )
         
         self.db.add(db_meeting)
-        self.db.commit()
-        self.db.refresh(db_meeting)
-        
-        logger.info(f"创建新会议: {meeting_data.title} (创建者: {created_by_id})")
+        await self.db.flush()
+        await meeting_search_index.upsert(self.db, db_meeting)
+        await meeting_occurrences.materialize_meeting(self.db, db_meeting)
+        await self.db.commit()
+        await bump_version(MEETINGS)
+        await self.db.refresh(db_meeting)
+        
+        logger.info("创建新会议: %s (创建者: %s)", meeting_data.title, created_by_id)
         return db_meeting
     
-    def update_meeting(self, meeting_id: int, meeting_data: MeetingUpdate) -> Optional[Meeting]:
+    async def update_meeting(self, meeting_id: int, meeting_data: MeetingUpdate) -> Optional[Meeting]:
         """更新会议"""
-        meeting = self.get_meeting_by_id(meeting_id)
+        meeting = await self.get_meeting_by_id(meeting_id)
         if not meeting:
             return None
         
@@ -108,37 +126,49 @@ class MeetingService:
         for field, value in update_data.items():
             setattr(meeting, field, value)
         
-        self.db.commit()
-        self.db.refresh(meeting)
+        # 标题或描述变化时同步全文索引
+        if "title" in update_data or "description" in update_data:
+            await meeting_search_index.upsert(self.db, meeting)
+        
+        # 日程变化时重新生成该会议的实例
+        if update_data.keys() & {"meeting_date", "is_recurring", "recurring_pattern"}:
+            await meeting_occurrences.materialize_meeting(self.db, meeting)
+        
+        await self.db.commit()
+        await bump_version(MEETINGS)
+        await self.db.refresh(meeting)
         
-        logger.info(f"更新会议: {meeting.title}")
+        logger.info("更新会议: %s", meeting.title)
         return meeting
     
-    def delete_meeting(self, meeting_id: int) -> bool:
+    async def delete_meeting(self, meeting_id: int) -> bool:
         """删除会议"""
-        meeting = self.get_meeting_by_id(meeting_id)
+        meeting = await self.get_meeting_by_id(meeting_id)
         if not meeting:
             return False
         
         # 删除相关的出席记录
-        self.db.query(MeetingAttendance).filter(
+        await self.db.execute(delete(MeetingAttendance).filter(
             MeetingAttendance.meeting_id == meeting_id
-        ).delete()
+        ))
+        await meeting_search_index.remove(self.db, meeting_id)
+        await meeting_occurrences.remove_meeting(self.db, meeting_id)
         
-        self.db.delete(meeting)
-        self.db.commit()
+        await self.db.delete(meeting)
+        await self.db.commit()
+        await bump_version(MEETINGS)
         
-        logger.info(f"删除会议: {meeting.title}")
+        logger.info("删除会议: %s", meeting.title)
         return True
     
-    def get_attendance(
+    async def get_attendance(
         self, 
         meeting_id: int, 
         user_id: int, 
         instance_date: Optional[datetime] = None
     ) -> Optional[MeetingAttendance]:
         """获取用户的出席记录（支持按实例日期查找）"""
-        query = self.db.query(MeetingAttendance).filter(
+        query = select(MeetingAttendance).filter(
             and_(
                 MeetingAttendance.meeting_id == meeting_id,
                 MeetingAttendance.user_id == user_id
@@ -160,9 +190,10 @@ class MeetingService:
         else:
             query = query.filter(MeetingAttendance.instance_date.is_(None))
         
-        return query.first()
+        result = await self.db.execute(query)
+        return result.scalars().first()
     
-    def create_attendance(
+    async def create_attendance(
         self, 
         meeting_id: int, 
         user_id: int, 
@@ -170,7 +201,7 @@ class MeetingService:
     ) -> MeetingAttendance:
         """创建出席记录（默认待确认状态）"""
         # 检查是否已存在
-        existing = self.get_attendance(meeting_id, user_id, instance_date)
+        existing = await self.get_attendance(meeting_id, user_id, instance_date)
         if existing:
             return existing
         
@@ -182,67 +213,279 @@ class MeetingService:
         )
         
         self.db.add(attendance)
-        self.db.commit()
-        self.db.refresh(attendance)
+        await self.db.commit()
+        await bump_version(MEETINGS)
+        await self.db.refresh(attendance)
         
-        logger.info(f"创建出席记录: 会议 {meeting_id}, 用户 {user_id}, 实例日期: {instance_date}")
+        logger.info("创建出席记录: 会议 %s, 用户 %s, 实例日期: %s", meeting_id, user_id, instance_date)
         return attendance
     
-    def update_attendance(
+    async def update_attendance(
         self,
         meeting_id: int,
         user_id: int,
         attendance_data: AttendanceUpdate
     ) -> Optional[MeetingAttendance]:
-        """更新出席状态（支持按实例日期更新）"""
-        # 使用实例日期查找或创建出席记录
-        attendance = self.get_attendance(meeting_id, user_id, attendance_data.instance_date)
+        """更新出席状态（支持按实例日期更新，用户首次答复时才写入记录）"""
+        # 使用实例日期查找出席记录
+        attendance = await self.get_attendance(meeting_id, user_id, attendance_data.instance_date)
         if not attendance:
-            # 如果不存在，创建一条新记录
-            attendance = self.create_attendance(meeting_id, user_id, attendance_data.instance_date)
+            # 如果不存在，创建一条新记录（与状态一起提交）
+            attendance = MeetingAttendance(
+                meeting_id=meeting_id,
+                user_id=user_id,
+                instance_date=attendance_data.instance_date
+            )
+            self.db.add(attendance)
         
         attendance.status = attendance_data.status
         if attendance_data.notes is not None:
             attendance.notes = attendance_data.notes
         
-        self.db.commit()
-        self.db.refresh(attendance)
+        await self.db.commit()
+        await bump_version(MEETINGS)
+        await self.db.refresh(attendance)
         
-        logger.info(f"更新出席状态: 会议 {meeting_id}, 用户 {user_id}, 实例日期: {attendance_data.instance_date}, 状态: {attendance_data.status}")
+        logger.info("更新出席状态: 会议 %s, 用户 %s, 实例日期: %s, 状态: %s", meeting_id, user_id, attendance_data.instance_date, attendance_data.status)
         return attendance
     
-    def get_meeting_attendances(self, meeting_id: int) -> List[MeetingAttendance]:
+    async def get_meeting_attendances(self, meeting_id: int) -> List[MeetingAttendance]:
         """获取会议的所有出席记录"""
-        return self.db.query(MeetingAttendance).filter(
+        result = await self.db.execute(select(MeetingAttendance).filter(
             MeetingAttendance.meeting_id == meeting_id
-        ).all()
+        ))
+        return list(result.scalars().all())
+    
+    async def get_occurrences_by_day(
+        self,
+        start_day: date,
+        end_day: date
+    ) -> Dict[date, List[Tuple[datetime, Meeting, bool]]]:
+        """
+        按天分桶的会议实例索引（包含重复会议的实例和非重复会议）
+        
+        范围在已物化的实例内时直接查询会议实例表；否则一次查询取出范围内的非重复会议
+        和范围结束前开始的重复会议，重复会议只展开范围内的实例。
+        
+        Returns:
+            日期 -> 当天按时间排序的 (实例时间, 会议, 是否为重复实例) 列表
+        """
+        range_start = datetime.combine(start_day, datetime.min.time())
+        range_end = datetime.combine(end_day, datetime.max.time())
+        
+        buckets: Dict[date, List[Tuple[datetime, Meeting, bool]]] = {}
+        if meeting_occurrences.covers(range_end):
+            # 直接读取已物化的实例（已按时间排序）
+            result = await self.db.execute(
+                select(MeetingOccurrence.occurrence_date, Meeting, MeetingOccurrence.is_instance)
+                .join(Meeting, Meeting.id == MeetingOccurrence.meeting_id)
+                .filter(
+                    MeetingOccurrence.occurrence_date >= range_start,
+                    MeetingOccurrence.occurrence_date <= range_end
+                )
+                .order_by(MeetingOccurrence.occurrence_date.asc(), MeetingOccurrence.meeting_id.asc())
+            )
+            for occurrence, meeting, is_instance in result.all():
+                buckets.setdefault(occurrence.date(), []).append((occurrence, meeting, is_instance))
+            return buckets
+        
+        # 超出物化范围：取出相关会议在内存中展开
+        result = await self.db.execute(select(Meeting).filter(
+            Meeting.meeting_date.isnot(None),
+            or_(
+                and_(Meeting.is_recurring == True, Meeting.meeting_date <= range_end),
+                and_(Meeting.meeting_date >= range_start, Meeting.meeting_date <= range_end)
+            )
+        ).order_by(Meeting.id.asc()))
+        
+        for meeting in result.scalars():
+            base_date = meeting_occurrences.occurrence_time(meeting.meeting_date)
+            rule = parse_recurrence(meeting.recurring_pattern) if meeting.is_recurring else None
+            if rule is None:
+                # 非重复会议，或无法识别重复模式的会议按单次会议处理
+                if range_start <= base_date <= range_end:
+                    buckets.setdefault(base_date.date(), []).append((base_date, meeting, False))
+                continue
+            for occurrence in rule.occurrences(base_date, start=range_start, end=range_end):
+                buckets.setdefault(occurrence.date(), []).append((occurrence, meeting, True))
+        
+        for occurrences in buckets.values():
+            occurrences.sort(key=lambda item: (item[0], item[1].id))
+        return buckets
+    
+    async def get_day_attendances(
+        self,
+        day: date
+    ) -> List[Tuple[datetime, Meeting, List[MeetingAttendance]]]:
+        """
+        获取某一天的所有会议实例及其出席记录（查询次数与会议数量无关）
+        
+        重复会议只匹配该实例日期的出席记录，非重复会议匹配没有实例日期的记录。
+        """
+        occurrences = (await self.get_occurrences_by_day(day, day)).get(day, [])
+        if not occurrences:
+            return []
+        
+        result = await self.db.execute(select(MeetingAttendance).filter(
+            MeetingAttendance.meeting_id.in_({meeting.id for _, meeting, _ in occurrences}),
+            or_(
+                MeetingAttendance.instance_date.is_(None),
+                and_(
+                    MeetingAttendance.instance_date >= datetime.combine(day, datetime.min.time()),
+                    MeetingAttendance.instance_date <= datetime.combine(day, datetime.max.time())
+                )
+            )
+        ).order_by(MeetingAttendance.id.asc()))
+        
+        # (会议ID, 是否为实例记录) -> 出席记录
+        attendances: Dict[Tuple[int, bool], List[MeetingAttendance]] = {}
+        for attendance in result.scalars():
+            key = (attendance.meeting_id, attendance.instance_date is not None)
+            attendances.setdefault(key, []).append(attendance)
+        
+        return [
+            (occurrence, meeting, attendances.get((meeting.id, is_instance), []))
+            for occurrence, meeting, is_instance in occurrences
+        ]
     
-    def get_user_attendances(
+    async def get_user_attendances(
         self,
         user_id: int,
         skip: int = 0,
         limit: int = 100
     ) -> List[MeetingAttendance]:
         """获取用户的出席记录"""
-        return self.db.query(MeetingAttendance).filter(
+        result = await self.db.execute(select(MeetingAttendance).filter(
             MeetingAttendance.user_id == user_id
-        ).offset(skip).limit(limit).all()
+        ).offset(skip).limit(limit))
+        return list(result.scalars().all())
     
-    def search_meetings(self, query: str, skip: int = 0, limit: int = 100) -> List[Meeting]:
-        """搜索会议"""
-        return self.db.query(Meeting).filter(
-            or_(
-                Meeting.title.contains(query),
-                Meeting.description.contains(query)
+    async def search_meetings(self, query: str, skip: int = 0, limit: int = 100) -> List[Meeting]:
+        """搜索会议（全文索引，按相关度排序）"""
+        meeting_ids = await meeting_search_index.search(self.db, query, skip=skip, limit=limit)
+        if meeting_ids is None:
+            # 数据库不支持全文索引时回退到模糊匹配
+            result = await self.db.execute(select(Meeting).filter(
+                or_(
+                    Meeting.title.contains(query),
+                    Meeting.description.contains(query)
+                )
+            ).order_by(Meeting.id.asc()).offset(skip).limit(limit))
+            return list(result.scalars().all())
+        
+        if not meeting_ids:
+            return []
+        result = await self.db.execute(select(Meeting).filter(Meeting.id.in_(meeting_ids)))
+        return order_by_ids(result.scalars().all(), meeting_ids)
+    
+    async def attach_attendance_status(self, instances: List[dict], user_id: int) -> None:
+        """
+        批量填充实例的出席状态
+        
+        一次查询取出用户在这些实例上的全部出席记录并在内存中匹配。
+        没有记录的实例按“待确认”计算；开启 ATTENDANCE_PENDING_ROWS_ON_READ 时，
+        缺失的记录会一次性批量创建并只提交一次。
+        只处理包含 attendance 字段的实例。
+        """
+        # (会议ID, 实例日期) -> 实例列表；非重复会议的实例日期为 None
+        wanted = {}
+        for instance in instances:
+            if "attendance" not in instance:
+                continue
+            instance_date = None
+            if instance.get("isRecurring") and instance.get("meeting_date"):
+                instance_date = datetime.fromisoformat(instance["meeting_date"])
+            key = (instance["meetingId"], instance_date.date() if instance_date else None)
+            wanted.setdefault(key, (instance_date, []))[1].append(instance)
+        
+        if not wanted:
+            return
+        
+        # 一次查询：这些会议中，非重复记录 + 窗口内各实例日期的记录
+        days = [day for _, day in wanted if day is not None]
+        date_filter = MeetingAttendance.instance_date.is_(None)
+        if days:
+            window_start = datetime.combine(min(days), datetime.min.time())
+            window_end = datetime.combine(max(days), datetime.max.time())
+            date_filter = or_(
+                date_filter,
+                and_(
+                    MeetingAttendance.instance_date >= window_start,
+                    MeetingAttendance.instance_date <= window_end
+                )
             )
-        ).offset(skip).limit(limit).all()
+        result = await self.db.execute(select(MeetingAttendance).filter(
+            MeetingAttendance.user_id == user_id,
+            MeetingAttendance.meeting_id.in_({meeting_id for meeting_id, _ in wanted}),
+            date_filter
+        ))
+        
+        existing = {}
+        for attendance in result.scalars():
+            instance_day = None
+            if attendance.instance_date:
+                instance_day = meeting_occurrences.occurrence_time(attendance.instance_date).date()
+            existing.setdefault((attendance.meeting_id, instance_day), attendance)
+        
+        # 匹配已有记录，收集缺失的记录
+        new_attendances = []
+        for key, (instance_date, matched) in wanted.items():
+            attendance = existing.get(key)
+            if attendance is None:
+                new_attendances.append({
+                    "meeting_id": key[0],
+                    "user_id": user_id,
+                    "instance_date": instance_date,
+                    "status": AttendanceStatus.PENDING
+                })
+                status = AttendanceStatus.PENDING.value
+            else:
+                status = attendance.status.value if hasattr(attendance.status, 'value') else str(attendance.status)
+            for instance in matched:
+                instance["attendance"] = status
+        
+        await self._create_pending_attendances(user_id, new_attendances)
+    
+    async def _create_pending_attendances(self, user_id: int, new_attendances: List[dict]) -> None:
+        """开启 ATTENDANCE_PENDING_ROWS_ON_READ 时为未答复的实例写入待确认记录（一次提交）"""
+        if not new_attendances or not settings.ATTENDANCE_PENDING_ROWS_ON_READ:
+            return
+        try:
+            # 单条 INSERT（executemany）+ 一次提交
+            await self.db.execute(insert(MeetingAttendance), new_attendances)
+            await self.db.commit()
+        except Exception as e:
+            logger.error("创建出席记录失败: %s", e, exc_info=True)
+            await self.db.rollback()
+            return
+        logger.info("批量创建出席记录: 用户 %s, 共 %s 条", user_id, len(new_attendances))
     
-    def generate_recurring_instances(
+    @staticmethod
+    def _strip_tz(value: Optional[datetime]) -> Optional[datetime]:
+        """移除时区信息（如果有）"""
+        if value and value.tzinfo:
+            return value.replace(tzinfo=None)
+        return value
+    
+    @staticmethod
+    def _instance_window(
+        base_date: datetime,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> Tuple[datetime, datetime]:
+        """确定展开范围：未指定时默认会议日期前后各1个月"""
+        return (
+            start_date or base_date - timedelta(days=30),
+            end_date or base_date + timedelta(days=30)
+        )
+    
+    async def generate_recurring_instances(
         self,
         meeting: Meeting,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        current_user_id: Optional[int] = None
+        current_user_id: Optional[int] = None,
+        max_instances: Optional[int] = None
     ) -> List[dict]:
         """
         为重复会议生成所有实例
@@ -251,150 +494,224 @@ class MeetingService:
             meeting: 会议对象
             start_date: 开始日期（可选，用于过滤生成的实例）
             end_date: 结束日期（可选，用于过滤生成的实例）
+            max_instances: 最多生成的实例数（可选，按时间顺序截取）
         
         Returns:
             重复实例列表，每个实例是一个字典，包含会议的所有字段和新的 meeting_date
         """
-        instances = []
-        
         # 如果不是重复会议，返回原会议
         if not meeting.is_recurring or not meeting.recurring_pattern:
-            # 获取当前用户的出席状态（如果有），不存在则自动创建
-            attendance_status = "pending"  # 默认状态
+            meeting_dict = meeting_to_dict(meeting, with_attendance=True)
+            # 获取当前用户的出席状态（如果有）
             if current_user_id:
-                attendance = self.get_attendance(meeting.id, current_user_id)
-                if not attendance:
-                    # 如果不存在出席记录，自动创建一条（状态为待确认）
-                    attendance = self.create_attendance(meeting.id, current_user_id)
-                attendance_status = attendance.status.value if hasattr(attendance.status, 'value') else str(attendance.status)
-            
-            meeting_dict = {
-                "id": meeting.id,
-                "title": meeting.title,
-                "description": meeting.description,
-                "type": meeting.type.value if hasattr(meeting.type, 'value') else str(meeting.type),
-                "meeting_date": meeting.meeting_date.isoformat() if meeting.meeting_date else None,
-                "duration": meeting.duration,
-                "is_recurring": meeting.is_recurring,
-                "recurring_pattern": meeting.recurring_pattern,
-                "created_by_id": meeting.created_by_id,
-                "created_at": meeting.created_at.isoformat() if meeting.created_at else None,
-                "updated_at": meeting.updated_at.isoformat() if meeting.updated_at else None,
-                "meetingId": meeting.id,  # 前端需要的字段
-                "attendance": attendance_status  # 出席状态
-            }
+                await self.attach_attendance_status([meeting_dict], current_user_id)
             return [meeting_dict]
         
         # 确保 base_date 是 datetime 对象且没有时区信息
-        base_date = meeting.meeting_date
+        base_date = meeting_occurrences.occurrence_time(meeting.meeting_date)
         if not base_date:
-            logger.warning(f"会议 {meeting.id} 没有设置日期")
+            logger.warning("会议 %s 没有设置日期", meeting.id)
             return []
         
-        # 移除时区信息（如果有）
-        if base_date.tzinfo:
-            base_date = base_date.replace(tzinfo=None)
+        start_date, end_date = self._instance_window(
+            base_date, self._strip_tz(start_date), self._strip_tz(end_date)
+        )
+        instance_logger.debug("生成重复实例: 会议日期=%s, 范围=%s 到 %s", base_date, start_date, end_date)
         
-        # 确定日期范围
-        if not start_date:
-            # 默认从会议日期开始，向前扩展1个月
-            start_date = base_date - timedelta(days=30)
+        # 解析重复规则（daily/weekly/biweekly/monthly 或 RRULE）
+        instances = []
+        rule = parse_recurrence(meeting.recurring_pattern)
+        if rule is None:
+            logger.warning("会议 %s 的重复模式无法识别: %s", meeting.id, meeting.recurring_pattern)
         else:
-            # 移除时区信息
-            if start_date.tzinfo:
-                start_date = start_date.replace(tzinfo=None)
+            # 直接定位到 start_date 之后的第一个实例，只遍历窗口内的实例
+            occurrences = rule.occurrences(base_date, start=start_date, end=end_date)
+            instances = [
+                meeting_instance_to_dict(meeting, occurrence)
+                for occurrence in islice(occurrences, max_instances)
+            ]
+            instance_logger.debug("重复会议 %s 生成了 %s 个实例", meeting.id, len(instances))
+            
+            # 获取当前用户的出席状态（如果有）
+            # 对于重复会议，使用实例日期来区分不同的实例
+            if current_user_id:
+                await self.attach_attendance_status(instances, current_user_id)
         
-        if not end_date:
-            # 默认向后扩展1个月
-            end_date = base_date + timedelta(days=30)
-        else:
-            # 移除时区信息
-            if end_date.tzinfo:
-                end_date = end_date.replace(tzinfo=None)
+        # 如果没有生成任何实例，返回原会议
+        if not instances:
+            return [meeting_to_dict(meeting)]
         
-        # 设置最大日期限制：最多生成到未来1年
-        max_end_date = base_date + timedelta(days=365)
-        if end_date > max_end_date:
-            end_date = max_end_date
-            logger.debug(f"限制日期范围：end_date超过1年，已调整为: {end_date}")
+        return instances
+    
+    @staticmethod
+    def _occurrence_stream(
+        meeting: Meeting,
+        rule: RecurrenceRule,
+        base_date: datetime,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Iterator[Tuple[datetime, Meeting, bool]]:
+        """按时间顺序惰性产出重复会议在窗口内的实例：(实例时间, 会议, 是否为实例)"""
+        for occurrence in rule.occurrences(base_date, start=start_date, end=end_date):
+            yield occurrence, meeting, True
+    
+    async def _paginate_instances(
+        self,
+        conditions: list,
+        skip: int,
+        limit: int,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        with_attendance: bool,
+        attendance_user_id: Optional[int] = None
+    ) -> List[dict]:
+        """
+        按时间顺序分页获取会议实例
         
-        logger.debug(f"生成重复实例: 会议日期={base_date}, 范围={start_date} 到 {end_date}")
+        非重复会议在数据库中完成日期过滤、排序和截取；重复会议只在窗口内惰性展开。
+        各个有序序列通过堆归并，取到 skip+limit 个实例后即停止生成。
         
-        # 处理双周例会 (biweekly)
-        if meeting.recurring_pattern == 'biweekly':
-            current_date = base_date
-            
-            # 从原会议日期开始，每次增加14天
-            # 限制：最多生成50个实例，避免无限生成
-            instance_count = 0
-            max_instances = 50
-            while current_date <= end_date and instance_count < max_instances:
-                # 如果日期在范围内，添加到实例列表
-                if current_date >= start_date:
-                    instance_date_str = current_date.strftime('%Y-%m-%d')
-                    
-                    # 获取当前用户的出席状态（如果有），不存在则自动创建
-                    # 对于重复会议，使用实例日期来区分不同的实例
-                    attendance_status = "pending"  # 默认状态
-                    if current_user_id:
-                        # 传入实例日期，查找该实例的出席记录
-                        attendance = self.get_attendance(meeting.id, current_user_id, current_date)
-                        if not attendance:
-                            # 如果不存在出席记录，自动创建一条（状态为待确认）
-                            attendance = self.create_attendance(meeting.id, current_user_id, current_date)
-                        attendance_status = attendance.status.value if hasattr(attendance.status, 'value') else str(attendance.status)
-                    
-                    instances.append({
-                        "id": f"{meeting.id}_{instance_date_str}",  # 组合ID，前端使用
-                        "meetingId": meeting.id,  # 原始会议ID
-                        "title": meeting.title,
-                        "description": meeting.description,
-                        "type": meeting.type.value if hasattr(meeting.type, 'value') else str(meeting.type),
-                        "meeting_date": current_date.isoformat(),
-                        "date": current_date.isoformat(),  # 前端可能需要的字段
-                        "duration": meeting.duration,
-                        "is_recurring": True,
-                        "recurring_pattern": meeting.recurring_pattern,
-                        "created_by_id": meeting.created_by_id,
-                        "created_at": meeting.created_at.isoformat() if meeting.created_at else None,
-                        "updated_at": meeting.updated_at.isoformat() if meeting.updated_at else None,
-                        "isRecurring": True,  # 前端标记
-                        "attendance": attendance_status  # 出席状态
-                    })
-                    instance_count += 1
-                # 增加两周（14天）
-                current_date = current_date + timedelta(days=14)
+        Args:
+            conditions: 会议的额外过滤条件
+            with_attendance: 非重复会议是否包含默认出席状态
+            attendance_user_id: 填充该用户在各实例上的出席状态（可选）
+        """
+        start_date = self._strip_tz(start_date)
+        end_date = self._strip_tz(end_date)
+        page_end = skip + limit
+        
+        # 范围在已物化的实例内：日期过滤、排序和分页都在数据库中完成
+        if start_date and meeting_occurrences.covers(end_date):
+            query = (
+                select(MeetingOccurrence.occurrence_date, MeetingOccurrence.is_instance, Meeting)
+                .join(Meeting, Meeting.id == MeetingOccurrence.meeting_id)
+                .filter(
+                    *conditions,
+                    MeetingOccurrence.occurrence_date >= start_date,
+                    MeetingOccurrence.occurrence_date <= end_date
+                )
+                .order_by(MeetingOccurrence.occurrence_date.asc(), MeetingOccurrence.meeting_id.asc())
+                .offset(skip)
+                .limit(limit)
+            )
+            if attendance_user_id is not None:
+                query = self._join_attendance(query, attendance_user_id)
+            result = await self.db.execute(query)
             
-            logger.debug(f"双周例会生成了 {instance_count} 个实例")
+            instances = []
+            missing = []
+            for occurrence, is_instance, meeting, *attendance in result.all():
+                if is_instance:
+                    instance = meeting_instance_to_dict(meeting, occurrence)
+                else:
+                    instance = meeting_to_dict(meeting, with_attendance=with_attendance)
+                if attendance_user_id is not None and "attendance" in instance:
+                    if attendance[0] is not None:
+                        instance["attendance"] = attendance[0].value
+                    else:
+                        # 没有记录按“待确认”计算
+                        missing.append({
+                            "meeting_id": meeting.id,
+                            "user_id": attendance_user_id,
+                            "instance_date": occurrence if is_instance else None,
+                            "status": AttendanceStatus.PENDING
+                        })
+                instances.append(instance)
+            logger.info("从会议实例表返回 %s 个实例，日期范围: %s 到 %s", len(instances), start_date, end_date)
+            if attendance_user_id is not None:
+                await self._create_pending_attendances(attendance_user_id, missing)
+            return instances
+        
+        # 非重复会议：最多需要前 skip+limit 条
+        one_off_query = select(Meeting).filter(
+            *conditions,
+            or_(Meeting.is_recurring == False, Meeting.is_recurring.is_(None)),
+            Meeting.meeting_date.isnot(None)
+        )
+        if start_date:
+            one_off_query = one_off_query.filter(Meeting.meeting_date >= start_date)
+        if end_date:
+            one_off_query = one_off_query.filter(Meeting.meeting_date <= end_date)
+        result = await self.db.execute(
+            one_off_query.order_by(Meeting.meeting_date.asc(), Meeting.id.asc()).limit(page_end)
+        )
+        one_off_meetings = result.scalars().all()
         
-        # 可以在这里添加其他重复模式，如 weekly, monthly 等
-        # elif meeting.recurring_pattern == 'weekly':
-        #     ...
-        # elif meeting.recurring_pattern == 'monthly':
-        #     ...
+        # 重复会议：在窗口结束之后才开始的会议不会产生实例
+        recurring_query = select(Meeting).filter(
+            *conditions,
+            Meeting.is_recurring == True,
+            Meeting.meeting_date.isnot(None)
+        )
+        if end_date:
+            recurring_query = recurring_query.filter(Meeting.meeting_date <= end_date)
+        result = await self.db.execute(recurring_query.order_by(Meeting.id.asc()))
+        recurring_meetings = result.scalars().all()
         
-        # 如果没有生成任何实例，返回原会议
-        if not instances:
-            meeting_dict = {
-                "id": meeting.id,
-                "meetingId": meeting.id,
-                "title": meeting.title,
-                "description": meeting.description,
-                "type": meeting.type.value if hasattr(meeting.type, 'value') else str(meeting.type),
-                "meeting_date": meeting.meeting_date.isoformat() if meeting.meeting_date else None,
-                "date": meeting.meeting_date.isoformat() if meeting.meeting_date else None,
-                "duration": meeting.duration,
-                "is_recurring": meeting.is_recurring,
-                "recurring_pattern": meeting.recurring_pattern,
-                "created_by_id": meeting.created_by_id,
-                "created_at": meeting.created_at.isoformat() if meeting.created_at else None,
-                "updated_at": meeting.updated_at.isoformat() if meeting.updated_at else None
-            }
-            return [meeting_dict]
+        logger.info(
+            "获取会议: 非重复 %s 个, 重复 %s 个，日期范围: %s 到 %s",
+            len(one_off_meetings), len(recurring_meetings), start_date, end_date
+        )
+        
+        streams = [
+            [
+                (meeting_occurrences.occurrence_time(meeting.meeting_date), meeting, False)
+                for meeting in one_off_meetings
+            ]
+        ]
+        for meeting in recurring_meetings:
+            base_date = meeting_occurrences.occurrence_time(meeting.meeting_date)
+            rule = parse_recurrence(meeting.recurring_pattern)
+            if rule is None:
+                # 无法识别的重复模式按单次会议处理
+                logger.warning("会议 %s 的重复模式无法识别: %s", meeting.id, meeting.recurring_pattern)
+                if (not start_date or base_date >= start_date) and (not end_date or base_date <= end_date):
+                    streams.append([(base_date, meeting, False)])
+                continue
+            window_start, window_end = self._instance_window(base_date, start_date, end_date)
+            streams.append(self._occurrence_stream(meeting, rule, base_date, window_start, window_end))
+        
+        # 堆归并各有序序列，只生成到当前页为止
+        merged = heapq.merge(*streams, key=lambda item: item[0])
+        instances = []
+        for occurrence, meeting, is_instance in islice(merged, skip, page_end):
+            if is_instance:
+                instances.append(meeting_instance_to_dict(meeting, occurrence))
+            else:
+                instances.append(meeting_to_dict(meeting, with_attendance=with_attendance))
         
+        logger.info("应用分页后返回 %s 个实例", len(instances))
+        if attendance_user_id is not None:
+            await self.attach_attendance_status(instances, attendance_user_id)
         return instances
     
-    def get_meetings_with_instances(
+    @staticmethod
+    def _join_attendance(query, user_id: int):
+        """
+        实例查询左外连接用户的出席记录，增加出席状态列（没有记录时为 NULL）
+        
+        重复会议的实例按日期匹配出席记录的实例日期，非重复会议匹配没有实例日期的记录；
+        每个用户在每个实例上只有一条记录（update_attendance 先查找再写入）。
+        """
+        return query.add_columns(MeetingAttendance.status).outerjoin(
+            MeetingAttendance,
+            and_(
+                MeetingAttendance.meeting_id == MeetingOccurrence.meeting_id,
+                MeetingAttendance.user_id == user_id,
+                or_(
+                    and_(
+                        MeetingOccurrence.is_instance == False,
+                        MeetingAttendance.instance_date.is_(None)
+                    ),
+                    and_(
+                        MeetingOccurrence.is_instance == True,
+                        func.date(MeetingAttendance.instance_date) == func.date(MeetingOccurrence.occurrence_date)
+                    )
+                )
+            )
+        )
+    
+    async def get_meetings_with_instances(
         self,
         skip: int = 0,
         limit: int = 100,
@@ -409,106 +726,21 @@ class MeetingService:
         Returns:
             会议实例列表（字典格式）
         """
-        # 处理时区问题：如果传入的日期有时区信息，转换为本地时间
-        if start_date and start_date.tzinfo:
-            start_date = start_date.replace(tzinfo=None)
-        if end_date and end_date.tzinfo:
-            end_date = end_date.replace(tzinfo=None)
+        conditions = []
+        if meeting_type:
+            conditions.append(Meeting.type == meeting_type)
         
-        # 首先获取所有会议（对于重复会议，需要获取原始会议，不受日期限制）
         try:
-            query = self.db.query(Meeting)
-            
-            if meeting_type:
-                query = query.filter(Meeting.type == meeting_type)
-            
-            # 获取所有重复会议和指定日期范围内的非重复会议
-            # 对于重复会议，不进行日期过滤，因为我们会在生成实例时处理
-            all_meetings = query.order_by(Meeting.meeting_date.asc()).all()
-            
-            logger.info(f"获取所有会议: 共 {len(all_meetings)} 个，日期范围: {start_date} 到 {end_date}")
+            # 同时取出当前用户在本页实例上的出席状态
+            return await self._paginate_instances(
+                conditions, skip, limit, start_date, end_date, with_attendance=True,
+                attendance_user_id=current_user_id
+            )
         except Exception as e:
-            logger.error(f"查询会议失败: {str(e)}", exc_info=True)
+            logger.error("查询会议失败: %s", e, exc_info=True)
             return []
-        
-        # 生成所有实例
-        all_instances = []
-        try:
-            for meeting in all_meetings:
-                try:
-                    logger.debug(f"处理会议 {meeting.id}: {meeting.title}, 重复: {meeting.is_recurring}, 日期: {meeting.meeting_date}")
-                    if meeting.is_recurring:
-                        # 对于重复会议，生成实例
-                        logger.debug(f"生成重复会议实例: {meeting.id} - {meeting.title}, 模式: {meeting.recurring_pattern}")
-                        instances = self.generate_recurring_instances(
-                            meeting,
-                            start_date=start_date,
-                            end_date=end_date,
-                            current_user_id=current_user_id
-                        )
-                        logger.debug(f"生成了 {len(instances)} 个实例")
-                        all_instances.extend(instances)
-                    else:
-                        # 对于非重复会议，只返回在日期范围内的
-                        meeting_date = meeting.meeting_date
-                        if meeting_date:
-                            # 移除时区信息（如果有）
-                            if meeting_date.tzinfo:
-                                meeting_date = meeting_date.replace(tzinfo=None)
-                            
-                            include = True
-                            if start_date and meeting_date < start_date:
-                                include = False
-                            if end_date and meeting_date > end_date:
-                                include = False
-                            
-                            if include:
-                                # 获取当前用户的出席状态（如果有），不存在则自动创建
-                                attendance_status = "pending"  # 默认状态
-                                if current_user_id:
-                                    attendance = self.get_attendance(meeting.id, current_user_id)
-                                    if not attendance:
-                                        # 如果不存在出席记录，自动创建一条（状态为待确认）
-                                        attendance = self.create_attendance(meeting.id, current_user_id)
-                                    attendance_status = attendance.status.value if hasattr(attendance.status, 'value') else str(attendance.status)
-                                
-                                meeting_dict = {
-                                    "id": meeting.id,
-                                    "meetingId": meeting.id,
-                                    "title": meeting.title,
-                                    "description": meeting.description,
-                                    "type": meeting.type.value if hasattr(meeting.type, 'value') else str(meeting.type),
-                                    "meeting_date": meeting.meeting_date.isoformat() if meeting.meeting_date else None,
-                                    "date": meeting.meeting_date.isoformat() if meeting.meeting_date else None,
-                                    "duration": meeting.duration,
-                                    "is_recurring": meeting.is_recurring,
-                                    "recurring_pattern": meeting.recurring_pattern,
-                                    "created_by_id": meeting.created_by_id,
-                                    "created_at": meeting.created_at.isoformat() if meeting.created_at else None,
-                                    "updated_at": meeting.updated_at.isoformat() if meeting.updated_at else None,
-                                    "attendance": attendance_status  # 出席状态
-                                }
-                                all_instances.append(meeting_dict)
-                                logger.debug(f"添加非重复会议: {meeting.id} - {meeting.title}")
-                except Exception as e:
-                    logger.error(f"处理会议 {meeting.id} 时出错: {str(e)}", exc_info=True)
-                    # 继续处理下一个会议，不中断整个流程
-                    continue
-        except Exception as e:
-            logger.error(f"生成会议实例时出错: {str(e)}", exc_info=True)
-        
-        logger.info(f"共生成 {len(all_instances)} 个会议实例")
-        
-        # 按日期排序
-        all_instances.sort(key=lambda x: x.get('meeting_date') or '')
-        
-        # 应用分页
-        result = all_instances[skip:skip + limit]
-        logger.info(f"应用分页后返回 {len(result)} 个实例")
-        
-        return result
     
-    def get_user_meetings_with_instances(
+    async def get_user_meetings_with_instances(
         self,
         user_id: int,
         skip: int = 0,
@@ -522,102 +754,18 @@ class MeetingService:
         Returns:
             会议实例列表（字典格式）
         """
-        # 处理时区问题：如果传入的日期有时区信息，转换为本地时间
-        if start_date and start_date.tzinfo:
-            start_date = start_date.replace(tzinfo=None)
-        if end_date and end_date.tzinfo:
-            end_date = end_date.replace(tzinfo=None)
-        
-        # 获取用户创建的会议
-        created_meetings_query = self.db.query(Meeting).filter(
-            Meeting.created_by_id == user_id
+        # 用户创建的会议，以及通过出席记录需要参加的会议
+        attended_meeting_ids = select(MeetingAttendance.meeting_id).filter(
+            MeetingAttendance.user_id == user_id
+        )
+        conditions = [
+            or_(
+                Meeting.created_by_id == user_id,
+                Meeting.id.in_(attended_meeting_ids)
+            )
+        ]
+        
+        logger.info("获取用户 %s 的会议，日期范围: %s 到 %s", user_id, start_date, end_date)
+        return await self._paginate_instances(
+            conditions, skip, limit, start_date, end_date, with_attendance=False
         )
-        created_meetings = created_meetings_query.all()
-        
-        # 获取用户需要参加的会议（通过出席记录）
-        attendance_meetings_query = self.db.query(Meeting).join(
-            MeetingAttendance
-        ).filter(MeetingAttendance.user_id == user_id)
-        attendance_meetings = attendance_meetings_query.all()
-        
-        logger.info(f"获取用户 {user_id} 的会议: 创建的 {len(created_meetings)} 个, 参加的 {len(attendance_meetings)} 个")
-        
-        # 合并并去重（使用set保存ID）
-        all_meeting_ids = set()
-        all_meetings = []
-        
-        for meeting in created_meetings:
-            if meeting.id not in all_meeting_ids:
-                all_meeting_ids.add(meeting.id)
-                all_meetings.append(meeting)
-                logger.debug(f"找到创建的会议: {meeting.id} - {meeting.title}, 重复: {meeting.is_recurring}, 日期: {meeting.meeting_date}")
-        
-        for meeting in attendance_meetings:
-            if meeting.id not in all_meeting_ids:
-                all_meeting_ids.add(meeting.id)
-                all_meetings.append(meeting)
-                logger.debug(f"找到参加的会议: {meeting.id} - {meeting.title}, 重复: {meeting.is_recurring}, 日期: {meeting.meeting_date}")
-        
-        logger.info(f"合并后共 {len(all_meetings)} 个唯一会议")
-        logger.info(f"日期范围: {start_date} 到 {end_date}")
-        
-        # 按日期排序
-        all_meetings.sort(key=lambda m: m.meeting_date or datetime.min)
-        
-        # 生成所有实例
-        all_instances = []
-        for meeting in all_meetings:
-            if meeting.is_recurring:
-                # 对于重复会议，生成实例
-                logger.debug(f"处理重复会议 {meeting.id}: {meeting.title}, 模式: {meeting.recurring_pattern}")
-                instances = self.generate_recurring_instances(
-                    meeting,
-                    start_date=start_date,
-                    end_date=end_date
-                )
-                logger.debug(f"生成 {len(instances)} 个实例")
-                all_instances.extend(instances)
-            else:
-                # 对于非重复会议，只返回在日期范围内的
-                meeting_date = meeting.meeting_date
-                if meeting_date:
-                    # 移除时区信息（如果有）
-                    if meeting_date.tzinfo:
-                        meeting_date = meeting_date.replace(tzinfo=None)
-                    
-                    include = True
-                    if start_date and meeting_date < start_date:
-                        include = False
-                    if end_date and meeting_date > end_date:
-                        include = False
-                    
-                    if include:
-                        meeting_dict = {
-                            "id": meeting.id,
-                            "meetingId": meeting.id,
-                            "title": meeting.title,
-                            "description": meeting.description,
-                            "type": meeting.type.value if hasattr(meeting.type, 'value') else str(meeting.type),
-                            "meeting_date": meeting.meeting_date.isoformat() if meeting.meeting_date else None,
-                            "date": meeting.meeting_date.isoformat() if meeting.meeting_date else None,
-                            "duration": meeting.duration,
-                            "is_recurring": meeting.is_recurring,
-                            "recurring_pattern": meeting.recurring_pattern,
-                            "created_by_id": meeting.created_by_id,
-                            "created_at": meeting.created_at.isoformat() if meeting.created_at else None,
-                            "updated_at": meeting.updated_at.isoformat() if meeting.updated_at else None
-                        }
-                        all_instances.append(meeting_dict)
-                        logger.debug(f"添加非重复会议: {meeting.id} - {meeting.title}")
-        
-        logger.info(f"共生成 {len(all_instances)} 个会议实例")
-        
-        # 按日期排序
-        all_instances.sort(key=lambda x: x.get('meeting_date') or '')
-        
-        # 应用分页
-        result = all_instances[skip:skip + limit]
-        logger.info(f"应用分页后返回 {len(result)} 个实例")
-        
-        return result
-
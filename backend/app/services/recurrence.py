@@ -0,0 +1,147 @@
+"""
+重复规则解析与展开
+
+支持简写模式（daily / weekly / biweekly / monthly）和 RRULE 子集：
+FREQ=DAILY|WEEKLY|MONTHLY;INTERVAL=n;COUNT=n;UNTIL=YYYYMMDD[THHMMSS]
+"""
+
+from calendar import monthrange
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Iterator, Optional
+
+# 简写模式 -> (频率, 间隔)
+PATTERN_ALIASES = {
+    "daily": ("DAILY", 1),
+    "weekly": ("WEEKLY", 1),
+    "biweekly": ("WEEKLY", 2),
+    "monthly": ("MONTHLY", 1),
+}
+
+# 固定步长的频率
+FIXED_STEPS = {
+    "DAILY": timedelta(days=1),
+    "WEEKLY": timedelta(weeks=1),
+}
+
+SUPPORTED_FREQS = ("DAILY", "WEEKLY", "MONTHLY")
+
+
+def add_months(dt: datetime, months: int) -> datetime:
+    """增加月份（目标月份没有该日期时取当月最后一天）"""
+    year, month = divmod(dt.month - 1 + months, 12)
+    year += dt.year
+    month += 1
+    day = min(dt.day, monthrange(year, month)[1])
+    return dt.replace(year=year, month=month, day=day)
+
+
+class RecurrenceRule:
+    """重复规则"""
+
+    def __init__(
+        self,
+        freq: str,
+        interval: int = 1,
+        count: Optional[int] = None,
+        until: Optional[datetime] = None
+    ):
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+
+    def nth(self, dtstart: datetime, index: int) -> datetime:
+        """第 index 个实例的时间（从 0 开始）"""
+        if self.freq == "MONTHLY":
+            return add_months(dtstart, index * self.interval)
+        return dtstart + FIXED_STEPS[self.freq] * (index * self.interval)
+
+    def first_index_from(self, dtstart: datetime, start: datetime) -> int:
+        """直接计算第一个不早于 start 的实例序号，不逐个迭代"""
+        if start <= dtstart:
+            return 0
+
+        if self.freq == "MONTHLY":
+            months = (start.year - dtstart.year) * 12 + (start.month - dtstart.month)
+            # 从一定早于 start 的序号开始，最多向后修正两步
+            index = max(0, months // self.interval - 1)
+            while self.nth(dtstart, index) < start:
+                index += 1
+            return index
+
+        step = FIXED_STEPS[self.freq] * self.interval
+        # 向上取整：ceil((start - dtstart) / step)
+        return -((dtstart - start) // step)
+
+    def occurrences(
+        self,
+        dtstart: datetime,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Iterator[datetime]:
+        """
+        按时间顺序惰性生成 [start, end] 内的实例
+
+        没有 end、COUNT、UNTIL 时生成器是无限的，由调用方决定何时停止。
+        """
+        index = self.first_index_from(dtstart, start) if start else 0
+        while self.count is None or index < self.count:
+            occurrence = self.nth(dtstart, index)
+            if self.until is not None and occurrence > self.until:
+                return
+            if end is not None and occurrence > end:
+                return
+            yield occurrence
+            index += 1
+
+
+def _parse_until(value: str) -> datetime:
+    """解析 UNTIL（YYYYMMDD 或 YYYYMMDDTHHMMSS，忽略结尾的 Z）"""
+    value = value.rstrip("Z")
+    if "T" in value:
+        return datetime.strptime(value, "%Y%m%dT%H%M%S")
+    # 只有日期时包含当天全天
+    return datetime.strptime(value, "%Y%m%d").replace(hour=23, minute=59, second=59)
+
+
+@lru_cache(maxsize=256)
+def parse_recurrence(pattern: Optional[str]) -> Optional[RecurrenceRule]:
+    """解析重复模式，无法识别或包含不支持的字段时返回 None"""
+    if not pattern:
+        return None
+
+    pattern = pattern.strip()
+    alias = PATTERN_ALIASES.get(pattern.lower())
+    if alias:
+        return RecurrenceRule(freq=alias[0], interval=alias[1])
+
+    text = pattern.upper()
+    if text.startswith("RRULE:"):
+        text = text[len("RRULE:"):]
+
+    params = {}
+    for part in text.split(";"):
+        if not part:
+            continue
+        key, sep, value = part.partition("=")
+        if not sep:
+            return None
+        params[key.strip()] = value.strip()
+
+    freq = params.pop("FREQ", None)
+    if freq not in SUPPORTED_FREQS:
+        return None
+
+    try:
+        interval = int(params.pop("INTERVAL", "1"))
+        count = int(params.pop("COUNT")) if "COUNT" in params else None
+        until = _parse_until(params.pop("UNTIL")) if "UNTIL" in params else None
+    except ValueError:
+        return None
+
+    # BYDAY 等字段暂不支持，避免生成错误的实例
+    if params or interval < 1 or (count is not None and count < 1):
+        return None
+
+    return RecurrenceRule(freq=freq, interval=interval, count=count, until=until)
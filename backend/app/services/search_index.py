@@ -0,0 +1,148 @@
+"""
+全文搜索索引
+
+文本在写入时由应用切分为词元：中文按单字和相邻二元组（n-gram），英文和数字按单词，
+以空格连接后存入索引表。查询使用同样的规则切分，因此中文检索不依赖数据库自带的分词器。
+
+- SQLite：FTS5 虚拟表（rowid 即记录ID），按 bm25 相关度排序
+- PostgreSQL：tsvector（simple 配置）+ GIN 索引，按 ts_rank 相关度排序
+- 其他数据库：不建立索引，由调用方回退到 LIKE 查询
+
+索引表由迁移 0006 创建并回填（迁移中保留了一份同样的切分规则，修改切分规则时需要新的迁移重建索引）。
+"""
+
+from sqlalchemy import text  # pyright: ignore[reportMissingImports]
+from sqlalchemy.ext.asyncio import AsyncSession  # pyright: ignore[reportMissingImports]
+from typing import Iterable, List, Optional, Sequence, TypeVar
+import re
+
+from app.core.database import engine
+
+T = TypeVar("T")
+
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+# 连续的中文字符，或连续的其他字母数字（不含中文和下划线）
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+DIALECT = engine.dialect.name
+
+
+def _cjk_ngrams(run: str, with_unigrams: bool) -> List[str]:
+    """中文片段切分为二元组（可同时包含单字）"""
+    if len(run) == 1:
+        return [run]
+    bigrams = [run[i:i + 2] for i in range(len(run) - 1)]
+    return list(run) + bigrams if with_unigrams else bigrams
+
+
+def tokenize_document(*texts: Optional[str]) -> str:
+    """切分待索引的文本：中文保留单字和二元组，支持单字和多字查询"""
+    tokens = []
+    for value in texts:
+        if not value:
+            continue
+        for run in _TOKEN_RE.findall(value.lower()):
+            if _CJK_RE.match(run):
+                tokens.extend(_cjk_ngrams(run, with_unigrams=True))
+            else:
+                tokens.append(run)
+    return " ".join(tokens)
+
+
+def tokenize_query(query: str) -> List[tuple]:
+    """
+    切分查询文本
+
+    Returns:
+        (词元, 是否前缀匹配) 列表；中文多字查询只使用二元组，英文单词按前缀匹配
+    """
+    terms = []
+    for run in _TOKEN_RE.findall(query.lower()):
+        if _CJK_RE.match(run):
+            terms.extend((token, False) for token in _cjk_ngrams(run, with_unigrams=False))
+        else:
+            terms.append((run, True))
+    return terms
+
+
+def order_by_ids(items: Iterable[T], ids: Sequence[int]) -> List[T]:
+    """按搜索结果的ID顺序（相关度）排列对象"""
+    by_id = {item.id: item for item in items}
+    return [by_id[item_id] for item_id in ids if item_id in by_id]
+
+
+class SearchIndex:
+    """单个数据表的全文索引"""
+
+    def __init__(self, table: str, source_table: str, fields: Sequence[str]):
+        self.table = table
+        self.source_table = source_table
+        self.fields = tuple(fields)
+
+    @property
+    def enabled(self) -> bool:
+        return DIALECT in ("sqlite", "postgresql")
+
+    def _insert_sql(self) -> str:
+        if DIALECT == "sqlite":
+            return f"INSERT INTO {self.table} (rowid, tokens) VALUES (:id, :tokens)"
+        return (
+            f"INSERT INTO {self.table} (id, tokens) VALUES (:id, to_tsvector('simple', :tokens)) "
+            f"ON CONFLICT (id) DO UPDATE SET tokens = EXCLUDED.tokens"
+        )
+
+    async def upsert(self, db: AsyncSession, obj) -> None:
+        """写入或更新记录的索引（与业务数据在同一事务中提交）"""
+        if not self.enabled:
+            return
+
+        tokens = tokenize_document(*(getattr(obj, field) for field in self.fields))
+        if DIALECT == "sqlite":
+            # FTS5 不支持 ON CONFLICT，先删除再插入
+            await db.execute(text(f"DELETE FROM {self.table} WHERE rowid = :id"), {"id": obj.id})
+        await db.execute(text(self._insert_sql()), {"id": obj.id, "tokens": tokens})
+
+    async def remove(self, db: AsyncSession, obj_id: int) -> None:
+        """删除记录的索引"""
+        if not self.enabled:
+            return
+
+        id_column = "rowid" if DIALECT == "sqlite" else "id"
+        await db.execute(text(f"DELETE FROM {self.table} WHERE {id_column} = :id"), {"id": obj_id})
+
+    async def search(self, db: AsyncSession, query: str, skip: int = 0, limit: int = 100) -> Optional[List[int]]:
+        """
+        按相关度搜索
+
+        Returns:
+            按相关度排序的记录ID列表；当前数据库不支持全文索引时返回 None
+        """
+        if not self.enabled:
+            return None
+
+        terms = tokenize_query(query)
+        if not terms:
+            return []
+
+        params = {"skip": skip, "limit": limit}
+        if DIALECT == "sqlite":
+            params["query"] = " ".join(f'"{token}"*' if prefix else f'"{token}"' for token, prefix in terms)
+            sql = (
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH :query "
+                f"ORDER BY rank, rowid LIMIT :limit OFFSET :skip"
+            )
+        else:
+            params["query"] = " & ".join(f"{token}:*" if prefix else token for token, prefix in terms)
+            sql = (
+                f"SELECT id FROM {self.table}, to_tsquery('simple', :query) AS query "
+                f"WHERE tokens @@ query ORDER BY ts_rank(tokens, query) DESC, id "
+                f"LIMIT :limit OFFSET :skip"
+            )
+        result = await db.execute(text(sql), params)
+        return [row[0] for row in result]
+
+
+task_search_index = SearchIndex("tasks_fts", "tasks", ("title", "description"))
+meeting_search_index = SearchIndex("meetings_fts", "meetings", ("title", "description"))
+user_search_index = SearchIndex("users_fts", "users", ("username", "name", "email"))
@@ -2,56 +2,94 @@
 任务服务
 """
 
-from sqlalchemy.orm import Session  # pyright: ignore[reportMissingImports]
-from sqlalchemy import and_, or_, func  # pyright: ignore[reportMissingImports]
+from sqlalchemy.ext.asyncio import AsyncSession  # pyright: ignore[reportMissingImports]
+from sqlalchemy import Select, select, insert, update, delete, and_, or_, case, literal, func  # pyright: ignore[reportMissingImports]
+from sqlalchemy.exc import IntegrityError  # pyright: ignore[reportMissingImports]
+from sqlalchemy.orm import selectinload  # pyright: ignore[reportMissingImports]
 from typing import Optional, List
 import logging
 import json
 
 from app.models import Task, TaskAcceptance, TaskType, TaskStatus, User
-from app.schemas import TaskCreate, TaskUpdate, TaskAcceptanceCreate
+from app.schemas import TaskCreate, TaskUpdate
+from app.services.collection_versions import TASKS, bump_version
+from app.services.search_index import task_search_index, order_by_ids
 
 logger = logging.getLogger(__name__)
 
+# 列表接口需要发布者姓名：批量预加载（每页一次 IN 查询），只取姓名不加载头像
+load_publisher = selectinload(Task.publisher).load_only(User.name)
+
 
 class TaskService:
     """任务服务类"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def get_task_by_id(self, task_id: int) -> Optional[Task]:
+    async def get_task_by_id(self, task_id: int) -> Optional[Task]:
         """根据ID获取任务"""
-        return self.db.query(Task).filter(Task.id == task_id).first()
+        result = await self.db.execute(select(Task).filter(Task.id == task_id))
+        return result.scalars().first()
+    
+    @staticmethod
+    def _paginate(query: Select, id_column, skip: int, limit: int, after_id: Optional[int]) -> Select:
+        """按ID升序分页：有游标时从游标之后开始（keyset），否则使用 skip"""
+        if after_id is not None:
+            query = query.filter(id_column > after_id)
+        else:
+            query = query.offset(skip)
+        return query.order_by(id_column.asc()).limit(limit)
     
-    def get_tasks(self, skip: int = 0, limit: int = 100, task_type: Optional[TaskType] = None) -> List[Task]:
+    async def get_tasks(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        task_type: Optional[TaskType] = None,
+        after_id: Optional[int] = None
+    ) -> List[Task]:
         """获取任务列表"""
-        query = self.db.query(Task)
+        query = select(Task).options(load_publisher)
         
         if task_type:
             query = query.filter(Task.type == task_type)
         
-        return query.offset(skip).limit(limit).all()
+        result = await self.db.execute(self._paginate(query, Task.id, skip, limit, after_id))
+        return list(result.scalars().all())
     
-    def get_available_tasks(self, skip: int = 0, limit: int = 100) -> List[Task]:
+    async def get_available_tasks(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[Task]:
         """获取可用任务列表"""
-        return self.db.query(Task).filter(
-            Task.status == TaskStatus.AVAILABLE
-        ).offset(skip).limit(limit).all()
+        query = select(Task).options(load_publisher).filter(Task.status == TaskStatus.AVAILABLE)
+        result = await self.db.execute(self._paginate(query, Task.id, skip, limit, after_id))
+        return list(result.scalars().all())
     
-    def get_user_tasks(self, user_id: int, skip: int = 0, limit: int = 100) -> List[Task]:
+    async def get_user_tasks(
+        self,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None
+    ) -> List[Task]:
         """获取用户发布的任务"""
-        return self.db.query(Task).filter(
-            Task.publisher_id == user_id
-        ).offset(skip).limit(limit).all()
+        query = select(Task).filter(Task.publisher_id == user_id)
+        result = await self.db.execute(self._paginate(query, Task.id, skip, limit, after_id))
+        return list(result.scalars().all())
     
-    def get_user_accepted_tasks(self, user_id: int, skip: int = 0, limit: int = 100) -> List[TaskAcceptance]:
+    async def get_user_accepted_tasks(
+        self,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after_id: Optional[int] = None
+    ) -> List[TaskAcceptance]:
         """获取用户接取的任务"""
-        return self.db.query(TaskAcceptance).filter(
-            TaskAcceptance.user_id == user_id
-        ).offset(skip).limit(limit).all()
+        query = select(TaskAcceptance).options(
+            selectinload(TaskAcceptance.task).selectinload(Task.publisher).load_only(User.name)
+        ).filter(TaskAcceptance.user_id == user_id)
+        result = await self.db.execute(self._paginate(query, TaskAcceptance.id, skip, limit, after_id))
+        return list(result.scalars().all())
     
-    def create_task(self, task_data: TaskCreate, publisher_id: int) -> Task:
+    async def create_task(self, task_data: TaskCreate, publisher_id: int) -> Task:
         """创建任务"""
         # 处理标签
         tags_json = json.dumps(task_data.tags) if task_data.tags else None
@@ -69,15 +107,18 @@ class TaskService:
         )
         
         self.db.add(db_task)
-        self.db.commit()
-        self.db.refresh(db_task)
+        await self.db.flush()
+        await task_search_index.upsert(self.db, db_task)
+        await self.db.commit()
+        await bump_version(TASKS)
+        await self.db.refresh(db_task)
         
         logger.info(f"创建新任务: {task_data.title} (发布者: {publisher_id})")
         return db_task
     
-    def update_task(self, task_id: int, task_data: TaskUpdate) -> Optional[Task]:
+    async def update_task(self, task_id: int, task_data: TaskUpdate) -> Optional[Task]:
         """更新任务"""
-        task = self.get_task_by_id(task_id)
+        task = await self.get_task_by_id(task_id)
         if not task:
             return None
         
@@ -90,76 +131,106 @@ class TaskService:
         for field, value in update_data.items():
             setattr(task, field, value)
         
-        self.db.commit()
-        self.db.refresh(task)
+        # 标题或描述变化时同步全文索引
+        if "title" in update_data or "description" in update_data:
+            await task_search_index.upsert(self.db, task)
+        
+        await self.db.commit()
+        await bump_version(TASKS)
+        await self.db.refresh(task)
         
         logger.info(f"更新任务: {task.title}")
         return task
     
-    def delete_task(self, task_id: int) -> bool:
+    async def delete_task(self, task_id: int) -> bool:
         """删除任务"""
-        task = self.get_task_by_id(task_id)
+        task = await self.get_task_by_id(task_id)
         if not task:
             return False
         
         # 删除相关的接取记录
-        self.db.query(TaskAcceptance).filter(TaskAcceptance.task_id == task_id).delete()
+        await self.db.execute(delete(TaskAcceptance).filter(TaskAcceptance.task_id == task_id))
+        await task_search_index.remove(self.db, task_id)
         
-        self.db.delete(task)
-        self.db.commit()
+        await self.db.delete(task)
+        await self.db.commit()
+        await bump_version(TASKS)
         
         logger.info(f"删除任务: {task.title}")
         return True
     
-    def accept_task(self, task_id: int, user_id: int) -> Optional[TaskAcceptance]:
-        """接取任务"""
-        task = self.get_task_by_id(task_id)
+    async def accept_task(self, task_id: int, user_id: int) -> Optional[TaskAcceptance]:
+        """
+        接取任务
+        
+        可用性和人数检查通过条件 UPDATE 在数据库中原子完成，并发接取不会超员；
+        重复接取由 (task_id, user_id) 唯一索引拦截。失败时才额外查询失败原因。
+        
+        成功时的业务事务为：条件 UPDATE tasks、INSERT ... RETURNING、COMMIT；
+        提交之后任务集合的版本号在单独的短事务中递增（见 bump_version）。
+        """
+        result = await self.db.execute(
+            update(Task)
+            .where(
+                Task.id == task_id,
+                Task.status == TaskStatus.AVAILABLE,
+                or_(Task.type != TaskType.TEAM, Task.accepted_count < Task.max_accept_count)
+            )
+            .values(
+                accepted_count=Task.accepted_count + 1,
+                # 个人任务被接取后标记为进行中
+                status=case(
+                    (Task.type == TaskType.PERSONAL, literal(TaskStatus.IN_PROGRESS, Task.status.type)),
+                    else_=Task.status
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+        
+        if result.rowcount == 0:
+            await self.db.rollback()
+            return await self._raise_accept_error(task_id, user_id)
+        
+        # 创建接取记录
+        try:
+            acceptance = await self.db.scalar(
+                insert(TaskAcceptance)
+                .values(task_id=task_id, user_id=user_id, status=TaskStatus.IN_PROGRESS)
+                .returning(TaskAcceptance)
+            )
+            await self.db.commit()
+        except IntegrityError:
+            # 回滚同时撤销上面的人数更新
+            await self.db.rollback()
+            raise ValueError("您已接取该任务")
+        
+        await bump_version(TASKS)
+        logger.info(f"用户 {user_id} 接取任务: {task_id}")
+        return acceptance
+    
+    async def _raise_accept_error(self, task_id: int, user_id: int) -> None:
+        """条件更新未命中时确定失败原因（任务不存在时返回 None）"""
+        task = await self.get_task_by_id(task_id)
         if not task:
             return None
         
-        # 检查任务是否可用
         if task.status != TaskStatus.AVAILABLE:
             raise ValueError("任务不可用")
         
-        # 检查是否已经接取
-        existing_acceptance = self.db.query(TaskAcceptance).filter(
+        result = await self.db.execute(select(TaskAcceptance.id).filter(
             and_(TaskAcceptance.task_id == task_id, TaskAcceptance.user_id == user_id)
-        ).first()
-        
-        if existing_acceptance:
+        ))
+        if result.first():
             raise ValueError("您已接取该任务")
         
-        # 检查团队任务人数限制
-        if task.type == TaskType.TEAM and task.accepted_count >= task.max_accept_count:
-            raise ValueError("该团队任务人数已满")
-        
-        # 创建接取记录
-        acceptance = TaskAcceptance(
-            task_id=task_id,
-            user_id=user_id,
-            status=TaskStatus.IN_PROGRESS
-        )
-        
-        self.db.add(acceptance)
-        
-        # 更新任务接取人数
-        task.accepted_count += 1
-        
-        # 如果是个人任务，标记为进行中
-        if task.type == TaskType.PERSONAL:
-            task.status = TaskStatus.IN_PROGRESS
-        
-        self.db.commit()
-        self.db.refresh(acceptance)
-        
-        logger.info(f"用户 {user_id} 接取任务: {task.title}")
-        return acceptance
+        raise ValueError("该团队任务人数已满")
     
-    def complete_task(self, task_id: int, user_id: int) -> bool:
+    async def complete_task(self, task_id: int, user_id: int) -> bool:
         """完成任务"""
-        acceptance = self.db.query(TaskAcceptance).filter(
+        result = await self.db.execute(select(TaskAcceptance).filter(
             and_(TaskAcceptance.task_id == task_id, TaskAcceptance.user_id == user_id)
-        ).first()
+        ))
+        acceptance = result.scalars().first()
         
         if not acceptance:
             return False
@@ -171,8 +242,9 @@ class TaskService:
         acceptance.status = TaskStatus.COMPLETED
         acceptance.completed_at = func.now()
         
-        # 更新任务状态
-        task = self.get_task_by_id(task_id)
+        # 更新任务状态（锁定任务行，并发完成同一团队任务时依次判断，不会漏标完成）
+        result = await self.db.execute(select(Task).filter(Task.id == task_id).with_for_update())
+        task = result.scalars().first()
         if task:
             # 不减少accepted_count，因为需要统计完成情况
             # task.accepted_count -= 1
@@ -182,42 +254,41 @@ class TaskService:
                 # 个人任务：一个人完成就标记为已完成
                 task.status = TaskStatus.COMPLETED
             elif task.type == TaskType.TEAM:
-                # 团队任务：需要检查所有接取任务的人是否都完成了
-                # 获取所有接取记录
-                all_acceptances = self.db.query(TaskAcceptance).filter(
-                    TaskAcceptance.task_id == task_id
-                ).all()
-                
-                # 检查是否所有人都完成了
-                all_completed = all(
-                    acc.status == TaskStatus.COMPLETED 
-                    for acc in all_acceptances
+                # 团队任务：统计仍未完成的接取记录数（聚合查询，不加载接取记录）
+                await self.db.flush()
+                unfinished = await self.db.scalar(
+                    select(func.count()).select_from(TaskAcceptance).filter(
+                        TaskAcceptance.task_id == task_id,
+                        TaskAcceptance.status != TaskStatus.COMPLETED
+                    )
                 )
                 
-                if all_completed:
+                if unfinished == 0:
                     # 所有接取的人都完成了，标记任务为已完成
                     task.status = TaskStatus.COMPLETED
                     logger.info(f"团队任务 {task.title} 所有成员已完成，任务标记为完成")
         
-        self.db.commit()
+        await self.db.commit()
+        await bump_version(TASKS)
         
         logger.info(f"用户 {user_id} 完成任务: {task.title if task else task_id}")
         return True
     
-    def abandon_task(self, task_id: int, user_id: int) -> bool:
+    async def abandon_task(self, task_id: int, user_id: int) -> bool:
         """放弃任务"""
-        acceptance = self.db.query(TaskAcceptance).filter(
+        result = await self.db.execute(select(TaskAcceptance).filter(
             and_(TaskAcceptance.task_id == task_id, TaskAcceptance.user_id == user_id)
-        ).first()
+        ))
+        acceptance = result.scalars().first()
         
         if not acceptance:
             return False
         
         # 删除接取记录
-        self.db.delete(acceptance)
+        await self.db.delete(acceptance)
         
         # 更新任务接取人数
-        task = self.get_task_by_id(task_id)
+        task = await self.get_task_by_id(task_id)
         if task:
             task.accepted_count -= 1
             
@@ -225,16 +296,28 @@ class TaskService:
             if task.type == TaskType.PERSONAL and task.accepted_count == 0:
                 task.status = TaskStatus.AVAILABLE
         
-        self.db.commit()
+        await self.db.commit()
+        await bump_version(TASKS)
         
         logger.info(f"用户 {user_id} 放弃任务: {task.title if task else task_id}")
         return True
     
-    def search_tasks(self, query: str, skip: int = 0, limit: int = 100) -> List[Task]:
-        """搜索任务"""
-        return self.db.query(Task).filter(
-            or_(
-                Task.title.contains(query),
-                Task.description.contains(query)
-            )
-        ).offset(skip).limit(limit).all()
+    async def search_tasks(self, query: str, skip: int = 0, limit: int = 100) -> List[Task]:
+        """搜索任务（全文索引，按相关度排序）"""
+        task_ids = await task_search_index.search(self.db, query, skip=skip, limit=limit)
+        if task_ids is None:
+            # 数据库不支持全文索引时回退到模糊匹配
+            result = await self.db.execute(select(Task).options(load_publisher).filter(
+                or_(
+                    Task.title.contains(query),
+                    Task.description.contains(query)
+                )
+            ).order_by(Task.id.asc()).offset(skip).limit(limit))
+            return list(result.scalars().all())
+        
+        if not task_ids:
+            return []
+        result = await self.db.execute(
+            select(Task).options(load_publisher).filter(Task.id.in_(task_ids))
+        )
+        return order_by_ids(result.scalars().all(), task_ids)
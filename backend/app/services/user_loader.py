@@ -0,0 +1,62 @@
+"""
+请求级用户批量加载器
+
+列表接口先收集所有需要的用户ID，再用一条 IN 查询取回，
+避免每条出席记录单独查询一次用户。加载结果在本次请求内缓存。
+"""
+
+from fastapi import Depends  # pyright: ignore[reportMissingImports]
+from sqlalchemy import select  # pyright: ignore[reportMissingImports]
+from sqlalchemy.ext.asyncio import AsyncSession  # pyright: ignore[reportMissingImports]
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from app.core.database import get_db, get_read_db
+from app.models import User
+
+
+class UserSummary(NamedTuple):
+    """名单展示所需的用户字段"""
+    id: int
+    name: str
+    avatar: Optional[str]
+
+
+class UserLoader:
+    """按ID批量加载用户（只查询 id、name、avatar）"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._cache: Dict[int, Optional[UserSummary]] = {}
+
+    async def load_many(self, user_ids: Iterable[int]) -> Dict[int, Optional[UserSummary]]:
+        """
+        批量加载用户，未缓存的ID合并为一次查询
+
+        Returns:
+            用户ID -> 用户信息（用户不存在时为 None）
+        """
+        user_ids = set(user_ids)
+        missing = user_ids - self._cache.keys()
+        if missing:
+            result = await self.db.execute(
+                select(User.id, User.name, User.avatar).filter(User.id.in_(missing))
+            )
+            for row in result:
+                self._cache[row.id] = UserSummary(row.id, row.name, row.avatar)
+            for user_id in missing:
+                self._cache.setdefault(user_id, None)
+        return {user_id: self._cache[user_id] for user_id in user_ids}
+
+    async def load(self, user_id: int) -> Optional[UserSummary]:
+        """加载单个用户"""
+        return (await self.load_many([user_id]))[user_id]
+
+
+def get_user_loader(db: AsyncSession = Depends(get_db)) -> UserLoader:
+    """用户加载器依赖（每个请求一个实例，与请求共用数据库会话）"""
+    return UserLoader(db)
+
+
+def get_read_user_loader(db: AsyncSession = Depends(get_read_db)) -> UserLoader:
+    """只读接口的用户加载器依赖（与请求共用只读会话）"""
+    return UserLoader(db)
@@ -2,20 +2,61 @@
 用户服务
 """
 
-from sqlalchemy.orm import Session  # pyright: ignore[reportMissingImports]
-from sqlalchemy import or_  # pyright: ignore[reportMissingImports]
+from sqlalchemy.ext.asyncio import AsyncSession  # pyright: ignore[reportMissingImports]
+from sqlalchemy import select, or_  # pyright: ignore[reportMissingImports]
 from passlib.context import CryptContext  # pyright: ignore[reportMissingModuleSource]
-from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, List, Callable, TypeVar
+import asyncio
 import logging
 
+from app.core.cache import Cache
+from app.core.config import settings
+from app.core.exceptions import ServiceBusyError
 from app.models import User, UserRole
-from app.schemas import UserCreate, UserUpdate
+from app.schemas import UserCreate, UserUpdate, CurrentUser
+from app.services.avatar_store import is_data_url, normalize_avatar_url, save_data_url, schedule_thumbnails
+from app.services.collection_versions import MEETINGS, TASKS, bump_version
+from app.services.meeting_occurrences import materialize_meeting
+from app.services.search_index import user_search_index, meeting_search_index, order_by_ids
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # 密码加密上下文
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# 认证用户缓存：用户名 -> CurrentUser（JSON）
+user_principal_cache = Cache(
+    "principal",
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    maxsize=settings.USER_CACHE_MAX_SIZE
+)
+
+# 密码哈希线程池（bcrypt 在计算期间释放 GIL，线程池即可并行）
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_password_jobs_pending = 0
+
+
+async def run_password_job(func: Callable[..., T], *args) -> T:
+    """在密码哈希线程池中执行任务，队列已满时拒绝新任务"""
+    global _password_jobs_pending
+    if _password_jobs_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        logger.warning("密码哈希队列已满: %d", _password_jobs_pending)
+        raise ServiceBusyError()
+    
+    _password_jobs_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, partial(func, *args))
+    finally:
+        _password_jobs_pending -= 1
+
 
 def truncate_password_for_bcrypt(password: str) -> str:
     """截断密码以符合 bcrypt 的 72 字节限制"""
@@ -34,86 +75,126 @@ def truncate_password_for_bcrypt(password: str) -> str:
 class UserService:
     """用户服务类"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """验证密码"""
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        """验证密码（在线程池中执行）"""
         # bcrypt 限制密码不能超过 72 字节
         plain_password = truncate_password_for_bcrypt(plain_password)
-        return pwd_context.verify(plain_password, hashed_password)
+        return await run_password_job(pwd_context.verify, plain_password, hashed_password)
     
-    def get_password_hash(self, password: str) -> str:
-        """获取密码哈希"""
+    async def get_password_hash(self, password: str) -> str:
+        """获取密码哈希（在线程池中执行）"""
         # bcrypt 限制密码不能超过 72 字节
         password = truncate_password_for_bcrypt(password)
-        return pwd_context.hash(password)
+        return await run_password_job(pwd_context.hash, password)
     
-    def get_user_by_id(self, user_id: int) -> Optional[User]:
+    async def store_avatar(self, avatar: Optional[str]) -> Optional[str]:
+        """base64 头像写入文件存储，返回保存到用户表的头像地址"""
+        if not avatar:
+            return avatar
+        if not is_data_url(avatar):
+            return normalize_avatar_url(avatar)
+        
+        # base64数据可能很大，限制在10MB以内（约13,300,000字符）
+        max_avatar_length = 13300000
+        if len(avatar) > max_avatar_length:
+            raise ValueError("头像数据过大，请选择较小的图片")
+        # 解码和写文件在线程中执行，不阻塞事件循环
+        return await asyncio.to_thread(save_data_url, avatar)
+    
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
         """根据ID获取用户"""
-        return self.db.query(User).filter(User.id == user_id).first()
+        result = await self.db.execute(select(User).filter(User.id == user_id))
+        return result.scalars().first()
     
-    def get_user_by_username(self, username: str) -> Optional[User]:
+    async def get_user_by_username(self, username: str) -> Optional[User]:
         """根据用户名获取用户"""
-        return self.db.query(User).filter(User.username == username).first()
+        result = await self.db.execute(select(User).filter(User.username == username))
+        return result.scalars().first()
     
-    def get_user_by_email(self, email: str) -> Optional[User]:
+    async def get_user_principal(self, username: str) -> Optional[CurrentUser]:
+        """根据用户名获取认证用户（优先读取缓存，只查询必要字段，不加载头像）"""
+        cached = await user_principal_cache.get(username)
+        if cached is not None:
+            return CurrentUser.model_validate_json(cached)
+        
+        result = await self.db.execute(
+            select(User.id, User.username, User.name, User.role, User.is_active)
+            .filter(User.username == username)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        
+        principal = CurrentUser.model_validate(row)
+        await user_principal_cache.set(username, principal.model_dump_json().encode("utf-8"))
+        return principal
+    
+    async def get_user_by_email(self, email: str) -> Optional[User]:
         """根据邮箱获取用户"""
-        return self.db.query(User).filter(User.email == email).first()
+        result = await self.db.execute(select(User).filter(User.email == email))
+        return result.scalars().first()
     
-    def get_user_by_qq(self, qq: str) -> Optional[User]:
+    async def get_user_by_qq(self, qq: str) -> Optional[User]:
         """根据QQ号获取用户"""
-        return self.db.query(User).filter(User.qq == qq).first()
+        result = await self.db.execute(select(User).filter(User.qq == qq))
+        return result.scalars().first()
     
-    def authenticate_user(self, username: str, password: str) -> Optional[User]:
+    async def authenticate_user(self, username: str, password: str) -> Optional[User]:
         """验证用户"""
-        user = self.get_user_by_username(username)
+        user = await self.get_user_by_username(username)
         if not user:
             return None
-        if not self.verify_password(password, user.hashed_password):
+        if not await self.verify_password(password, user.hashed_password):
             return None
         return user
     
-    def create_user(self, user_data: UserCreate) -> User:
+    async def create_user(self, user_data: UserCreate) -> User:
         """创建用户"""
         # 检查用户名和邮箱是否已存在
-        if self.get_user_by_username(user_data.username):
+        if await self.get_user_by_username(user_data.username):
             raise ValueError("用户名已存在")
-        if self.get_user_by_email(user_data.email):
+        if await self.get_user_by_email(user_data.email):
             raise ValueError("邮箱已存在")
         # 检查QQ号是否已存在
-        if user_data.qq and self.get_user_by_qq(user_data.qq):
+        if user_data.qq and await self.get_user_by_qq(user_data.qq):
             raise ValueError("QQ号已被注册")
         
         # 创建新用户
-        hashed_password = self.get_password_hash(user_data.password)
+        hashed_password = await self.get_password_hash(user_data.password)
+        avatar = await self.store_avatar(user_data.avatar)
         db_user = User(
             username=user_data.username,
             email=user_data.email,
             name=user_data.name,
             hashed_password=hashed_password,
-            avatar=user_data.avatar,
+            avatar=avatar,
             qq=user_data.qq,
             role=UserRole.USER
         )
         
         self.db.add(db_user)
-        self.db.commit()
-        self.db.refresh(db_user)
+        await self.db.flush()
+        await user_search_index.upsert(self.db, db_user)
+        await self.db.commit()
+        await self.db.refresh(db_user)
         
         logger.info(f"创建新用户: {user_data.username}")
         
         # 确保默认例会存在，并为新用户创建出席记录
         try:
-            from app.models import Meeting, MeetingAttendance, AttendanceStatus, MeetingType
+            from app.models import Meeting, MeetingType
             from datetime import datetime, timezone, timedelta
             
             # 查找默认双周例会
-            default_meeting = self.db.query(Meeting).filter(
+            result = await self.db.execute(select(Meeting).filter(
                 Meeting.title == "双周例会",
                 Meeting.is_recurring == True,
                 Meeting.recurring_pattern == "biweekly"
-            ).first()
+            ))
+            default_meeting = result.scalars().first()
             
             # 如果默认例会不存在，创建它
             if not default_meeting:
@@ -131,83 +212,112 @@ class UserService:
                     created_by_id=db_user.id  # 使用新注册的用户作为创建者
                 )
                 self.db.add(default_meeting)
-                self.db.commit()
+                await self.db.flush()
+                await meeting_search_index.upsert(self.db, default_meeting)
+                await materialize_meeting(self.db, default_meeting)
+                await self.db.commit()
+                await bump_version(MEETINGS)
                 logger.info(f"为新用户 {db_user.username} 创建了默认双周例会，下一次例会时间: {next_meeting_date.strftime('%Y-%m-%d %H:%M')}")
-                # 注意：对于重复会议，出席记录会在生成实例时自动创建，不需要在这里创建
-            # 对于已存在的默认例会，不需要为新用户创建出席记录，因为会在查看日历时自动创建
+                # 注意：出席记录在用户提交出席状态时才创建，不需要在这里创建
+            # 对于已存在的默认例会，未答复的实例在查看日历时按“待确认”显示
         except Exception as e:
             logger.warning(f"为新用户创建默认例会出席记录失败: {str(e)}", exc_info=True)
             # 不阻止用户创建，只是记录警告
         
         return db_user
     
-    def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
+    async def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
         """更新用户"""
-        user = self.get_user_by_id(user_id)
+        user = await self.get_user_by_id(user_id)
         if not user:
             return None
         
+        old_username = user.username
+        
         # 检查用户名和邮箱是否被其他用户使用
         if user_data.username and user_data.username != user.username:
-            if self.get_user_by_username(user_data.username):
+            if await self.get_user_by_username(user_data.username):
                 raise ValueError("用户名已存在")
         
         if user_data.email and user_data.email != user.email:
-            if self.get_user_by_email(user_data.email):
+            if await self.get_user_by_email(user_data.email):
                 raise ValueError("邮箱已存在")
         
         # 检查QQ号是否被其他用户使用
         if user_data.qq and user_data.qq != user.qq:
-            if self.get_user_by_qq(user_data.qq):
+            if await self.get_user_by_qq(user_data.qq):
                 raise ValueError("QQ号已被注册")
         
         # 更新用户信息
         update_data = user_data.dict(exclude_unset=True)
         if "password" in update_data:
-            update_data["hashed_password"] = self.get_password_hash(update_data.pop("password"))
-        
-        # 特殊处理avatar：如果是base64数据，验证长度
-        if "avatar" in update_data and update_data["avatar"]:
-            avatar_data = update_data["avatar"]
-            # 如果是base64编码的图片数据（通常以data:image开头）
-            if isinstance(avatar_data, str) and avatar_data.startswith("data:image"):
-                # base64数据可能很大，限制在10MB以内（约13,300,000字符）
-                max_avatar_length = 13300000
-                if len(avatar_data) > max_avatar_length:
-                    raise ValueError("头像数据过大，请选择较小的图片")
-                logger.info(f"更新用户头像: {user.username}, 头像大小: {len(avatar_data)} 字符")
+            update_data["hashed_password"] = await self.get_password_hash(update_data.pop("password"))
+        
+        # 头像：base64 数据写入文件存储，用户表只保存头像地址
+        if update_data.get("avatar"):
+            update_data["avatar"] = await self.store_avatar(update_data["avatar"])
+            logger.info("更新用户头像: %s, 头像地址: %s", user.username, update_data['avatar'])
         
         for field, value in update_data.items():
             setattr(user, field, value)
         
-        self.db.commit()
-        self.db.refresh(user)
+        # 用户名、姓名或邮箱变化时同步全文索引
+        if update_data.keys() & {"username", "name", "email"}:
+            await user_search_index.upsert(self.db, user)
+        
+        await self.db.commit()
+        
+        # 姓名变化影响任务列表中的发布者姓名
+        if "name" in update_data:
+            await bump_version(TASKS)
+        
+        await self.db.refresh(user)
+        
+        # 使认证缓存失效（包括修改前的用户名）
+        await user_principal_cache.delete(old_username, user.username)
+        
+        # 新头像在后台生成缩略图
+        if update_data.get("avatar"):
+            schedule_thumbnails(user.avatar)
         
         logger.info(f"更新用户: {user.username}, 更新的字段: {list(update_data.keys())}")
         return user
     
-    def delete_user(self, user_id: int) -> bool:
+    async def delete_user(self, user_id: int) -> bool:
         """删除用户"""
-        user = self.get_user_by_id(user_id)
+        user = await self.get_user_by_id(user_id)
         if not user:
             return False
         
-        self.db.delete(user)
-        self.db.commit()
+        await user_search_index.remove(self.db, user_id)
+        await self.db.delete(user)
+        await self.db.commit()
+        await bump_version(TASKS, MEETINGS)
+        await user_principal_cache.delete(user.username)
         
         logger.info(f"删除用户: {user.username}")
         return True
     
-    def get_users(self, skip: int = 0, limit: int = 100) -> List[User]:
+    async def get_users(self, skip: int = 0, limit: int = 100) -> List[User]:
         """获取用户列表"""
-        return self.db.query(User).offset(skip).limit(limit).all()
-    
-    def search_users(self, query: str, skip: int = 0, limit: int = 100) -> List[User]:
-        """搜索用户"""
-        return self.db.query(User).filter(
-            or_(
-                User.username.contains(query),
-                User.name.contains(query),
-                User.email.contains(query)
-            )
-        ).offset(skip).limit(limit).all()
+        result = await self.db.execute(select(User).offset(skip).limit(limit))
+        return list(result.scalars().all())
+    
+    async def search_users(self, query: str, skip: int = 0, limit: int = 100) -> List[User]:
+        """搜索用户（全文索引，按相关度排序）"""
+        user_ids = await user_search_index.search(self.db, query, skip=skip, limit=limit)
+        if user_ids is None:
+            # 数据库不支持全文索引时回退到模糊匹配
+            result = await self.db.execute(select(User).filter(
+                or_(
+                    User.username.contains(query),
+                    User.name.contains(query),
+                    User.email.contains(query)
+                )
+            ).order_by(User.id.asc()).offset(skip).limit(limit))
+            return list(result.scalars().all())
+        
+        if not user_ids:
+            return []
+        result = await self.db.execute(select(User).filter(User.id.in_(user_ids)))
+        return order_by_ids(result.scalars().all(), user_ids)
@@ -8,18 +8,23 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
 import uvicorn
+import asyncio
 import os
 import logging
 from logging.handlers import RotatingFileHandler
 
 from app.core.config import settings
 from app.core.database import init_db
+from app.core.cache import close_caches
+from app.core.logs import apply_sampling, parse_sampling, start_queue_logging, stop_queue_logging
 from app.api.v1.api import api_router
 from app.core.exceptions import setup_exception_handlers
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.services.meeting_occurrences import occurrence_refresh_loop
 
 
 def setup_logging():
-    """配置日志系统，将日志写入logs文件夹"""
+    """配置日志系统，将日志写入logs文件夹（文件和控制台输出在后台线程中执行）"""
     # 确保logs文件夹存在
     log_dir = "logs"
     os.makedirs(log_dir, exist_ok=True)
@@ -50,13 +55,17 @@ def setup_logging():
     )
     file_handler.setLevel(log_level)
     file_handler.setFormatter(formatter)
-    root_logger.addHandler(file_handler)
     
     # 控制台日志处理器（仍然输出到控制台）
     console_handler = logging.StreamHandler()
     console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    
+    # 请求中只把日志记录放入队列，格式化和写入由后台线程完成
+    root_logger.addHandler(start_queue_logging([file_handler, console_handler], log_level))
+    
+    # 高频日志采样
+    apply_sampling(parse_sampling(settings.LOG_SAMPLING))
     
     # 设置uvicorn的日志级别
     logging.getLogger("uvicorn").setLevel(log_level)
@@ -82,12 +91,19 @@ async def lifespan(app: FastAPI):
     logger.info("✅ 数据库初始化完成")
     print("✅ 数据库初始化完成")
     
+    # 后台延伸会议实例的滚动范围
+    occurrence_refresh_task = asyncio.create_task(occurrence_refresh_loop())
+    
     yield
     
+    occurrence_refresh_task.cancel()
+    await close_caches()
+    
     # 关闭时执行
     logger.info("=" * 60)
     logger.info("HXK Terminal Backend 关闭")
     logger.info("=" * 60)
+    stop_queue_logging()
     print("🛑 HXK Terminal Backend 关闭中...")
 
 
@@ -108,6 +124,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # 设置异常处理器
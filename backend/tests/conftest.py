@@ -0,0 +1,152 @@
+"""
+测试配置
+
+导入应用之前把数据库和上传目录指向临时目录；每个测试使用一个新的 SQLite 数据库文件，
+并清空进程内缓存。
+"""
+
+import os
+import statistics
+import tempfile
+import time
+
+TEST_DIR = tempfile.mkdtemp(prefix="hxkt-test-")
+TEST_DB = os.path.join(TEST_DIR, "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB}"
+os.environ["UPLOAD_DIR"] = os.path.join(TEST_DIR, "uploads")
+os.environ["DEBUG"] = "false"
+os.environ.pop("REDIS_URL", None)
+os.environ.pop("DATABASE_REPLICA_URLS", None)
+
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Sequence, Tuple
+
+import httpx
+import pytest
+from sqlalchemy import event, insert
+
+from app.core.auth import token_claims_cache
+from app.core.conditional import response_cache
+from app.core.database import SessionLocal, engine, init_db
+from app.models import User, UserRole
+from app.services.user_service import user_principal_cache
+from main import app
+
+# 直接写入数据库的测试用户使用的密码哈希（不会用于登录）
+UNUSED_PASSWORD_HASH = "$2b$12$" + "x" * 53
+
+
+def remove_database(path: str) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+@pytest.fixture(autouse=True)
+async def fresh_database():
+    """每个测试使用新的数据库和空缓存"""
+    await engine.dispose()
+    remove_database(TEST_DB)
+    token_claims_cache.clear()
+    await user_principal_cache.backend.close()
+    await response_cache.backend.close()
+    await init_db()
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client() -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def register(client: httpx.AsyncClient, username: str, name: str = None) -> Dict[str, str]:
+    """注册并登录用户，返回认证请求头"""
+    response = await client.post("/api/v1/users/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "name": name or username,
+        "password": "secret123"
+    })
+    assert response.status_code == 200, response.text
+    response = await client.post(
+        "/api/v1/users/login", data={"username": username, "password": "secret123"}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+async def auth_headers(client) -> Dict[str, str]:
+    return await register(client, "alice", "Alice")
+
+
+async def create_users(count: int, prefix: str = "user") -> List[int]:
+    """直接写入数据库批量创建用户（跳过注册接口的密码哈希），返回用户ID"""
+    async with SessionLocal() as db:
+        result = await db.execute(
+            insert(User).returning(User.id),
+            [
+                {
+                    "username": f"{prefix}{i}",
+                    "email": f"{prefix}{i}@example.com",
+                    "name": f"{prefix}{i}",
+                    "hashed_password": UNUSED_PASSWORD_HASH,
+                    "role": UserRole.USER,
+                    "is_active": True
+                }
+                for i in range(count)
+            ]
+        )
+        user_ids = list(result.scalars())
+        await db.commit()
+    return user_ids
+
+
+@contextmanager
+def count_statements(target=None) -> Iterator[List[str]]:
+    """记录执行的 SQL 语句"""
+    target = (target or engine).sync_engine
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """百分位数（取最接近的样本）"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def latency_summary(latencies: Sequence[float]) -> str:
+    """基准测试输出的耗时分布"""
+    return (
+        f"p50 {statistics.median(latencies) * 1000:.1f}ms, "
+        f"p99 {percentile(latencies, 0.99) * 1000:.1f}ms"
+    )
+
+
+async def timed(operation: Callable[[], Awaitable[Any]]) -> Tuple[Any, float]:
+    """执行一次异步操作，返回 (结果, 耗时秒)"""
+    started = time.perf_counter()
+    result = await operation()
+    return result, time.perf_counter() - started
+
+
+def median_time(operation: Callable[[], Any], rounds: int) -> Tuple[Any, float]:
+    """重复执行同步操作 rounds 次，返回 (最后一次的结果, 耗时中位数秒)"""
+    durations = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = operation()
+        durations.append(time.perf_counter() - started)
+    return result, statistics.median(durations)
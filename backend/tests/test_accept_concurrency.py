@@ -0,0 +1,95 @@
+"""
+并发接取任务：条件 UPDATE 不超员，接取记录数与 accepted_count 一致
+"""
+
+import asyncio
+import time
+
+from sqlalchemy import func, select
+
+from app.core.database import SessionLocal
+from app.models import Task, TaskAcceptance, TaskStatus, TaskType
+from app.schemas import TaskCreate
+from app.services.task_service import TaskService
+from tests.conftest import create_users, latency_summary
+
+ACCEPTORS = 60
+MAX_ACCEPT = 10
+
+
+async def create_task(publisher_id: int, task_type: TaskType, max_accept_count: int) -> int:
+    async with SessionLocal() as db:
+        task = await TaskService(db).create_task(
+            TaskCreate(title="并发任务", description="并发接取", type=task_type, max_accept_count=max_accept_count),
+            publisher_id
+        )
+        return task.id
+
+
+async def accept(task_id: int, user_id: int):
+    """在独立会话中接取任务，返回 (结果, 耗时秒)"""
+    started = time.perf_counter()
+    async with SessionLocal() as db:
+        try:
+            await TaskService(db).accept_task(task_id, user_id)
+            outcome = "ok"
+        except ValueError as e:
+            outcome = str(e)
+    return outcome, time.perf_counter() - started
+
+
+async def accept_concurrently(task_id: int, user_ids):
+    results = await asyncio.gather(*(accept(task_id, user_id) for user_id in user_ids))
+    return [outcome for outcome, _ in results], [elapsed for _, elapsed in results]
+
+
+async def acceptance_state(task_id: int):
+    async with SessionLocal() as db:
+        rows = await db.scalar(
+            select(func.count()).select_from(TaskAcceptance).filter(TaskAcceptance.task_id == task_id)
+        )
+        task = await db.get(Task, task_id)
+        return rows, task.accepted_count, task.status
+
+
+async def test_accept_contention_benchmark():
+    publisher, *acceptors = await create_users(ACCEPTORS + 1)
+    task_id = await create_task(publisher, TaskType.TEAM, MAX_ACCEPT)
+
+    started = time.perf_counter()
+    outcomes, latencies = await accept_concurrently(task_id, acceptors)
+    total = time.perf_counter() - started
+
+    assert outcomes.count("ok") == MAX_ACCEPT
+    assert set(outcomes) == {"ok", "该团队任务人数已满"}
+    rows, accepted_count, _ = await acceptance_state(task_id)
+    assert rows == accepted_count == MAX_ACCEPT
+
+    print(
+        f"\n{ACCEPTORS} 个并发接取（上限 {MAX_ACCEPT}）: 总耗时 {total * 1000:.1f}ms, {latency_summary(latencies)}"
+    )
+
+
+async def test_personal_task_accepted_once():
+    publisher, *acceptors = await create_users(21)
+    task_id = await create_task(publisher, TaskType.PERSONAL, 1)
+
+    outcomes, _ = await accept_concurrently(task_id, acceptors)
+
+    assert outcomes.count("ok") == 1
+    assert set(outcomes) == {"ok", "任务不可用"}
+    rows, accepted_count, status = await acceptance_state(task_id)
+    assert rows == accepted_count == 1
+    assert status == TaskStatus.IN_PROGRESS
+
+
+async def test_duplicate_accept_rejected_without_changing_count():
+    publisher, acceptor = await create_users(2)
+    task_id = await create_task(publisher, TaskType.TEAM, 5)
+
+    outcomes, _ = await accept_concurrently(task_id, [acceptor] * 5)
+
+    assert outcomes.count("ok") == 1
+    assert set(outcomes) == {"ok", "您已接取该任务"}
+    rows, accepted_count, _ = await acceptance_state(task_id)
+    assert rows == accepted_count == 1
@@ -0,0 +1,102 @@
+"""
+头像上传：按内容存储原图，后台生成 32/64/128 WebP 缩略图，列表接口引用缩略图
+"""
+
+import asyncio
+import base64
+import io
+import os
+import shutil
+
+import pytest
+from PIL import Image
+
+from app.services.avatar_store import (
+    AVATAR_URL_PREFIX, ROSTER_AVATAR_SIZE, THUMBNAIL_SIZES, avatar_dir, avatar_path, thumbnail_executor
+)
+
+MEETING = {"title": "周会", "type": "meeting", "meeting_date": "2025-11-10T10:00:00", "duration": 30}
+
+
+@pytest.fixture(autouse=True)
+def empty_avatar_dir():
+    """头像按内容存储，清空目录以免复用之前测试生成的缩略图"""
+    shutil.rmtree(avatar_dir(), ignore_errors=True)
+
+
+def png_data_url(width=300, height=200) -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "blue").save(buffer, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+async def wait_for_thumbnails():
+    """缩略图线程池只有一个线程，排在后面的空任务完成时之前的任务都已完成"""
+    await asyncio.wrap_future(thumbnail_executor.submit(lambda: None))
+
+
+async def upload_avatar(client, headers) -> str:
+    response = await client.put("/api/v1/users/me", headers=headers, json={"avatar": png_data_url()})
+    assert response.status_code == 200, response.text
+    return response.json()["avatar"]
+
+
+async def test_upload_generates_webp_thumbnails(client, auth_headers):
+    url = await upload_avatar(client, auth_headers)
+    assert url.startswith(AVATAR_URL_PREFIX) and url.endswith(".png")
+    digest = url[len(AVATAR_URL_PREFIX):].split(".", 1)[0]
+
+    await wait_for_thumbnails()
+
+    for size in THUMBNAIL_SIZES:
+        assert os.path.isfile(avatar_path(f"{digest}_{size}.webp"))
+        response = await client.get(f"{AVATAR_URL_PREFIX}{digest}_{size}.webp")
+        assert response.status_code == 200
+        assert response.headers["cache-control"].endswith("immutable")
+        with Image.open(io.BytesIO(response.content)) as image:
+            assert image.format == "WEBP"
+            assert image.size == (size, size)
+
+
+async def test_lists_reference_thumbnail(client, auth_headers):
+    url = await upload_avatar(client, auth_headers)
+    thumbnail = url.replace(".png", f"_{ROSTER_AVATAR_SIZE}.webp")
+    await wait_for_thumbnails()
+
+    # 当前用户返回原图
+    response = await client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.json()["avatar"] == url
+
+    for path in ("/api/v1/users/users", "/api/v1/users/users/search?query=alice"):
+        response = await client.get(path, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        assert [user["avatar"] for user in response.json()] == [thumbnail]
+
+    response = await client.post("/api/v1/meetings/", headers=auth_headers, json=MEETING)
+    meeting_id = response.json()["id"]
+    response = await client.post(
+        f"/api/v1/meetings/{meeting_id}/attendance", headers=auth_headers, json={"status": "confirmed"}
+    )
+    assert response.status_code == 200, response.text
+    response = await client.get(f"/api/v1/meetings/{meeting_id}/attendance", headers=auth_headers)
+    assert [record["user_avatar"] for record in response.json()] == [thumbnail]
+
+    response = await client.get(thumbnail)
+    assert response.headers["content-type"] == "image/webp"
+
+
+async def test_missing_thumbnail_falls_back_to_original(client, auth_headers):
+    url = await upload_avatar(client, auth_headers)
+    await wait_for_thumbnails()
+    digest = url[len(AVATAR_URL_PREFIX):].split(".", 1)[0]
+    thumbnail_path = avatar_path(f"{digest}_{ROSTER_AVATAR_SIZE}.webp")
+    os.remove(thumbnail_path)
+
+    response = await client.get(f"{AVATAR_URL_PREFIX}{digest}_{ROSTER_AVATAR_SIZE}.webp")
+
+    # 返回原图且不长期缓存，同时重新安排生成
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["cache-control"] == "no-cache"
+    await wait_for_thumbnails()
+    assert os.path.exists(thumbnail_path)
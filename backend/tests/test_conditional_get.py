@@ -0,0 +1,183 @@
+"""
+列表接口的条件请求：未变化时返回 304，每个写入方法之后 ETag 变化
+"""
+
+import pytest
+
+from app.core.database import SessionLocal
+from app.services.user_service import UserService
+from tests.conftest import count_statements, register
+
+TASK = {"title": "写文档", "description": "整理接口文档", "type": "team", "priority": 1, "max_accept_count": 3}
+MEETING = {"title": "周会", "type": "meeting", "meeting_date": "2025-11-10T10:00:00", "duration": 30}
+
+TASK_LISTS = ["/api/v1/tasks/", "/api/v1/tasks/available", "/api/v1/tasks/my-tasks", "/api/v1/tasks/accepted"]
+MEETING_LISTS = ["/api/v1/meetings/", "/api/v1/meetings/my-meetings"]
+
+
+async def etag_of(client, headers, path):
+    response = await client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.headers["etag"]
+
+
+async def assert_not_modified(client, headers, path, etag):
+    response = await client.get(path, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+@pytest.mark.parametrize("path", TASK_LISTS + MEETING_LISTS)
+async def test_unchanged_list_returns_304_with_one_query(client, auth_headers, path):
+    etag = await etag_of(client, auth_headers, path)
+
+    with count_statements() as statements:
+        await assert_not_modified(client, auth_headers, path, etag)
+
+    # 只查询集合版本号（认证用户已缓存）
+    assert len(statements) == 1
+
+
+async def test_etag_depends_on_user_and_query(client, auth_headers):
+    other = await register(client, "bob")
+    assert await etag_of(client, auth_headers, "/api/v1/tasks/") != await etag_of(client, other, "/api/v1/tasks/")
+    assert await etag_of(client, auth_headers, "/api/v1/tasks/") != await etag_of(client, auth_headers, "/api/v1/tasks/?limit=5")
+
+
+async def create_task(client, headers):
+    response = await client.post("/api/v1/tasks/", headers=headers, json=TASK)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def create_meeting(client, headers):
+    response = await client.post("/api/v1/meetings/", headers=headers, json=MEETING)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def mutate_create_task(client, headers):
+    await create_task(client, headers)
+
+
+async def mutate_update_task(client, headers, task_id):
+    response = await client.put(f"/api/v1/tasks/{task_id}", headers=headers, json={"title": "改标题"})
+    assert response.status_code == 200, response.text
+
+
+async def mutate_delete_task(client, headers, task_id):
+    response = await client.delete(f"/api/v1/tasks/{task_id}", headers=headers)
+    assert response.status_code == 200, response.text
+
+
+async def mutate_accept_task(client, headers, task_id):
+    response = await client.post(f"/api/v1/tasks/{task_id}/accept", headers=headers)
+    assert response.status_code == 200, response.text
+
+
+async def mutate_rename_user(client, headers):
+    response = await client.put("/api/v1/users/me", headers=headers, json={"name": "Alice Liddell"})
+    assert response.status_code == 200, response.text
+
+
+TASK_MUTATIONS = {
+    "create": lambda client, headers, task_id: mutate_create_task(client, headers),
+    "update": mutate_update_task,
+    "delete": mutate_delete_task,
+    "accept": mutate_accept_task,
+    "rename_publisher": lambda client, headers, task_id: mutate_rename_user(client, headers),
+}
+
+
+@pytest.mark.parametrize("mutation", TASK_MUTATIONS)
+async def test_task_mutation_changes_etag(client, auth_headers, mutation):
+    task_id = await create_task(client, auth_headers)
+    etag = await etag_of(client, auth_headers, "/api/v1/tasks/")
+
+    await TASK_MUTATIONS[mutation](client, auth_headers, task_id)
+
+    assert await etag_of(client, auth_headers, "/api/v1/tasks/") != etag
+
+
+@pytest.mark.parametrize("action", ["complete", "abandon"])
+async def test_acceptance_mutation_changes_etag(client, auth_headers, action):
+    task_id = await create_task(client, auth_headers)
+    await mutate_accept_task(client, auth_headers, task_id)
+    etag = await etag_of(client, auth_headers, "/api/v1/tasks/accepted")
+    await assert_not_modified(client, auth_headers, "/api/v1/tasks/accepted", etag)
+
+    response = await client.post(f"/api/v1/tasks/{task_id}/{action}", headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    response = await client.get("/api/v1/tasks/accepted", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+
+async def test_delete_user_changes_task_and_meeting_etags(client, auth_headers):
+    await register(client, "bob")
+    task_etag = await etag_of(client, auth_headers, "/api/v1/tasks/")
+    meeting_etag = await etag_of(client, auth_headers, "/api/v1/meetings/my-meetings")
+
+    async with SessionLocal() as db:
+        user = await UserService(db).get_user_by_username("bob")
+        assert await UserService(db).delete_user(user.id)
+
+    assert await etag_of(client, auth_headers, "/api/v1/tasks/") != task_etag
+    assert await etag_of(client, auth_headers, "/api/v1/meetings/my-meetings") != meeting_etag
+
+
+async def test_meeting_mutations_change_etag(client, auth_headers):
+    path = "/api/v1/meetings/my-meetings"
+    seen = {await etag_of(client, auth_headers, path)}
+
+    async def changed():
+        etag = await etag_of(client, auth_headers, path)
+        assert etag not in seen
+        seen.add(etag)
+
+    meeting_id = await create_meeting(client, auth_headers)
+    await changed()
+
+    response = await client.put(f"/api/v1/meetings/{meeting_id}", headers=auth_headers, json={"title": "改名"})
+    assert response.status_code == 200, response.text
+    await changed()
+
+    # 首次提交出席状态创建记录，再次提交更新记录
+    for status in ("confirmed", "absent"):
+        response = await client.post(
+            f"/api/v1/meetings/{meeting_id}/attendance", headers=auth_headers, json={"status": status}
+        )
+        assert response.status_code == 200, response.text
+        await changed()
+
+    response = await client.delete(f"/api/v1/meetings/{meeting_id}", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    await changed()
+
+
+async def test_cached_response_matches_fresh_response(client, auth_headers):
+    await create_task(client, auth_headers)
+    first = await client.get("/api/v1/tasks/?limit=1", headers=auth_headers)
+
+    with count_statements() as statements:
+        second = await client.get("/api/v1/tasks/?limit=1", headers=auth_headers)
+
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.headers.get("x-next-cursor") == first.headers.get("x-next-cursor")
+    # 版本号查询之外不再查询列表
+    assert len(statements) == 1
+
+
+async def test_write_does_not_touch_versions_inside_business_transaction(client, auth_headers):
+    task_id = await create_task(client, auth_headers)
+
+    with count_statements() as statements:
+        await mutate_accept_task(client, auth_headers, task_id)
+
+    # 计数器在业务事务提交之后单独更新
+    version_updates = [i for i, sql in enumerate(statements) if "collection_versions" in sql]
+    task_updates = [i for i, sql in enumerate(statements) if sql.lstrip().upper().startswith("UPDATE TASKS")]
+    assert len(version_updates) == 1
+    assert task_updates and version_updates[0] > task_updates[-1]
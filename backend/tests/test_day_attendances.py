@@ -0,0 +1,117 @@
+"""
+某一天的出席名单：包含重复会议在当天的实例和非重复会议，查询次数与会议数量无关
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.core.database import SessionLocal
+from app.models import AttendanceStatus, MeetingAttendance
+from app.services import meeting_occurrences
+from tests.conftest import count_statements, create_users, register
+
+TODAY = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+DAY = TODAY + timedelta(days=7)
+TITLES = ("站会", "评审")
+
+
+@pytest.fixture(params=[True, False], ids=["materialized", "fallback"])
+def materialized(request, monkeypatch):
+    """两条路径：读取会议实例表，或超出物化范围时在内存中展开"""
+    if not request.param:
+        monkeypatch.setattr(meeting_occurrences, "covers", lambda end_date: False)
+    return request.param
+
+
+async def create_meeting(client, headers, title, meeting_date, pattern=None):
+    response = await client.post("/api/v1/meetings/", headers=headers, json={
+        "title": title, "type": "meeting", "meeting_date": meeting_date.isoformat(), "duration": 30,
+        "is_recurring": pattern is not None, "recurring_pattern": pattern
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def answer(client, headers, meeting_id, status, instance_date=None):
+    body = {"status": status}
+    if instance_date is not None:
+        body["instance_date"] = instance_date.isoformat()
+    response = await client.post(f"/api/v1/meetings/{meeting_id}/attendance", headers=headers, json=body)
+    assert response.status_code == 200, response.text
+
+
+async def day_attendances(client, headers):
+    response = await client.get(f"/api/v1/meetings/date/{DAY:%Y-%m-%d}/attendances", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_recurring_instance_and_one_off_on_same_day(client, auth_headers, materialized):
+    bob = await register(client, "bob", "Bob")
+    standup_time, review_time = DAY.replace(hour=9, minute=30), DAY.replace(hour=14)
+    standup = await create_meeting(client, auth_headers, "站会", standup_time - timedelta(days=7), "weekly")
+    review = await create_meeting(client, auth_headers, "评审", review_time)
+
+    await answer(client, auth_headers, standup, "confirmed", standup_time)
+    await answer(client, bob, standup, "absent", standup_time - timedelta(days=7))  # 其他日期的实例
+    await answer(client, bob, review, "absent")
+
+    meetings = [
+        meeting for meeting in await day_attendances(client, auth_headers) if meeting["meeting_title"] in TITLES
+    ]
+
+    assert [(m["meeting_id"], m["meeting_date"]) for m in meetings] == [
+        (standup, standup_time.isoformat()), (review, review_time.isoformat())
+    ]
+    assert [
+        [(a["user_name"], a["status"], a["can_attend"]) for a in meeting["attendances"]] for meeting in meetings
+    ] == [[("Alice", "confirmed", True)], [("Bob", "absent", False)]]
+
+
+async def seed(client, headers, count, prefix):
+    """count 个每周会议和 count 个当天的单次会议，每个会议一个不同用户的出席记录"""
+    weekly = [
+        await create_meeting(client, headers, f"{prefix}站会{i}", DAY.replace(hour=9) - timedelta(days=7), "weekly")
+        for i in range(count)
+    ]
+    one_off = [
+        await create_meeting(client, headers, f"{prefix}评审{i}", DAY.replace(hour=15))
+        for i in range(count)
+    ]
+    users = await create_users(2 * count, prefix=prefix)
+    async with SessionLocal() as db:
+        await db.execute(insert(MeetingAttendance), [
+            {"meeting_id": meeting_id, "user_id": user_id, "status": AttendanceStatus.CONFIRMED,
+             "instance_date": DAY.replace(hour=9)}
+            for meeting_id, user_id in zip(weekly, users)
+        ] + [
+            {"meeting_id": meeting_id, "user_id": user_id, "status": AttendanceStatus.ABSENT, "instance_date": None}
+            for meeting_id, user_id in zip(one_off, users[count:])
+        ])
+        await db.commit()
+
+
+async def statements_for_day(client, headers, expected_rosters):
+    with count_statements() as statements:
+        meetings = await day_attendances(client, headers)
+    rosters = [meeting for meeting in meetings if meeting["attendances"]]
+    assert len(rosters) == expected_rosters
+    assert all(len(meeting["attendances"]) == 1 for meeting in rosters)
+    return statements
+
+
+async def test_day_statement_count_is_constant(client, auth_headers, materialized):
+    # 先缓存认证用户，计数只包含名单本身的查询
+    assert (await client.get("/api/v1/users/me", headers=auth_headers)).status_code == 200
+
+    await seed(client, auth_headers, 1, "a")
+    small = await statements_for_day(client, auth_headers, 2)
+
+    await seed(client, auth_headers, 20, "b")
+    large = await statements_for_day(client, auth_headers, 42)
+
+    # 会议实例、出席记录、出席用户各一次
+    assert len(small) == 3, "\n".join(small)
+    assert len(large) == len(small), "\n".join(large)
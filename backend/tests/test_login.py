@@ -0,0 +1,140 @@
+"""
+登录：bcrypt 在线程池中执行，排队任务数达到上限时返回 503 和 Retry-After；
+并发登录期间其他接口的延迟不受影响
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.config import settings
+from app.core.exceptions import ServiceBusyError
+from app.services import user_service
+from tests.conftest import latency_summary, register, timed
+
+BURST = 16
+BASELINE_PROBES = 50
+
+
+async def login(client, username="alice", password="secret123"):
+    return await client.post("/api/v1/users/login", data={"username": username, "password": password})
+
+
+class BlockingContext:
+    """代替 pwd_context：verify 阻塞到 release 之后（占住线程池中的任务）"""
+
+    def __init__(self):
+        self.started = threading.Semaphore(0)
+        self._release = threading.Event()
+
+    def verify(self, plain_password, hashed_password):
+        self.started.release()
+        self._release.wait(timeout=10)
+        return True
+
+    def release(self):
+        self._release.set()
+
+
+@pytest.fixture
+def password_pool(monkeypatch):
+    """两个线程的密码哈希线程池（与 CPU 数无关）"""
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="test-password")
+    monkeypatch.setattr(user_service, "password_executor", pool)
+    yield pool
+    pool.shutdown()
+
+
+async def test_queue_limit_returns_503_with_retry_after(client, auth_headers, monkeypatch, password_pool):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 2)
+    blocking = BlockingContext()
+    monkeypatch.setattr(user_service, "pwd_context", blocking)
+
+    # 两个登录在两个线程中同时执行，占满队列
+    held = [asyncio.create_task(login(client)) for _ in range(2)]
+    for _ in held:
+        assert await asyncio.to_thread(blocking.started.acquire, timeout=5)
+
+    rejected = await asyncio.gather(*(login(client) for _ in range(3)))
+    for response in rejected:
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        assert response.json() == {"error": True, "message": "服务繁忙，请稍后重试", "status_code": 503}
+
+    blocking.release()
+    assert [response.status_code for response in await asyncio.gather(*held)] == [200, 200]
+
+    # 队列释放后恢复正常
+    assert (await login(client)).status_code == 200
+
+
+async def test_run_password_job_rejects_when_full(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 0)
+
+    with pytest.raises(ServiceBusyError) as error:
+        await user_service.run_password_job(lambda: None)
+    assert error.value.retry_after == 1
+
+
+async def test_failed_job_releases_slot(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 1)
+
+    def fail():
+        raise ValueError("bad hash")
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            await user_service.run_password_job(fail)
+    assert await user_service.run_password_job(lambda: "ok") == "ok"
+
+
+async def probe_tasks(client, headers, offset: int, count: int = None, stop: asyncio.Event = None):
+    """
+    循环请求任务列表，返回每次的耗时
+
+    执行 count 次，或一直执行到 stop 被设置；每次的 skip 不同，不命中响应缓存。
+    """
+    latencies = []
+    while (count is None or len(latencies) < count) and (stop is None or not stop.is_set()):
+        params = {"skip": offset + len(latencies)}
+        response, elapsed = await timed(lambda: client.get("/api/v1/tasks/", headers=headers, params=params))
+        assert response.status_code == 200, response.text
+        latencies.append(elapsed)
+    return latencies
+
+
+async def test_login_burst_benchmark(client, auth_headers):
+    baseline = await probe_tasks(client, auth_headers, 0, count=BASELINE_PROBES)
+
+    burst_done = asyncio.Event()
+
+    async def burst():
+        try:
+            return await asyncio.gather(*(timed(lambda: login(client)) for _ in range(BURST)))
+        finally:
+            burst_done.set()
+
+    started = time.perf_counter()
+    logins, during = await asyncio.gather(
+        burst(), probe_tasks(client, auth_headers, 100000, stop=burst_done)
+    )
+    total = time.perf_counter() - started
+
+    assert [response.status_code for response, _ in logins] == [200] * BURST
+    assert during
+    print(
+        f"\n{BURST} 个并发登录（{settings.PASSWORD_HASH_WORKERS} 个哈希线程）: 总耗时 {total * 1000:.0f}ms, "
+        f"登录 {latency_summary([elapsed for _, elapsed in logins])}\n"
+        f"GET /tasks/ 无登录: {latency_summary(baseline)}; "
+        f"登录期间（{len(during)} 次）: {latency_summary(during)}"
+    )
+
+
+async def test_login_wrong_password(client, auth_headers):
+    response = await login(client, password="wrong-password")
+    assert response.status_code == 401
+    await register(client, "bob")
+    assert (await login(client, "bob")).status_code == 200
@@ -0,0 +1,162 @@
+"""
+日志：队列处理器入队时固定消息内容，高频日志采样，以及日历请求在两种日志方式下的延迟
+"""
+
+import logging
+import os
+import queue
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.logs import (
+    DeferredQueueHandler, SamplingFilter, parse_sampling, start_queue_logging, stop_queue_logging
+)
+from tests.conftest import TEST_DIR, latency_summary, timed
+
+REQUESTS = 50
+MEETINGS = 20
+
+
+def enqueue(logger_name: str):
+    """不启动后台线程的队列处理器，入队的记录留在队列中"""
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    handler = DeferredQueueHandler(log_queue)
+    logger.addHandler(handler)
+    return logger, log_queue, handler
+
+
+def test_mutable_args_frozen_when_enqueued():
+    logger, log_queue, handler = enqueue("tests.logs.args")
+    members = ["alice"]
+    try:
+        logger.info("名单: %s, 人数 %d", members, len(members))
+        members.append("bob")
+    finally:
+        logger.removeHandler(handler)
+
+    record = log_queue.get_nowait()
+    assert record.args is None
+    assert logging.Formatter("%(message)s").format(record) == "名单: ['alice'], 人数 1"
+
+
+def test_exception_formatted_when_enqueued():
+    logger, log_queue, handler = enqueue("tests.logs.exc")
+    try:
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.error("计算失败", exc_info=True)
+    finally:
+        logger.removeHandler(handler)
+
+    record = log_queue.get_nowait()
+    assert record.exc_info is None
+    output = logging.Formatter("%(levelname)s %(message)s").format(record)
+    assert output.startswith("ERROR 计算失败\nTraceback")
+    assert "ZeroDivisionError" in output
+
+
+def test_other_handlers_see_original_record():
+    logger, log_queue, handler = enqueue("tests.logs.copy")
+    seen = []
+
+    class Collect(logging.Handler):
+        def emit(self, record):
+            seen.append(record)
+
+    collector = Collect()
+    logger.addHandler(collector)
+    try:
+        logger.info("用户 %s", "alice")
+    finally:
+        logger.removeHandler(handler)
+        logger.removeHandler(collector)
+
+    assert seen[0].args == ("alice",)
+    assert log_queue.get_nowait() is not seen[0]
+
+
+def test_sampling_keeps_one_in_n_and_all_warnings():
+    assert parse_sampling("a=10, b=2,bad,c=x") == {"a": 10, "b": 2}
+
+    sampler = SamplingFilter(10)
+    debug = [logging.LogRecord("a", logging.DEBUG, __file__, 0, "x", None, None) for _ in range(100)]
+    warning = logging.LogRecord("a", logging.WARNING, __file__, 0, "x", None, None)
+
+    assert sum(sampler.filter(record) for record in debug) == 10
+    assert sampler.filter(warning)
+
+
+@pytest.fixture
+def root_logging():
+    """测试结束后还原根日志记录器"""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    stop_queue_logging()
+    for handler in root.handlers[:]:
+        if handler not in handlers:
+            root.removeHandler(handler)
+            handler.close()
+    root.setLevel(level)
+
+
+def file_handler(path: str) -> logging.Handler:
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+    ))
+    return handler
+
+
+async def time_calendar(client, headers, offset: int):
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    latencies = []
+    for i in range(REQUESTS):
+        # 每次请求的参数不同，不命中响应缓存
+        params = {
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=30)).isoformat(),
+            "limit": 1000 - offset - i
+        }
+        response, elapsed = await timed(lambda: client.get("/api/v1/meetings/", headers=headers, params=params))
+        assert response.status_code == 200
+        latencies.append(elapsed)
+    return latencies
+
+
+async def test_calendar_latency_benchmark(client, auth_headers, root_logging):
+    for i in range(MEETINGS):
+        response = await client.post("/api/v1/meetings/", headers=auth_headers, json={
+            "title": f"站会{i}", "type": "meeting", "meeting_date": datetime.now().isoformat(),
+            "duration": 15, "is_recurring": True, "recurring_pattern": "daily"
+        })
+        assert response.status_code == 200, response.text
+    root_logging.setLevel(logging.INFO)
+
+    results = {}
+    for mode, offset in (("直接写文件", 0), ("队列写文件", REQUESTS)):
+        path = os.path.join(TEST_DIR, f"calendar-{offset}.log")
+        handler = file_handler(path)
+        if offset:
+            root_logging.addHandler(start_queue_logging([handler], logging.INFO))
+        else:
+            root_logging.addHandler(handler)
+
+        results[mode] = await time_calendar(client, auth_headers, offset)
+
+        stop_queue_logging()
+        root_logging.removeHandler(handler)
+        handler.close()
+        with open(path, encoding="utf-8") as f:
+            lines = [line for line in f if "获取会议列表请求" in line]
+        # 队列中的日志在停止时全部写出
+        assert len(lines) == REQUESTS
+
+    print()
+    for mode, latencies in results.items():
+        print(f"日历请求（{MEETINGS} 个每日重复会议，30 天）{mode}: {latency_summary(latencies)}")
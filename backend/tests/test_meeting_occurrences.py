@@ -0,0 +1,264 @@
+"""
+会议实例表：日历查询在 SQL 中连接出席记录，后台延伸只加载需要延伸的重复会议，
+各展开路径的实例时间一致
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, event, func, select, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Meeting, MeetingAttendance, MeetingOccurrence, User
+from app.services import meeting_occurrences
+from app.services.meeting_service import MeetingService
+from tests.conftest import count_statements
+
+TODAY = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+
+
+async def create_meeting(client, headers, title, meeting_date, pattern=None):
+    response = await client.post("/api/v1/meetings/", headers=headers, json={
+        "title": title, "type": "meeting", "meeting_date": meeting_date.isoformat(), "duration": 30,
+        "is_recurring": pattern is not None, "recurring_pattern": pattern
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def answer(client, headers, meeting_id, status, instance_date=None):
+    body = {"status": status}
+    if instance_date is not None:
+        body["instance_date"] = instance_date.isoformat()
+    response = await client.post(f"/api/v1/meetings/{meeting_id}/attendance", headers=headers, json=body)
+    assert response.status_code == 200, response.text
+
+
+async def calendar(client, headers, start, end, limit=1000):
+    response = await client.get("/api/v1/meetings/", headers=headers, params={
+        "start_date": start.isoformat(), "end_date": end.isoformat(), "limit": limit
+    })
+    assert response.status_code == 200, response.text
+    return {
+        (item["title"], item["meeting_date"][:10]): item.get("attendance")
+        for item in response.json() if item["title"] in ("站会", "评审")
+    }
+
+
+async def seed_calendar(client, headers):
+    standup = await create_meeting(client, headers, "站会", TODAY - timedelta(days=14), "weekly")
+    review = await create_meeting(client, headers, "评审", TODAY + timedelta(days=3))
+    await answer(client, headers, standup, "confirmed", TODAY - timedelta(days=7))
+    await answer(client, headers, standup, "absent", TODAY)
+    await answer(client, headers, review, "confirmed")
+    return standup, review
+
+
+EXPECTED = {
+    ("站会", (TODAY - timedelta(days=14)).date().isoformat()): "pending",
+    ("站会", (TODAY - timedelta(days=7)).date().isoformat()): "confirmed",
+    ("站会", TODAY.date().isoformat()): "absent",
+    ("站会", (TODAY + timedelta(days=7)).date().isoformat()): "pending",
+    ("评审", (TODAY + timedelta(days=3)).date().isoformat()): "confirmed",
+}
+
+
+async def test_calendar_attendance_joined_in_sql(client, auth_headers):
+    await seed_calendar(client, auth_headers)
+    start, end = TODAY - timedelta(days=15), TODAY + timedelta(days=8)
+    assert meeting_occurrences.covers(end)
+
+    with count_statements() as statements:
+        assert await calendar(client, auth_headers, start, end) == EXPECTED
+
+    attendance_queries = [sql for sql in statements if "meeting_attendances" in sql]
+    assert len(attendance_queries) == 1
+    assert "meeting_occurrences" in attendance_queries[0]
+    assert "LEFT OUTER JOIN meeting_attendances" in attendance_queries[0]
+
+
+async def test_calendar_attendance_matches_fallback(client, auth_headers, monkeypatch):
+    await seed_calendar(client, auth_headers)
+    start, end = TODAY - timedelta(days=15), TODAY + timedelta(days=8)
+    materialized = await calendar(client, auth_headers, start, end)
+
+    # 超出物化范围时在内存中展开并匹配出席记录（改变 limit，避免命中响应缓存）
+    monkeypatch.setattr(meeting_occurrences, "covers", lambda end_date: False)
+    fallback = await calendar(client, auth_headers, start, end, limit=999)
+
+    assert fallback == materialized == EXPECTED
+
+
+async def test_pending_rows_created_on_read_when_enabled(client, auth_headers, monkeypatch):
+    standup, review = await seed_calendar(client, auth_headers)
+    monkeypatch.setattr(settings, "ATTENDANCE_PENDING_ROWS_ON_READ", True)
+
+    async with SessionLocal() as db:
+        alice = await db.scalar(select(User.id).filter(User.username == "alice"))
+        await MeetingService(db).get_meetings_with_instances(
+            start_date=TODAY - timedelta(days=15), end_date=TODAY + timedelta(days=8), current_user_id=alice
+        )
+
+    async with SessionLocal() as db:
+        statuses = (await db.execute(
+            select(MeetingAttendance.status, func.count())
+            .filter(MeetingAttendance.meeting_id.in_([standup, review]))
+            .group_by(MeetingAttendance.status)
+        )).all()
+    assert {status.value: count for status, count in statuses} == {"confirmed": 2, "absent": 1, "pending": 2}
+
+
+async def test_extend_horizon_loads_only_recurring_tails(client, auth_headers, monkeypatch):
+    standup = await create_meeting(client, auth_headers, "站会", TODAY, "weekly")
+    review = await create_meeting(client, auth_headers, "评审", TODAY + timedelta(days=3))
+    unmaterialized = await create_meeting(client, auth_headers, "复盘", TODAY + timedelta(days=5))
+    async with SessionLocal() as db:
+        await db.execute(delete(MeetingOccurrence).filter(MeetingOccurrence.meeting_id == unmaterialized))
+        await db.commit()
+
+    later = meeting_occurrences.horizon_end() + timedelta(days=28)
+    monkeypatch.setattr(meeting_occurrences, "horizon_end", lambda: later)
+
+    loaded = []
+
+    def on_load(target, context):
+        loaded.append(target.title)
+
+    event.listen(Meeting, "load", on_load)
+    try:
+        async with SessionLocal() as db:
+            count = await meeting_occurrences.extend_horizon(db)
+            await db.commit()
+    finally:
+        event.remove(Meeting, "load", on_load)
+
+    # 已物化的非重复会议不再加载；默认的双周例会也是重复会议
+    assert sorted(loaded) == sorted(["站会", "复盘", "双周例会"])
+    async with SessionLocal() as db:
+        per_meeting = dict((await db.execute(
+            select(MeetingOccurrence.meeting_id, func.count()).group_by(MeetingOccurrence.meeting_id)
+        )).all())
+    assert per_meeting[review] == 1
+    assert per_meeting[unmaterialized] == 1
+    assert count >= 4 + 1
+
+    # 已延伸到新终点后再次执行不再加载重复会议
+    loaded.clear()
+    event.listen(Meeting, "load", on_load)
+    try:
+        async with SessionLocal() as db:
+            weekly_tail = await db.scalar(
+                select(func.max(MeetingOccurrence.occurrence_date)).filter(MeetingOccurrence.meeting_id == standup)
+            )
+            monkeypatch.setattr(meeting_occurrences, "horizon_end", lambda: weekly_tail)
+            assert await meeting_occurrences.extend_horizon(db) == 0
+    finally:
+        event.remove(Meeting, "load", on_load)
+    assert "站会" not in loaded
+
+
+async def occurrence_dates(meeting_id):
+    async with SessionLocal() as db:
+        return list((await db.scalars(
+            select(MeetingOccurrence.occurrence_date)
+            .filter(MeetingOccurrence.meeting_id == meeting_id)
+            .order_by(MeetingOccurrence.occurrence_date)
+        )).all())
+
+
+def test_expand_does_not_depend_on_timezone_representation():
+    # 创建请求带客户端时区；PostgreSQL 读出的是同一时刻的 UTC 表示
+    local = datetime(2025, 11, 6, 1, 30, tzinfo=timezone(timedelta(hours=8)))
+    created = Meeting(id=1, meeting_date=local, is_recurring=True, recurring_pattern="weekly")
+    reloaded = Meeting(id=1, meeting_date=local.astimezone(timezone.utc), is_recurring=True, recurring_pattern="weekly")
+    until = datetime(2025, 12, 31)
+
+    rows = meeting_occurrences._expand(created, None, until)
+    assert rows == meeting_occurrences._expand(reloaded, None, until)
+    # 跨过午夜：UTC 的实例在前一天
+    assert rows[0]["occurrence_date"] == datetime(2025, 11, 5, 17, 30)
+
+
+async def test_offset_meeting_date_materializes_like_extend_and_fallback(client, auth_headers, monkeypatch):
+    start = (TODAY - timedelta(days=14)).replace(hour=1, minute=30)
+    offset_date = start.replace(tzinfo=timezone(timedelta(hours=8)))
+    meeting_id = await create_meeting(client, auth_headers, "站会", offset_date, "weekly")
+
+    materialized = await occurrence_dates(meeting_id)
+    assert materialized
+
+    # 后台延伸从数据库读取会议时间重新生成
+    async with SessionLocal() as db:
+        await db.execute(delete(MeetingOccurrence).filter(MeetingOccurrence.meeting_id == meeting_id))
+        await meeting_occurrences.extend_horizon(db)
+        await db.commit()
+    assert await occurrence_dates(meeting_id) == materialized
+
+    # 日历的两条路径返回相同的实例
+    range_start, range_end = TODAY - timedelta(days=15), TODAY + timedelta(days=8)
+    expected = [value.isoformat() for value in materialized if range_start <= value <= range_end]
+
+    async def calendar_dates(limit):
+        response = await client.get("/api/v1/meetings/", headers=auth_headers, params={
+            "start_date": range_start.isoformat(), "end_date": range_end.isoformat(), "limit": limit
+        })
+        assert response.status_code == 200, response.text
+        return [item["meeting_date"] for item in response.json() if item["title"] == "站会"]
+
+    assert await calendar_dates(1000) == expected
+    monkeypatch.setattr(meeting_occurrences, "covers", lambda end_date: False)
+    assert await calendar_dates(999) == expected
+
+
+async def test_extend_horizon_skips_exhausted_meetings(client, auth_headers, monkeypatch):
+    weekly = await create_meeting(client, auth_headers, "站会", TODAY, "weekly")
+    counted = await create_meeting(client, auth_headers, "三次培训", TODAY, "FREQ=WEEKLY;COUNT=3")
+    ended = await create_meeting(
+        client, auth_headers, "旧周会", TODAY - timedelta(days=60),
+        f"FREQ=WEEKLY;UNTIL={(TODAY - timedelta(days=30)):%Y%m%d}"
+    )
+    unparseable = await create_meeting(client, auth_headers, "周一例会", TODAY, "FREQ=WEEKLY;BYDAY=MO")
+    assert len(await occurrence_dates(counted)) == 3
+
+    later = meeting_occurrences.horizon_end() + timedelta(days=28)
+    monkeypatch.setattr(meeting_occurrences, "horizon_end", lambda: later)
+
+    async def extend_and_record_loaded():
+        loaded = []
+
+        def on_load(target, context):
+            loaded.append(target.id)
+
+        event.listen(Meeting, "load", on_load)
+        try:
+            async with SessionLocal() as db:
+                await meeting_occurrences.extend_horizon(db)
+                await db.commit()
+        finally:
+            event.remove(Meeting, "load", on_load)
+        return loaded
+
+    # 创建时已标记，后台延伸只加载还会有实例的重复会议
+    loaded = await extend_and_record_loaded()
+    assert weekly in loaded
+    assert not {counted, ended, unparseable} & set(loaded)
+
+    # 迁移前的会议没有标记：加载一次并标记，不修改 updated_at
+    async with SessionLocal() as db:
+        updated_at = await db.scalar(select(Meeting.updated_at).filter(Meeting.id == counted))
+        await db.execute(update(Meeting).filter(Meeting.id.in_([counted, unparseable])).values(
+            occurrences_exhausted=False, updated_at=Meeting.updated_at
+        ))
+        await db.commit()
+    assert {counted, unparseable} <= set(await extend_and_record_loaded())
+    assert not {counted, unparseable} & set(await extend_and_record_loaded())
+    async with SessionLocal() as db:
+        assert await db.scalar(select(Meeting.updated_at).filter(Meeting.id == counted)) == updated_at
+
+    # 修改重复模式后重新物化，标记随之清除
+    response = await client.put(f"/api/v1/meetings/{counted}", headers=auth_headers, json={
+        "recurring_pattern": "weekly"
+    })
+    assert response.status_code == 200, response.text
+    assert counted in await extend_and_record_loaded()
+    assert len(await occurrence_dates(counted)) > 3
@@ -0,0 +1,152 @@
+"""
+迁移：热点索引在迁移前后的查询计划、重复接取记录的检查，以及头像迁移到文件存储
+"""
+
+import argparse
+import base64
+import io
+import os
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from PIL import Image
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import ALEMBIC_INI, engine
+from app.services.avatar_store import avatar_path
+from tests.conftest import create_users
+
+# (查询, 应使用的索引)
+HOT_QUERIES = [
+    ("SELECT id FROM tasks WHERE type = 'TEAM' AND id > 0 ORDER BY id LIMIT 20", "ix_tasks_type_id"),
+    ("SELECT id FROM tasks WHERE status = 'AVAILABLE' AND id > 0 ORDER BY id LIMIT 20", "ix_tasks_status_id"),
+    ("SELECT id FROM tasks WHERE publisher_id = 1 AND id > 0 ORDER BY id LIMIT 20", "ix_tasks_publisher_id_id"),
+    ("SELECT id FROM task_acceptances WHERE user_id = 1 AND id > 0 ORDER BY id LIMIT 20",
+     "ix_task_acceptances_user_id_id"),
+    ("SELECT id FROM task_acceptances WHERE task_id = 1 AND user_id = 1", "uq_task_acceptances_task_id_user_id"),
+    ("SELECT id FROM meetings WHERE meeting_date >= '2025-01-01' AND meeting_date <= '2025-02-01'",
+     "ix_meetings_meeting_date"),
+    ("SELECT id FROM meetings WHERE created_by_id = 1", "ix_meetings_created_by_id"),
+    ("SELECT id FROM meeting_attendances WHERE meeting_id = 1 AND user_id = 1 AND instance_date IS NULL",
+     "ix_meeting_attendances_meeting_id_user_id_instance_date"),
+    ("SELECT id FROM meeting_attendances WHERE user_id = 1", "ix_meeting_attendances_user_id"),
+]
+
+
+async def migrate(action: str, revision: str, *x_arguments: str) -> None:
+    def run(connection):
+        config = Config(ALEMBIC_INI)
+        config.attributes["connection"] = connection
+        config.cmd_opts = argparse.Namespace(x=list(x_arguments))
+        getattr(command, action)(config, revision)
+
+    async with engine.connect() as conn:
+        await conn.run_sync(run)
+
+
+async def query_plan(sql: str) -> str:
+    async with engine.connect() as conn:
+        rows = (await conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))).all()
+    return " | ".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("sql,index", HOT_QUERIES, ids=[index for _, index in HOT_QUERIES])
+async def test_hot_queries_use_migrated_indexes(sql, index):
+    # 迁移前（0002 之前）：不使用该索引
+    await migrate("downgrade", "0001a")
+    assert index not in await query_plan(sql)
+
+    # 迁移后：使用该索引
+    await migrate("upgrade", "head")
+    assert index in await query_plan(sql)
+
+
+async def insert_duplicate_acceptances():
+    publisher, acceptor = await create_users(2)
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO tasks (title, description, type, status, priority, max_accept_count, "
+            "accepted_count, publisher_id) VALUES ('t', 'd', 'TEAM', 'AVAILABLE', 1, 5, 3, :publisher)"
+        ), {"publisher": publisher})
+        for _ in range(3):
+            await conn.execute(text(
+                "INSERT INTO task_acceptances (task_id, user_id, status) VALUES (1, :user, 'IN_PROGRESS')"
+            ), {"user": acceptor})
+
+
+async def acceptance_counts():
+    async with engine.connect() as conn:
+        rows = await conn.scalar(text("SELECT COUNT(*) FROM task_acceptances"))
+        accepted = await conn.scalar(text("SELECT accepted_count FROM tasks WHERE id = 1"))
+    return rows, accepted
+
+
+async def test_duplicate_acceptances_abort_migration():
+    await migrate("downgrade", "0001")
+    await insert_duplicate_acceptances()
+
+    with pytest.raises(RuntimeError, match="重复"):
+        await migrate("upgrade", "head")
+
+    # 数据保持不变
+    assert await acceptance_counts() == (3, 3)
+
+
+async def test_duplicate_acceptances_cleaned_when_requested():
+    await migrate("downgrade", "0001")
+    await insert_duplicate_acceptances()
+
+    await migrate("upgrade", "head", "dedupe_task_acceptances=true")
+
+    assert await acceptance_counts() == (1, 1)
+    assert "uq_task_acceptances_task_id_user_id" in await query_plan(HOT_QUERIES[4][0])
+
+
+def png_data_url() -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), "red").save(buffer, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+async def set_avatar(user_id: int, avatar: str) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text("UPDATE users SET avatar = :avatar WHERE id = :id"), {"avatar": avatar, "id": user_id})
+
+
+async def get_avatar(user_id: int) -> str:
+    async with engine.connect() as conn:
+        return await conn.scalar(text("SELECT avatar FROM users WHERE id = :id"), {"id": user_id})
+
+
+async def test_avatar_migration_round_trip():
+    data_url = png_data_url()
+    user_id, invalid_id = await create_users(2)
+    await migrate("downgrade", "0002")
+    await set_avatar(user_id, data_url)
+    await set_avatar(invalid_id, "data:image/png;base64,not base64!")
+
+    await migrate("upgrade", "head")
+
+    url = await get_avatar(user_id)
+    assert url.startswith("/api/v1/users/avatars/") and url.endswith(".png")
+    assert os.path.exists(avatar_path(url.rsplit("/", 1)[1]))
+    assert await get_avatar(invalid_id) is None
+
+    await migrate("downgrade", "0002")
+    assert await get_avatar(user_id) == data_url
+
+
+async def test_avatar_downgrade_unknown_extension():
+    (user_id,) = await create_users(1)
+    filename = f"{'ab' * 32}.bmp"
+    path = os.path.join(settings.UPLOAD_DIR, "avatars", filename[:2], filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"BM")
+    await set_avatar(user_id, f"/api/v1/users/avatars/{filename}")
+
+    await migrate("downgrade", "0002")
+
+    assert await get_avatar(user_id) == "data:application/octet-stream;base64,Qk0="
@@ -0,0 +1,123 @@
+"""
+游标分页：游标在 X-Next-Cursor 响应头中，按ID升序翻页，指定游标后忽略 skip，无效游标返回 400
+"""
+
+import base64
+
+import pytest
+
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from main import app
+from tests.conftest import register
+
+TASK = {"title": "写文档", "description": "整理接口文档", "type": "team", "priority": 1, "max_accept_count": 3}
+
+TASK_LISTS = ["/api/v1/tasks/", "/api/v1/tasks/available", "/api/v1/tasks/my-tasks", "/api/v1/tasks/accepted"]
+
+
+async def seed(client, headers, count):
+    """alice 发布 count 个任务，bob 全部接取；返回 bob 的认证请求头"""
+    bob = await register(client, "bob")
+    for i in range(count):
+        response = await client.post("/api/v1/tasks/", headers=headers, json={**TASK, "title": f"任务{i}"})
+        assert response.status_code == 200, response.text
+        response = await client.post(f"/api/v1/tasks/{response.json()['id']}/accept", headers=bob)
+        assert response.status_code == 200, response.text
+    return bob
+
+
+async def get_page(client, headers, path, **params):
+    response = await client.get(path, headers=headers, params=params)
+    assert response.status_code == 200, response.text
+    return response.json(), response.headers.get(NEXT_CURSOR_HEADER)
+
+
+async def walk(client, headers, path, limit):
+    """按游标取完所有页，返回每页的ID列表"""
+    pages = []
+    cursor = None
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        items, cursor = await get_page(client, headers, path, **params)
+        pages.append([item["id"] for item in items])
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    for last_id in (0, 1, 42, 2 ** 40):
+        cursor = encode_cursor(last_id)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == last_id
+
+
+@pytest.mark.parametrize("path", TASK_LISTS)
+@pytest.mark.parametrize("count,sizes", [(5, [2, 2, 1]), (4, [2, 2, 0])])
+async def test_pages_follow_cursor(client, auth_headers, path, count, sizes):
+    bob = await seed(client, auth_headers, count)
+    headers = bob if path.endswith("accepted") else auth_headers
+
+    everything, cursor = await get_page(client, headers, path)
+    assert cursor is None
+    ids = [item["id"] for item in everything]
+    assert len(ids) == count and ids == sorted(ids)
+
+    # 最后一页不满时没有游标；恰好满页时再取一次得到空页
+    pages = await walk(client, headers, path, limit=2)
+    assert [len(page) for page in pages] == sizes
+    assert sum(pages, []) == ids
+
+
+async def test_cursor_overrides_skip(client, auth_headers):
+    await seed(client, auth_headers, 5)
+    first, cursor = await get_page(client, auth_headers, "/api/v1/tasks/", limit=2)
+
+    with_skip, _ = await get_page(client, auth_headers, "/api/v1/tasks/", limit=2, cursor=cursor, skip=3)
+    without_skip, _ = await get_page(client, auth_headers, "/api/v1/tasks/", limit=2, cursor=cursor)
+
+    assert with_skip == without_skip
+    assert with_skip[0]["id"] > first[-1]["id"]
+
+
+def urlsafe(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+INVALID_CURSORS = ["!!!", "a", urlsafe(b"page:3"), urlsafe(b"id:abc"), urlsafe(b"\xff\xfe")]
+
+
+@pytest.mark.parametrize("path", TASK_LISTS)
+async def test_invalid_cursor_returns_400(client, auth_headers, path):
+    for cursor in INVALID_CURSORS:
+        response = await client.get(path, headers=auth_headers, params={"cursor": cursor})
+
+        assert response.status_code == 400, cursor
+        assert response.json()["message"] == "无效的分页游标"
+
+
+async def test_search_has_no_cursor(client, auth_headers):
+    await seed(client, auth_headers, 3)
+
+    response = await client.get(
+        "/api/v1/tasks/search", headers=auth_headers, params={"query": "任务", "limit": 2, "cursor": "!!!"}
+    )
+
+    # 搜索按相关度排序，游标参数不生效，也不返回下一页游标
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 2
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_openapi_documents_cursor():
+    paths = app.openapi()["paths"]
+
+    for path in TASK_LISTS:
+        operation = paths[path]["get"]
+        assert "cursor" in [parameter["name"] for parameter in operation["parameters"]]
+        assert NEXT_CURSOR_HEADER in operation["responses"]["200"]["headers"]
+
+    search = paths["/api/v1/tasks/search"]["get"]
+    assert "cursor" not in [parameter["name"] for parameter in search["parameters"]]
+    assert "headers" not in search["responses"]["200"]
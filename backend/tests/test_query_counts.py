@@ -0,0 +1,139 @@
+"""
+列表接口的 SQL 语句数：不随返回行数增长（没有 N+1 查询），会议出席名单的用户一次批量加载；
+/users/me 只按主键查询一次
+"""
+
+import re
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.core.database import SessionLocal
+from app.models import AttendanceStatus, MeetingAttendance, Task, TaskAcceptance, TaskStatus, TaskType, User
+from app.services.collection_versions import TASKS, bump_version
+from tests.conftest import count_statements, create_users
+
+# 路径 -> (语句数：版本号、列表及批量加载的关联对象, 每个 N 返回的行数)
+ROUTES = {
+    "/api/v1/tasks/?limit=1000": (3, 2),
+    "/api/v1/tasks/accepted": (4, 1),
+    "/api/v1/tasks/my-tasks": (2, 1),
+}
+
+
+async def seed(count: int) -> None:
+    """
+    alice 发布 count 个任务，并接取其他 count 个用户各自发布的一个任务
+    （每个任务的发布者不同，逐行加载发布者时语句数会随 count 增长）
+    """
+    publishers = await create_users(count, prefix=f"publisher{count}-")
+    async with SessionLocal() as db:
+        alice_id = await db.scalar(select(User.id).filter(User.username == "alice"))
+        task_rows = [
+            {"title": f"任务{i}", "description": "说明", "type": TaskType.TEAM, "status": TaskStatus.AVAILABLE,
+             "priority": 1, "max_accept_count": 5, "accepted_count": 1, "publisher_id": publisher}
+            for i, publisher in enumerate(publishers)
+        ] + [
+            {"title": f"我的任务{i}", "description": "说明", "type": TaskType.PERSONAL,
+             "status": TaskStatus.AVAILABLE, "priority": 1, "max_accept_count": 1, "accepted_count": 0,
+             "publisher_id": alice_id}
+            for i in range(count)
+        ]
+        task_ids = list((await db.execute(insert(Task).returning(Task.id), task_rows)).scalars())
+        await db.execute(insert(TaskAcceptance), [
+            {"task_id": task_id, "user_id": alice_id, "status": TaskStatus.IN_PROGRESS}
+            for task_id in task_ids[:count]
+        ])
+        await db.commit()
+    await bump_version(TASKS)
+
+
+async def statements_for(client, headers, path, expected_rows):
+    with count_statements() as statements:
+        response = await client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == expected_rows
+    return statements
+
+
+@pytest.mark.parametrize("path", ROUTES)
+async def test_list_statement_count_is_constant(client, auth_headers, path):
+    # 先缓存认证用户，两次计数只包含列表本身的查询
+    response = await client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.status_code == 200
+
+    expected_statements, rows_per_seed = ROUTES[path]
+
+    await seed(1)
+    small = await statements_for(client, auth_headers, path, rows_per_seed)
+
+    await seed(99)
+    large = await statements_for(client, auth_headers, path, 100 * rows_per_seed)
+
+    assert len(small) == expected_statements, "\n".join(small)
+    assert len(large) == len(small), "\n".join(large)
+
+
+async def test_current_user_is_one_primary_key_lookup(client, auth_headers):
+    # 认证用户已缓存；/me 返回完整资料，只按主键查询一次用户表
+    response = await client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.status_code == 200
+
+    with count_statements() as statements:
+        response = await client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert set(response.json()) >= {"email", "avatar", "qq", "created_at"}
+    assert len(statements) == 1, "\n".join(statements)
+    assert "FROM users" in statements[0] and "users.id = " in statements[0]
+
+    # 修改资料后立即读取得到新值
+    response = await client.put("/api/v1/users/me", headers=auth_headers, json={"name": "Alice Liu"})
+    assert response.status_code == 200, response.text
+    response = await client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.json()["name"] == "Alice Liu"
+
+
+async def add_attendees(meeting_id: int, count: int, prefix: str) -> None:
+    users = await create_users(count, prefix=prefix)
+    async with SessionLocal() as db:
+        await db.execute(insert(MeetingAttendance), [
+            {"meeting_id": meeting_id, "user_id": user_id, "status": AttendanceStatus.CONFIRMED}
+            for user_id in users
+        ])
+        await db.commit()
+
+
+def user_queries(statements):
+    return [sql for sql in statements if re.search(r"\bFROM users\b", sql)]
+
+
+@pytest.mark.parametrize("path", ["/api/v1/meetings/{id}", "/api/v1/meetings/{id}/attendance"])
+async def test_attendee_users_loaded_in_one_query(client, auth_headers, path):
+    response = await client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.status_code == 200
+    response = await client.post("/api/v1/meetings/", headers=auth_headers, json={
+        "title": "周会", "type": "meeting", "meeting_date": "2025-11-10T10:00:00", "duration": 30
+    })
+    meeting_id = response.json()["id"]
+    path = path.format(id=meeting_id)
+
+    async def statements_for_roster(attendees):
+        with count_statements() as statements:
+            response = await client.get(path, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        roster = response.json() if isinstance(response.json(), list) else response.json()["attendances"]
+        assert len(roster) == attendees
+        return statements
+
+    await add_attendees(meeting_id, 1, "small")
+    small = await statements_for_roster(1)
+    await add_attendees(meeting_id, 49, "large")
+    large = await statements_for_roster(50)
+
+    assert len(large) == len(small), "\n".join(large)
+    for statements in (small, large):
+        (query,) = user_queries(statements)
+        # 只查询名单需要的字段，不加载密码哈希等其他列
+        columns = re.search(r"SELECT (.*?)\s+FROM users", query, re.S).group(1)
+        assert [column.strip() for column in columns.split(",")] == ["users.id", "users.name", "users.avatar"]
+        assert "users.id IN (" in query
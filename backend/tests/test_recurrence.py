@@ -0,0 +1,139 @@
+"""
+重复规则：直接定位窗口内的第一个实例，结果与逐个迭代一致；月末取当月最后一天；COUNT/UNTIL 截止
+"""
+
+from datetime import datetime, timedelta
+from itertools import count
+
+import pytest
+
+from app.services.recurrence import RecurrenceRule, parse_recurrence
+
+DTSTART = datetime(2024, 1, 31, 9, 30)
+
+
+def brute_force(rule: RecurrenceRule, dtstart: datetime, start: datetime, end: datetime):
+    """逐个迭代实例，取 [start, end] 内的部分"""
+    result = []
+    for index in count():
+        if rule.count is not None and index >= rule.count:
+            break
+        occurrence = rule.nth(dtstart, index)
+        if occurrence > end or (rule.until is not None and occurrence > rule.until):
+            break
+        if occurrence >= start:
+            result.append(occurrence)
+    return result
+
+
+def brute_force_first_index(rule: RecurrenceRule, dtstart: datetime, start: datetime) -> int:
+    return next(index for index in count() if rule.nth(dtstart, index) >= start)
+
+
+RULES = {
+    "daily": RecurrenceRule("DAILY"),
+    "every 3 days": RecurrenceRule("DAILY", interval=3),
+    "weekly": RecurrenceRule("WEEKLY"),
+    "biweekly": RecurrenceRule("WEEKLY", interval=2),
+    "monthly": RecurrenceRule("MONTHLY"),
+    "quarterly": RecurrenceRule("MONTHLY", interval=3),
+}
+
+# 窗口起点：首次之前、恰好是首次、实例之间、恰好是某个实例、很久之后
+STARTS = [
+    DTSTART - timedelta(days=10),
+    DTSTART,
+    DTSTART + timedelta(days=1, hours=2),
+    DTSTART + timedelta(weeks=6),
+    datetime(2024, 3, 31, 9, 30),
+    datetime(2024, 3, 31, 9, 31),
+    datetime(2031, 7, 15),
+]
+
+
+@pytest.mark.parametrize("name", RULES)
+@pytest.mark.parametrize("start", STARTS)
+def test_window_matches_brute_force(name, start):
+    rule = RULES[name]
+    end = start + timedelta(days=120)
+
+    assert rule.first_index_from(DTSTART, start) == brute_force_first_index(rule, DTSTART, start)
+    assert list(rule.occurrences(DTSTART, start=start, end=end)) == brute_force(rule, DTSTART, start, end)
+
+
+def test_month_end_clamped_without_drifting():
+    rule = parse_recurrence("monthly")
+    occurrences = list(rule.occurrences(DTSTART, end=datetime(2025, 3, 31, 23, 59)))
+
+    assert [value.date().isoformat() for value in occurrences[:4]] == [
+        "2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30"
+    ]
+    # 平年的二月取 28 日，三月回到 31 日
+    assert [value.date().isoformat() for value in occurrences[12:15]] == [
+        "2025-01-31", "2025-02-28", "2025-03-31"
+    ]
+    assert all(value.time() == DTSTART.time() for value in occurrences)
+    # 从二月之后开始的窗口同样回到 31 日
+    assert next(rule.occurrences(DTSTART, start=datetime(2025, 3, 1))) == datetime(2025, 3, 31, 9, 30)
+
+
+def test_count_limits_occurrences():
+    rule = parse_recurrence("FREQ=WEEKLY;COUNT=3")
+
+    assert list(rule.occurrences(DTSTART)) == [DTSTART + timedelta(weeks=i) for i in range(3)]
+    assert list(rule.occurrences(DTSTART, start=DTSTART + timedelta(weeks=2))) == [DTSTART + timedelta(weeks=2)]
+    assert list(rule.occurrences(DTSTART, start=DTSTART + timedelta(weeks=2, days=1))) == []
+
+
+@pytest.mark.parametrize("until,last", [
+    ("20240214", datetime(2024, 2, 14, 9, 30)),          # 只有日期时包含当天
+    ("20240214T093000Z", datetime(2024, 2, 14, 9, 30)),  # 恰好等于实例时间
+    ("20240214T092959", datetime(2024, 2, 7, 9, 30)),
+])
+def test_until_cuts_off_occurrences(until, last):
+    rule = parse_recurrence(f"FREQ=WEEKLY;UNTIL={until}")
+
+    occurrences = list(rule.occurrences(DTSTART))
+    assert occurrences[-1] == last
+    assert list(rule.occurrences(DTSTART, start=last + timedelta(seconds=1))) == []
+
+
+def test_open_ended_rule_stops_at_window_end():
+    rule = parse_recurrence("daily")
+
+    occurrences = list(rule.occurrences(DTSTART, start=datetime(2030, 1, 1), end=datetime(2030, 1, 3, 12)))
+    assert occurrences == [datetime(2030, 1, day, 9, 30) for day in (1, 2, 3)]
+
+
+@pytest.mark.parametrize("pattern,freq,interval", [
+    ("daily", "DAILY", 1),
+    ("weekly", "WEEKLY", 1),
+    ("biweekly", "WEEKLY", 2),
+    ("monthly", "MONTHLY", 1),
+    (" Weekly ", "WEEKLY", 1),
+    ("FREQ=WEEKLY;INTERVAL=3", "WEEKLY", 3),
+    ("RRULE:FREQ=MONTHLY;INTERVAL=2", "MONTHLY", 2),
+    ("freq=daily;", "DAILY", 1),
+])
+def test_patterns(pattern, freq, interval):
+    rule = parse_recurrence(pattern)
+
+    assert (rule.freq, rule.interval, rule.count, rule.until) == (freq, interval, None, None)
+
+
+@pytest.mark.parametrize("pattern", [
+    None,
+    "",
+    "yearly",
+    "FREQ=YEARLY",
+    "FREQ=WEEKLY;BYDAY=MO,WE",
+    "FREQ=MONTHLY;BYMONTHDAY=15",
+    "FREQ=WEEKLY;INTERVAL=0",
+    "FREQ=WEEKLY;INTERVAL=two",
+    "FREQ=DAILY;COUNT=0",
+    "FREQ=DAILY;UNTIL=tomorrow",
+    "FREQ=DAILY;COUNT",
+    "INTERVAL=2",
+])
+def test_unsupported_patterns_rejected(pattern):
+    assert parse_recurrence(pattern) is None
@@ -0,0 +1,121 @@
+"""
+Redis 缓存后端（fakeredis）：读写、过期、故障降级，以及多个 worker 共享时的失效
+"""
+
+import asyncio
+import logging
+
+import fakeredis
+import pytest
+import redis.asyncio
+
+from app.core import conditional
+from app.core.cache import Cache, RedisCacheBackend
+from app.core.config import settings
+from app.services import user_service
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    """让 RedisCacheBackend 连接到进程内的 fakeredis 服务器"""
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis.asyncio, "from_url", lambda url, **kwargs: fakeredis.FakeAsyncRedis(server=server)
+    )
+    return server
+
+
+@pytest.fixture
+def shared_caches(monkeypatch, redis_server):
+    """认证缓存和响应缓存使用 Redis 后端（模拟多个 worker 共享）"""
+    monkeypatch.setattr(user_service.user_principal_cache, "backend", RedisCacheBackend("redis://test"))
+    monkeypatch.setattr(conditional.response_cache, "backend", RedisCacheBackend("redis://test"))
+    return redis_server
+
+
+def other_worker_cache(namespace: str) -> Cache:
+    """另一个 worker 中同一命名空间的缓存（连接同一个 Redis）"""
+    cache = Cache(namespace, ttl=60, maxsize=16)
+    cache.backend = RedisCacheBackend("redis://test")
+    return cache
+
+
+async def test_get_set_delete(redis_server):
+    backend = RedisCacheBackend("redis://test")
+
+    assert await backend.get("k") is None
+    await backend.set("k", b"value", ttl=60)
+    assert await backend.get("k") == b"value"
+    await backend.delete("k")
+    assert await backend.get("k") is None
+
+
+async def test_ttl_expires(redis_server):
+    backend = RedisCacheBackend("redis://test")
+
+    await backend.set("k", b"value", ttl=0.05)
+    await asyncio.sleep(0.1)
+
+    assert await backend.get("k") is None
+
+
+async def test_cache_keys_are_namespaced(redis_server):
+    cache = Cache("principal", ttl=60, maxsize=16)
+    cache.backend = RedisCacheBackend("redis://test")
+
+    await cache.set("alice", b"x")
+
+    client = fakeredis.FakeAsyncRedis(server=redis_server)
+    assert await client.get(f"{settings.CACHE_KEY_PREFIX}:principal:alice") == b"x"
+
+
+async def test_unavailable_redis_is_a_miss(redis_server, caplog):
+    backend = RedisCacheBackend("redis://test")
+    redis_server.connected = False
+
+    with caplog.at_level(logging.WARNING, logger="app.core.cache"):
+        assert await backend.get("k") is None
+        await backend.set("k", b"value", ttl=60)
+        await backend.delete("k")
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert [m.split(":")[0] for m in messages] == ["读取 Redis 缓存失败", "写入 Redis 缓存失败", "删除 Redis 缓存失败"]
+    # 消息参数在输出时才格式化
+    assert all(record.args for record in caplog.records)
+
+
+async def test_principal_invalidated_for_all_workers(client, auth_headers, shared_caches):
+    response = await client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.status_code == 200
+    other = other_worker_cache(user_service.user_principal_cache.namespace)
+    assert await other.get("alice") is not None
+
+    response = await client.put("/api/v1/users/me", headers=auth_headers, json={"name": "Alice Liddell"})
+    assert response.status_code == 200, response.text
+
+    # 其他 worker 不会再读到修改前的认证用户
+    assert await other.get("alice") is None
+    response = await client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.json()["name"] == "Alice Liddell"
+    assert b"Alice Liddell" in await other.get("alice")
+
+
+async def test_list_invalidated_for_all_workers(client, auth_headers, shared_caches):
+    response = await client.get("/api/v1/tasks/", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == []
+    etag = response.headers["etag"]
+    other = other_worker_cache(conditional.response_cache.namespace)
+    assert await other.get(etag) is not None
+
+    response = await client.post("/api/v1/tasks/", headers=auth_headers, json={
+        "title": "写文档", "description": "整理接口文档", "type": "team", "priority": 1, "max_accept_count": 3
+    })
+    assert response.status_code == 200, response.text
+
+    # 版本号变化后 ETag 变化，共享缓存中旧的响应不再被使用
+    response = await client.get("/api/v1/tasks/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert [task["title"] for task in response.json()] == ["写文档"]
+    assert response.headers["etag"] != etag
+    assert await other.get(response.headers["etag"]) == await conditional.response_cache.get(response.headers["etag"])
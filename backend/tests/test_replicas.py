@@ -0,0 +1,135 @@
+"""
+只读副本路由：DATABASE_REPLICA_URLS 指向第二个 SQLite 文件
+
+副本是主库在测试开始时的快照，之后不再同步，因此能区分请求读的是哪个库。
+"""
+
+import itertools
+import os
+
+import pytest
+from sqlalchemy import text
+
+from app.core import database
+from app.core.config import settings
+from tests.conftest import TEST_DIR, count_statements, register, remove_database
+
+REPLICA_DB = os.path.join(TEST_DIR, "replica.db")
+
+READ_ONLY_ROUTES = [
+    "/api/v1/tasks/",
+    "/api/v1/tasks/available",
+    "/api/v1/tasks/my-tasks",
+    "/api/v1/tasks/accepted",
+    "/api/v1/tasks/search?query=副本",
+    "/api/v1/tasks/1",
+    "/api/v1/meetings/",
+    "/api/v1/meetings/my-meetings",
+]
+
+
+@pytest.fixture
+async def replica(monkeypatch, client):
+    """注册 alice 后把主库复制为副本，read 会话改用副本"""
+    headers = await register(client, "alice", "Alice")
+
+    remove_database(REPLICA_DB)
+    async with database.engine.connect() as conn:
+        await conn.exec_driver_sql(f"VACUUM INTO '{REPLICA_DB}'")
+
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URLS", f"sqlite:///{REPLICA_DB}")
+    replica_engines = [database.create_database_engine(url) for url in settings.database_replica_urls]
+    monkeypatch.setattr(database, "replica_engines", replica_engines)
+    monkeypatch.setattr(
+        database, "_replica_sessions",
+        itertools.cycle([database.create_session_factory(replica) for replica in replica_engines])
+    )
+
+    # 认证用户写入缓存，之后的只读请求不再查询主库
+    response = await client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 200
+
+    yield replica_engines[0], headers
+    await replica_engines[0].dispose()
+    remove_database(REPLICA_DB)
+
+
+async def insert_task(engine, title):
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO tasks (title, description, type, status, priority, max_accept_count, accepted_count, "
+            "publisher_id) VALUES (:title, '只写入一个库', 'TEAM', 'AVAILABLE', 1, 3, 0, 1)"
+        ), {"title": title})
+
+
+@pytest.mark.parametrize("path", READ_ONLY_ROUTES)
+async def test_read_only_routes_use_replica(client, replica, path):
+    replica_engine, headers = replica
+    await insert_task(replica_engine, "副本中的任务")
+
+    with count_statements() as primary, count_statements(replica_engine) as secondary:
+        response = await client.get(path, headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert primary == []
+    assert secondary
+
+
+async def test_lists_read_replica_data(client, replica):
+    replica_engine, headers = replica
+    await insert_task(replica_engine, "副本中的任务")
+
+    response = await client.get("/api/v1/tasks/", headers=headers)
+
+    assert [task["title"] for task in response.json()] == ["副本中的任务"]
+
+
+async def test_writes_go_to_primary(client, replica):
+    replica_engine, headers = replica
+
+    with count_statements(replica_engine) as secondary:
+        response = await client.post("/api/v1/tasks/", headers=headers, json={
+            "title": "新任务", "description": "写入主库", "type": "team", "priority": 1, "max_accept_count": 3
+        })
+        assert response.status_code == 200, response.text
+        task_id = response.json()["id"]
+
+        # 修改和接取先在主库中读取刚写入的任务
+        response = await client.put(f"/api/v1/tasks/{task_id}", headers=headers, json={"title": "改标题"})
+        assert response.status_code == 200, response.text
+        assert response.json()["title"] == "改标题"
+        response = await client.post(f"/api/v1/tasks/{task_id}/accept", headers=headers)
+        assert response.status_code == 200, response.text
+
+    assert secondary == []
+    async with database.engine.connect() as conn:
+        assert await conn.scalar(text("SELECT title FROM tasks WHERE id = :id"), {"id": task_id}) == "改标题"
+    async with replica_engine.connect() as conn:
+        assert await conn.scalar(text("SELECT COUNT(*) FROM tasks")) == 0
+
+
+async def test_read_after_write_routes_use_primary(client, replica):
+    replica_engine, headers = replica
+    response = await client.post("/api/v1/meetings/", headers=headers, json={
+        "title": "周会", "type": "meeting", "meeting_date": "2025-11-10T10:00:00", "duration": 30
+    })
+    assert response.status_code == 200, response.text
+    meeting_id = response.json()["id"]
+
+    with count_statements(replica_engine) as secondary:
+        response = await client.put("/api/v1/users/me", headers=headers, json={"name": "Alice Liddell"})
+        assert response.status_code == 200, response.text
+        response = await client.get("/api/v1/users/me", headers=headers)
+        assert response.json()["name"] == "Alice Liddell"
+
+        response = await client.post(
+            f"/api/v1/meetings/{meeting_id}/attendance", headers=headers, json={"status": "confirmed"}
+        )
+        assert response.status_code == 200, response.text
+        response = await client.get(f"/api/v1/meetings/{meeting_id}/attendance", headers=headers)
+        assert [record["status"] for record in response.json()] == ["confirmed"]
+        response = await client.get("/api/v1/meetings/user/attendances", headers=headers)
+        assert meeting_id in [record["meeting_id"] for record in response.json()]
+
+    # 副本中没有这些数据，上面的读取只能来自主库
+    assert secondary == []
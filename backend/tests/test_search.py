@@ -0,0 +1,123 @@
+"""
+全文搜索：中文二元组、英文前缀匹配、相关度排序，以及迁移 0006 的分批回填
+"""
+
+import importlib.util
+import os
+
+import pytest
+from sqlalchemy import insert, text
+
+from app.core.database import ALEMBIC_INI, SessionLocal, engine
+from app.models import Task, TaskStatus, TaskType
+from app.services.search_index import tokenize_document
+from tests.conftest import create_users
+from tests.test_migrations import migrate
+
+MIGRATION = os.path.join(os.path.dirname(ALEMBIC_INI), "alembic", "versions", "0006_search_indexes.py")
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("search_indexes_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def create_task(client, headers, title, description="无"):
+    response = await client.post("/api/v1/tasks/", headers=headers, json={
+        "title": title, "description": description, "type": "team", "priority": 1, "max_accept_count": 3
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def search(client, headers, query):
+    response = await client.get("/api/v1/tasks/search", headers=headers, params={"query": query})
+    assert response.status_code == 200, response.text
+    return [task["title"] for task in response.json()]
+
+
+@pytest.mark.parametrize("query,found", [
+    ("登录", True),
+    ("录页", True),   # 相邻二元组
+    ("登", True),     # 单字
+    ("修复登录页面", True),
+    ("登页", False),  # 不相邻的两个字
+    ("注册", False),
+])
+async def test_cjk_bigrams(client, auth_headers, query, found):
+    await create_task(client, auth_headers, "修复登录页面")
+
+    assert (await search(client, auth_headers, query) == ["修复登录页面"]) is found
+
+
+@pytest.mark.parametrize("query,found", [
+    ("depl", True),
+    ("Deploy", True),
+    ("pipe", True),
+    ("deploy pipe", True),
+    ("ploy", False),  # 只匹配单词前缀
+    ("deployment", False),
+])
+async def test_prefix_matching(client, auth_headers, query, found):
+    await create_task(client, auth_headers, "Deploy pipeline")
+
+    assert (await search(client, auth_headers, query) == ["Deploy pipeline"]) is found
+
+
+async def test_results_ordered_by_relevance(client, auth_headers):
+    await create_task(client, auth_headers, "前端页面", "页面需要连接数据库查询")
+    await create_task(client, auth_headers, "数据库迁移", "数据库备份和数据库恢复")
+    await create_task(client, auth_headers, "写周报")
+
+    assert await search(client, auth_headers, "数据库") == ["数据库迁移", "前端页面"]
+
+
+async def test_index_follows_updates_and_deletes(client, auth_headers):
+    task_id = await create_task(client, auth_headers, "整理文档")
+
+    response = await client.put(f"/api/v1/tasks/{task_id}", headers=auth_headers, json={"title": "发布版本"})
+    assert response.status_code == 200, response.text
+    assert await search(client, auth_headers, "文档") == []
+    assert await search(client, auth_headers, "版本") == ["发布版本"]
+
+    response = await client.delete(f"/api/v1/tasks/{task_id}", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert await search(client, auth_headers, "版本") == []
+
+
+async def test_user_search_matches_username_prefix(client, auth_headers):
+    response = await client.get("/api/v1/users/users/search", headers=auth_headers, params={"query": "ali"})
+    assert response.status_code == 200, response.text
+    assert [user["username"] for user in response.json()] == ["alice"]
+
+
+@pytest.mark.parametrize("value", ["修复登录页面", "Deploy pipeline v2", "张三 zhang_san@example.com", "一", ""])
+def test_migration_tokenizer_matches_application(value):
+    assert load_migration().tokenize_document(value, "附加 text") == tokenize_document(value, "附加 text")
+
+
+async def test_migration_backfills_in_batches(client, auth_headers):
+    rows = load_migration().BATCH_SIZE * 2 + 5
+    await migrate("downgrade", "0005")
+    async with engine.connect() as conn:
+        tables = await conn.scalar(text("SELECT COUNT(*) FROM sqlite_master WHERE name LIKE '%_fts'"))
+    assert tables == 0
+
+    (publisher,) = await create_users(1)
+    async with SessionLocal() as db:
+        await db.execute(insert(Task), [
+            {"title": f"历史任务{i}", "description": "回填", "type": TaskType.TEAM, "status": TaskStatus.AVAILABLE,
+             "priority": 1, "max_accept_count": 1, "accepted_count": 0, "publisher_id": publisher}
+            for i in range(rows)
+        ])
+        await db.commit()
+
+    await migrate("upgrade", "head")
+
+    async with engine.connect() as conn:
+        assert await conn.scalar(text("SELECT COUNT(*) FROM tasks_fts")) == rows
+        # alice 和批量创建的用户
+        assert await conn.scalar(text("SELECT COUNT(*) FROM users_fts")) == 2
+    assert await search(client, auth_headers, f"历史任务{rows - 1}") == [f"历史任务{rows - 1}"]
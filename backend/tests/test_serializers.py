@@ -0,0 +1,176 @@
+"""
+响应序列化：orjson 预序列化的输出与 pydantic 响应模型一致（时间的 Z 后缀、枚举值）
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import List
+
+import orjson
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+
+from app.core.database import SessionLocal
+from app.core.serializers import (
+    JSONBytesResponse, UNKNOWN_PUBLISHER, acceptance_to_dict, dumps, meeting_instance_to_dict, meeting_to_dict,
+    task_to_dict
+)
+from app.models import MeetingType, Task, TaskStatus, TaskType, User
+from app.schemas import MeetingResponse, TaskAcceptanceResponse, TaskResponse
+from app.services.collection_versions import TASKS, bump_version
+from tests.conftest import median_time
+
+PAGE_SIZE = 1000
+ROUNDS = 5
+
+UTC_TIME = datetime(2025, 11, 10, 2, 30, 15, 123456, tzinfo=timezone.utc)
+OFFSET_TIME = datetime(2025, 11, 10, 10, 30, tzinfo=timezone(timedelta(hours=8)))
+NAIVE_TIME = datetime(2025, 11, 10, 10, 30)
+
+
+def make_task(task_id=1, moment=UTC_TIME, **overrides):
+    fields = dict(
+        id=task_id, title=f"任务{task_id}", description="说明", type=TaskType.TEAM, priority=3,
+        status=TaskStatus.IN_PROGRESS, deadline=moment, tags='["前端", "urgent"]', accepted_count=1,
+        max_accept_count=3, publisher_id=7, created_at=moment, updated_at=None
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def make_meeting(moment=NAIVE_TIME, **overrides):
+    fields = dict(
+        id=5, title="周会", description=None, type=MeetingType.EVENT, meeting_date=moment, duration=45,
+        is_recurring=True, recurring_pattern="weekly", created_by_id=7, created_at=moment, updated_at=moment
+    )
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def encoded(data):
+    return orjson.loads(dumps(data))
+
+
+@pytest.mark.parametrize("moment", [UTC_TIME, OFFSET_TIME, NAIVE_TIME])
+def test_task_matches_response_model(moment):
+    data = task_to_dict(make_task(moment=moment), SimpleNamespace(name="Alice"))
+
+    assert encoded(data) == TaskResponse.model_validate(data).model_dump(mode="json")
+
+
+def test_datetime_and_enum_encoding():
+    data = encoded(task_to_dict(make_task(tags=None), None))
+
+    assert data["created_at"] == "2025-11-10T02:30:15.123456Z"
+    assert data["type"] == "team"
+    assert data["status"] == "in_progress"
+    assert data["tags"] == []
+    assert data["updated_at"] is None
+    assert data["publisher_name"] == UNKNOWN_PUBLISHER
+    assert encoded(task_to_dict(make_task(moment=OFFSET_TIME), None))["deadline"] == "2025-11-10T10:30:00+08:00"
+
+
+def test_acceptance_matches_response_models():
+    task = make_task(publisher=SimpleNamespace(name="Bob"))
+    acceptance = SimpleNamespace(
+        id=9, task_id=task.id, user_id=2, status=TaskStatus.COMPLETED, accepted_at=UTC_TIME,
+        completed_at=UTC_TIME + timedelta(hours=1), task=task
+    )
+    data = acceptance_to_dict(acceptance)
+    output = encoded(data)
+
+    # 接取记录的字段与 TaskAcceptanceResponse 一致，附带的任务与 TaskResponse 一致
+    task_output = output.pop("task")
+    assert output == TaskAcceptanceResponse.model_validate(data).model_dump(mode="json")
+    assert output["completed_at"] == "2025-11-10T03:30:15.123456Z"
+    assert task_output == TaskResponse.model_validate(data["task"]).model_dump(mode="json")
+    assert task_output["publisher_name"] == "Bob"
+
+
+def meeting_fields(output):
+    return {key: output[key] for key in MeetingResponse.model_fields}
+
+
+@pytest.mark.parametrize("with_attendance", [False, True])
+def test_meeting_matches_response_model(with_attendance):
+    meeting = make_meeting(is_recurring=False, recurring_pattern=None)
+    output = encoded(meeting_to_dict(meeting, with_attendance=with_attendance))
+
+    assert meeting_fields(output) == MeetingResponse.model_validate(meeting).model_dump(mode="json")
+    assert output["type"] == "event"
+    assert output["meetingId"] == output["id"] and output["date"] == output["meeting_date"]
+    assert ("attendance" in output) is with_attendance
+
+
+def test_meeting_instance_matches_response_model():
+    meeting = make_meeting()
+    occurrence = NAIVE_TIME + timedelta(days=7)
+    output = encoded(meeting_instance_to_dict(meeting, occurrence))
+
+    expected = MeetingResponse.model_validate(meeting).model_dump(mode="json")
+    expected.update(id=f"{meeting.id}_2025-11-17", meeting_date="2025-11-17T10:30:00")
+    assert meeting_fields(output) == expected
+    assert output["meetingId"] == meeting.id
+    assert output["isRecurring"] is True and output["attendance"] == "pending"
+
+
+def test_meeting_dates_keep_isoformat_offset():
+    # 会议日期沿用 isoformat 字符串（Python 3.9 的 fromisoformat 不能解析 Z），
+    # UTC 时间为 +00:00 后缀，与 pydantic 的 Z 表示同一时刻
+    meeting = make_meeting(moment=UTC_TIME, is_recurring=False, recurring_pattern=None)
+    output = encoded(meeting_to_dict(meeting))
+
+    assert output["meeting_date"] == "2025-11-10T02:30:15.123456+00:00"
+    assert MeetingResponse.model_validate(meeting).model_dump(mode="json")["meeting_date"] == \
+        "2025-11-10T02:30:15.123456Z"
+    assert datetime.fromisoformat(output["meeting_date"]) == UTC_TIME
+
+
+async def test_task_page_matches_response_model(client, auth_headers):
+    async with SessionLocal() as db:
+        alice_id = await db.scalar(select(User.id).filter(User.username == "alice"))
+        await db.execute(insert(Task), [
+            {"title": f"任务{i}", "description": "说明", "type": TaskType.TEAM, "status": TaskStatus.AVAILABLE,
+             "priority": 1 + i % 5, "max_accept_count": 3, "accepted_count": 0, "publisher_id": alice_id,
+             "tags": '["a", "b"]' if i % 2 else None, "deadline": NAIVE_TIME + timedelta(days=i)}
+            for i in range(PAGE_SIZE)
+        ])
+        await db.commit()
+    await bump_version(TASKS)
+
+    response = await client.get("/api/v1/tasks/", headers=auth_headers, params={"limit": PAGE_SIZE})
+    assert response.status_code == 200, response.text
+    tasks = response.json()
+
+    assert len(tasks) == PAGE_SIZE
+    assert tasks == TypeAdapter(List[TaskResponse]).dump_python(
+        TypeAdapter(List[TaskResponse]).validate_python(tasks), mode="json"
+    )
+
+
+def response_model_render(page, adapter):
+    """原来的路径：按 response_model 校验，jsonable_encoder，再用标准库编码"""
+    content = jsonable_encoder(adapter.validate_python(page))
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def test_task_page_benchmark():
+    publisher = SimpleNamespace(name="Alice")
+    tasks = [make_task(i) for i in range(PAGE_SIZE)]
+    adapter = TypeAdapter(List[TaskResponse])
+
+    fast_body, fast = median_time(
+        lambda: JSONBytesResponse([task_to_dict(task, publisher) for task in tasks]).body, ROUNDS
+    )
+    slow_body, slow = median_time(
+        lambda: response_model_render([task_to_dict(task, publisher) for task in tasks], adapter), ROUNDS
+    )
+
+    assert orjson.loads(fast_body) == orjson.loads(slow_body)
+    print(
+        f"\n{PAGE_SIZE} 行任务列表: response_model 路径 {slow * 1000:.1f}ms, "
+        f"orjson 预序列化 {fast * 1000:.1f}ms"
+    )
@@ -0,0 +1,102 @@
+"""
+SQLite 连接配置：新连接上的 PRAGMA、连接池大小，以及读写混合负载
+"""
+
+import asyncio
+import os
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.database import SessionLocal, create_database_engine, engine
+from app.models import Task, TaskType
+from app.schemas import TaskCreate
+from app.services.task_service import TaskService
+from tests.conftest import TEST_DIR, create_users, latency_summary, remove_database, timed
+
+READERS = 200
+WRITERS = 50
+
+
+async def pragmas(target) -> dict:
+    async with target.connect() as conn:
+        return {
+            name: (await conn.exec_driver_sql(f"PRAGMA {name}")).scalar()
+            for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size")
+        }
+
+
+async def test_fresh_connection_pragmas():
+    await engine.dispose()
+
+    values = await pragmas(engine)
+
+    assert values["journal_mode"] == "wal"
+    assert values["synchronous"] == 1  # NORMAL
+    assert values["busy_timeout"] == settings.SQLITE_BUSY_TIMEOUT_MS
+    assert values["cache_size"] == -settings.SQLITE_CACHE_SIZE_KB
+    assert values["mmap_size"] == settings.SQLITE_MMAP_SIZE
+    assert engine.pool.size() == settings.SQLITE_POOL_SIZE
+
+
+async def test_engine_uses_configured_settings(monkeypatch):
+    path = os.path.join(TEST_DIR, "configured.db")
+    remove_database(path)
+    monkeypatch.setattr(settings, "SQLITE_JOURNAL_MODE", "DELETE")
+    monkeypatch.setattr(settings, "SQLITE_BUSY_TIMEOUT_MS", 1234)
+    monkeypatch.setattr(settings, "SQLITE_POOL_SIZE", 3)
+    monkeypatch.setattr(settings, "SQLITE_MAX_OVERFLOW", 2)
+
+    configured = create_database_engine(f"sqlite:///{path}")
+    try:
+        values = await pragmas(configured)
+        assert values["journal_mode"] == "delete"
+        assert values["busy_timeout"] == 1234
+        assert configured.pool.size() == 3
+        assert configured.pool._max_overflow == 2
+    finally:
+        await configured.dispose()
+        remove_database(path)
+
+
+async def test_memory_database_uses_single_connection():
+    memory = create_database_engine("sqlite:///:memory:")
+    try:
+        assert isinstance(memory.pool, StaticPool)
+        assert (await pragmas(memory))["busy_timeout"] == settings.SQLITE_BUSY_TIMEOUT_MS
+    finally:
+        await memory.dispose()
+
+
+async def test_mixed_read_write_benchmark():
+    (publisher,) = await create_users(1)
+
+    async def read():
+        async with SessionLocal() as db:
+            await TaskService(db).get_tasks(limit=100)
+
+    async def write(i):
+        async with SessionLocal() as db:
+            await TaskService(db).create_task(
+                TaskCreate(title=f"任务{i}", description="读写混合", type=TaskType.TEAM, max_accept_count=3),
+                publisher
+            )
+
+    operations = [read] * READERS + [lambda i=i: write(i) for i in range(WRITERS)]
+    # 读写交错提交
+    operations = operations[::2] + operations[1::2]
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(timed(operation) for operation in operations))
+    total = time.perf_counter() - started
+
+    # 所有写入都成功提交（没有 database is locked）
+    async with SessionLocal() as db:
+        assert await db.scalar(select(func.count()).select_from(Task)) == WRITERS
+
+    print(
+        f"\n{READERS} 读 + {WRITERS} 写（连接池 {settings.SQLITE_POOL_SIZE}+{settings.SQLITE_MAX_OVERFLOW}）: "
+        f"总耗时 {total * 1000:.1f}ms, {latency_summary([elapsed for _, elapsed in results])}"
+    )
@@ -1,6 +1,10 @@
 /**
  * API 客户端 - 统一管理后端接口调用
  */
+
+// 响应中的头像地址字段（后端返回相对地址）
+const AVATAR_FIELDS = ['avatar', 'user_avatar'];
+
 class ApiClient {
     constructor() {
         // 从配置或环境变量获取后端地址
@@ -18,6 +22,30 @@ class ApiClient {
         return 'http://118.195.243.30:8000';
     }
 
+    // 后端返回的相对地址（如头像 /api/v1/users/avatars/...）补全为后端完整地址
+    resolveURL(url) {
+        if (url && url.startsWith('/api/')) {
+            return `${this.baseURL}${url}`;
+        }
+        return url;
+    }
+
+    // 补全响应中所有头像字段（avatar、user_avatar，包括嵌套的名单和出席记录）
+    resolveAvatarURLs(data) {
+        if (Array.isArray(data)) {
+            data.forEach((item) => this.resolveAvatarURLs(item));
+        } else if (data && typeof data === 'object') {
+            for (const [key, value] of Object.entries(data)) {
+                if (AVATAR_FIELDS.includes(key)) {
+                    data[key] = this.resolveURL(value);
+                } else if (value && typeof value === 'object') {
+                    this.resolveAvatarURLs(value);
+                }
+            }
+        }
+        return data;
+    }
+
     async getToken() {
         if (!this.token) {
             this.token = await window.electronAPI?.getStoreValue('auth_token');
@@ -90,7 +118,7 @@ class ApiClient {
                 );
             }
 
-            return result;
+            return this.resolveAvatarURLs(result);
         } catch (error) {
             console.error(`API请求失败 [${method} ${endpoint}]:`, error);
             throw error;